@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""
+Atoms of a Gaussian z-matrix (.com) as columns: one NumPy array per
+property instead of one atoms.Atom (and MM, Oniom, RESinfo) per atom.
+Lines are parsed as iolines.zmat2atom() does, without openbabel; Atom
+objects are only made when asked for, one at a time:
+
+    table = AtomTable.from_zmat_lines(lines)
+    table.xyz[table.layer == 'H']       # (n, 3) coordinates of layer H
+    table[12]                           # atoms.Atom of the 13th atom
+    table.zmat_lines()                  # == [iolines.atom2zmat(atom), ...]
+
+String columns are object arrays of interned strings ('' if not set).
+"""
+
+# python modules
+from sys import intern
+import numpy as np
+
+STRING_COLUMNS = ['element', 'atype', 'layer', 'link_element', 'link_atype',
+                  'pdbname', 'resname', 'chain']
+
+
+class AtomTable():
+
+    def __init__(self, n_atoms=0):
+        self.xyz = np.zeros((n_atoms, 3))
+        self.has_mm = np.zeros(n_atoms, dtype=bool)         # H-HC-0.1, not H
+        self.charge = np.zeros(n_atoms)                     # MM charge
+        self.is_oniom = np.zeros(n_atoms, dtype=bool)       # 6 field lines
+        self.mask = np.zeros(n_atoms, dtype=np.int32)       # 0 or -1
+        self.link_bound_to = np.zeros(n_atoms, dtype=np.int32) # 0: no link
+        self.link_scale1 = np.zeros(n_atoms)
+        self.link_has_mm = np.zeros(n_atoms, dtype=bool)
+        self.link_charge = np.zeros(n_atoms)
+        self.has_resinfo = np.zeros(n_atoms, dtype=bool)
+        self.resnum = np.zeros(n_atoms, dtype=np.int32)
+        for name in STRING_COLUMNS:
+            column = np.empty(n_atoms, dtype=object)
+            column[:] = ''
+            setattr(self, name, column)
+
+    def __len__(self):
+        return len(self.xyz)
+
+    def __getitem__(self, i):
+        return self.atom(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.atom(i)
+
+    @classmethod
+    def from_zmat_lines(cls, lines):
+        """AtomTable of z-matrix lines, i.e. C-CT--0.2  0  1.0 1.1 1.2 L"""
+        rows = [_parse_zmat_line(line) for line in lines]
+        table = cls(0)
+        if not rows:
+            return table
+        columns = list(zip(*rows))
+        (table.xyz, table.has_mm, table.charge, table.is_oniom, table.mask,
+         table.link_bound_to, table.link_scale1, table.link_has_mm,
+         table.link_charge, table.has_resinfo, table.resnum) = [
+            np.array(column, dtype=dtype) for (column, dtype) in
+            zip(columns[:11], [float, bool, float, bool, np.int32, np.int32,
+                               float, bool, float, bool, np.int32])]
+        for (name, column) in zip(STRING_COLUMNS, columns[11:]):
+            array = np.empty(len(rows), dtype=object)
+            array[:] = column
+            setattr(table, name, array)
+        return table
+
+    def atom(self, i):
+        """atoms.Atom of atom i (a new object each time)"""
+        from omg import atoms # openbabel
+        atom = atoms.Atom(self.element[i], self.xyz[i])
+        if self.has_mm[i]:
+            atom.set_mm(atoms.MM(self.atype[i], self.charge[i]))
+        if self.is_oniom[i]:
+            oniom = atoms.Oniom(self.mask[i], self.layer[i])
+            if self.link_bound_to[i]:
+                link_atom = atoms.Atom(self.link_element[i], (0, 0, 0))
+                if self.link_has_mm[i]:
+                    link_atom.set_mm(atoms.MM(self.link_atype[i],
+                                              self.link_charge[i]))
+                oniom.set_link(link_atom, self.link_bound_to[i],
+                               self.link_scale1[i])
+            atom.set_oniom(oniom)
+        if self.has_resinfo[i]:
+            atom.set_resinfo(atoms.RESinfo(self.pdbname[i], self.resname[i],
+                                           self.resnum[i], self.chain[i]))
+        return atom
+
+    def atoms_list(self):
+        """atoms.Atom of every atom"""
+        return [self.atom(i) for i in range(len(self))]
+
+    def zmat_template(self, i, print_resinfo=True):
+        """
+        iolines.atom2zmat() line of atom i with %11.6f in place of each
+        coordinate, so that only these are formatted for each geometry
+        """
+        mm, resinfo, oniom = None, None, None
+        if self.has_mm[i]:
+            mm = (self.atype[i], self.charge[i])
+        if self.has_resinfo[i] and print_resinfo:
+            resinfo = (self.pdbname[i], self.resname[i], self.resnum[i],
+                       self.chain[i])
+        if self.is_oniom[i]:
+            link = None
+            if self.link_bound_to[i]:
+                link_mm = None
+                if self.link_has_mm[i]:
+                    link_mm = (self.link_atype[i], float(self.link_charge[i]))
+                link = (self.link_element[i], link_mm,
+                        int(self.link_bound_to[i]), float(self.link_scale1[i]))
+            oniom = (int(self.mask[i]), self.layer[i], link)
+        return zmat_template(self.element[i], mm, resinfo, oniom)
+
+    def zmat_lines(self, print_resinfo=True):
+        """z-matrix lines, as iolines.atom2zmat() writes them"""
+        return [self.zmat_template(i, print_resinfo) % tuple(xyz)
+                for (i, xyz) in enumerate(self.xyz.tolist())]
+
+
+def zmat_template(element, mm=None, resinfo=None, oniom=None):
+    """
+    z-matrix line with %11.6f in place of each coordinate, the one format
+    of iolines.atom2zmat() and AtomTable.zmat_lines():
+        mm:         (atype, charge) or None
+        resinfo:    (pdbname, resname, resnum, chain) or None
+        oniom:      (mask, layer, link) or None, with link None or
+                    (element, mm, bound_to, scale1)
+    """
+    if mm:
+        line = '{0}-{1}-{2:.9f}'.format(element, mm[0], mm[1])
+        line = '{0:.15s}'.format(line) # fill with spaces (max 15 char)
+    else:
+        line = ' {0:1s}'.format(element)
+    if resinfo:
+        line = '{0}(PDBName={1},ResName={2},ResNum={3}_{4})'.format(
+            line, *resinfo)
+        line = '{0:60s}'.format(line)
+    line = line.replace('%', '%%')
+    if not oniom:
+        return line + '%11.6f %11.6f %11.6f\n'
+    (mask, layer, link) = oniom
+    line += '{0:>4d} %11.6f %11.6f %11.6f {1:s}'.format(mask, layer)
+    if link:
+        (link_element, link_mm, bound_to, scale1) = link
+        text = ' {0}'.format(link_element)
+        if link_mm:
+            text += '-{0}-{1}'.format(*link_mm)
+        text += ' {0} {1}'.format(bound_to, scale1)
+        line += text.replace('%', '%%')
+    return line + '\n'
+
+
+def _parse_mm_info(mm_info):
+    """(element, has_mm, atype, charge) of H-HC--0.02, H-HC or H"""
+    splits = mm_info.split('-', 2)
+    if len(splits) == 3:
+        return (intern(splits[0]), True, intern(splits[1]), float(splits[2]))
+    if len(splits) == 2:
+        return (intern(splits[0]), True, intern(splits[1]), 0.0)
+    return (intern(splits[0]), False, '', 0.0)
+
+
+def _parse_resinfo(resinfo):
+    """(pdbname, resname, resnum, chain) of PDBName=x,ResName=y,ResNum=1_A"""
+    name, resname, resnum, chain = '', '', '', ''
+    for info in resinfo.split(','):
+        if 'PDBName' in info:
+            name = info.split('=')[1].strip()
+        if 'ResName' in info:
+            resname = info.split('=')[1].strip()
+        if 'ResNum' in info:
+            resnum = info.split('=')[1].strip()
+            if '_' in resnum: # looks like "123_A"
+                resnum, chain = resnum.split('_')
+    return (intern(name), intern(resname), int(resnum), intern(chain))
+
+
+def _parse_zmat_line(line):
+    """row of AtomTable.from_zmat_lines, as iolines.zmat2atom() reads it"""
+    resinfo = None
+    if '(' in line and ')' in line:
+        resinfo = line.split('(')[1].split(')')[0]
+        line = line.split('(')[0] + line.split(')')[1]
+    fields = line.strip().split(None, 5)
+    (element, has_mm, atype, charge) = _parse_mm_info(fields[0])
+    mask, layer = 0, ''
+    link = (0, 0.0, '', False, '', 0.0)
+    if len(fields) == 6:
+        mask, layer = int(fields[1]), intern(fields[5][0])
+        link_fields = fields[5][1:].split()
+        if len(link_fields) == 1:
+            raise RuntimeError('missing bound_to in link atom: %s' % (
+                ' '.join(link_fields)))
+        elif len(link_fields) > 1:
+            link_fields.append('0.0')
+            (link_element, link_has_mm, link_atype, link_charge) = \
+                _parse_mm_info(link_fields[0])
+            link = (int(link_fields[1]), float(link_fields[2]), link_element,
+                    link_has_mm, link_atype, link_charge)
+        xyz = (float(fields[2]), float(fields[3]), float(fields[4]))
+    elif len(fields) == 4:
+        xyz = (float(fields[1]), float(fields[2]), float(fields[3]))
+    else:
+        raise RuntimeError('Expected 4 or 6 fields in zmat line')
+    (pdbname, resname, resnum, chain) = ('', '', 0, '')
+    if resinfo:
+        (pdbname, resname, resnum, chain) = _parse_resinfo(resinfo)
+    (link_bound_to, link_scale1, link_element, link_has_mm, link_atype,
+     link_charge) = link
+    return (xyz, has_mm, charge, len(fields) == 6, mask, link_bound_to,
+            link_scale1, link_has_mm, link_charge, bool(resinfo), resnum,
+            element, atype, layer, link_element, link_atype, pdbname,
+            resname, chain)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+"""
+SQLite catalog of Gaussian jobs: one row per .log with what is usually
+asked about a campaign (termination, error code, steps, final energies),
+so that questions like "which scans ended in intCoord errors" are a query
+instead of opening every log again.
+
+Logs are ingested incrementally: a log is only read again when its size
+or mtime changed, and then GaussianLog uses its byte index (.index.npy),
+so grown logs only have their new bytes indexed. Logs that can not be
+read are kept with errorcode 'unreadable' until they change.
+
+    cat = Catalog('jobs.sqlite')
+    cat.ingest_tree('.')
+    cat.query("errorcode = ? AND is_scan", ('intCoord',))
+    cat.query("n_steps > 0", columns="version, nprocshared, natoms, "
+              "3600.0 * n_steps / wall_time AS steps_per_hour")
+"""
+
+# python modules
+import os
+import sqlite3
+import time
+from sys import stderr
+import numpy as np
+
+# qt modules
+from omg.gaussian import logfile
+
+LOG_EXTENSIONS = ('.log',) + tuple('.log' + ext
+                                   for ext in logfile.COMPRESSED_EXTENSIONS)
+
+COLUMNS = [
+    ('path',            'TEXT PRIMARY KEY'),    # absolute
+    ('size',            'INTEGER'),             # size and mtime: fingerprint
+    ('mtime',           'REAL'),
+    ('route_md5',       'TEXT'),
+    ('route_section',   'TEXT'),
+    ('status',          'TEXT'),                # Normal, Error or NULL
+    ('errorcode',       'TEXT'),                # Termination().errorcode
+    ('version',         'TEXT'),                # g09a, g09c, g09d
+    ('is_scan',         'INTEGER'),             # modredundant S lines
+    ('n_scan',          'INTEGER'),             # scan points done
+    ('n_steps',         'INTEGER'),             # opt steps, all scan points
+    ('scf_energy',      'REAL'),                # of the last step
+    ('oniom_energy',    'REAL'),                # extrapolated, last step
+    ('ingested',        'REAL'),                # time.time()
+    ('nprocshared',     'INTEGER'),             # %nprocshared, NULL if unset
+    ('mem',             'TEXT'),                # %mem
+    ('natoms',          'INTEGER'),
+    ('cpu_time',        'REAL'),                # seconds, all jobs (Link1)
+    ('wall_time',       'REAL')]                # seconds, all jobs (Link1)
+
+INDEXED_COLUMNS = ['status', 'errorcode', 'route_md5']
+
+
+class Catalog():
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.db = sqlite3.connect(filename)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('CREATE TABLE IF NOT EXISTS logs (%s)' % ', '.join(
+            ['%s %s' % column for column in COLUMNS]))
+        existing = [row['name'] for row in
+                    self.db.execute('PRAGMA table_info(logs)')]
+        missing = [column for column in COLUMNS if column[0] not in existing]
+        for column in missing: # catalogs of older versions
+            self.db.execute('ALTER TABLE logs ADD COLUMN %s %s' % column)
+        if missing: # read every log again next time
+            self.db.execute('UPDATE logs SET size = NULL')
+        for column in INDEXED_COLUMNS:
+            self.db.execute('CREATE INDEX IF NOT EXISTS logs_%s ON logs (%s)'
+                            % (column, column))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def _known(self):
+        """{path: (size, mtime)} of the catalog"""
+        return dict((row['path'], (row['size'], row['mtime'])) for row in
+                    self.db.execute('SELECT path, size, mtime FROM logs'))
+
+    def ingest(self, paths):
+        """
+        Reads the logs in paths that are new or changed since they were
+        last ingested. Returns the list of paths read.
+        """
+        known = self._known()
+        done = []
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+            except OSError as error:
+                stderr.write('%s: not ingested (%s)\n' % (path, error))
+                continue
+            if known.get(path) == (stat.st_size, stat.st_mtime):
+                continue
+            row = self._read_log(path, stat)
+            self.db.execute('INSERT OR REPLACE INTO logs (%s) VALUES (%s)' % (
+                ', '.join([name for (name, _) in COLUMNS]),
+                ', '.join(['?'] * len(COLUMNS))), row)
+            done.append(path)
+        self.db.commit()
+        return done
+
+    def ingest_tree(self, root):
+        """ingest() of every log under root, and forget the deleted ones"""
+        paths = []
+        for (dirpath, dirnames, filenames) in os.walk(root):
+            paths += [os.path.join(dirpath, name) for name in filenames
+                      if name.endswith(LOG_EXTENSIONS)]
+        done = self.ingest(paths)
+        self.prune(root)
+        return done
+
+    def prune(self, root=None):
+        """Removes the logs (under root) that no longer exist"""
+        known = self._known()
+        if root is not None:
+            prefix = os.path.join(os.path.abspath(root), '')
+            known = [path for path in known if path.startswith(prefix)]
+        gone = [(path,) for path in known if not os.path.exists(path)]
+        self.db.executemany('DELETE FROM logs WHERE path = ?', gone)
+        self.db.commit()
+        return [path for (path,) in gone]
+
+    def _read_log(self, path, stat):
+        """row of the logs table"""
+        from omg.gaussian.gaussian import GaussianLog # openbabel
+        try:
+            gl = GaussianLog(path, lazy=True)
+            table = gl.energy_table
+            modreds = gl.modreds if isinstance(gl.modreds, list) else []
+            link0 = gl.header['link0']
+            last_opt = [opt for opt in gl.bytedict['orientation:'] if opt]
+            natoms = None
+            if last_opt:
+                natoms = gl.read_coordinates_array([last_opt[-1][-1]]).shape[1]
+            (cpu, elapsed) = gl.read_job_times()
+            if len(cpu) == 0:
+                cpu = gl.timings['cpu']
+            if len(elapsed) == 0:
+                elapsed = gl.timings['wall']
+            row = (
+                path, stat.st_size, stat.st_mtime,
+                gl.routesection_md5sum, gl.route_section,
+                gl.termination.status, gl.termination.errorcode,
+                gl.gaussian_version,
+                int(any(modred.action == 'S' for modred in modreds)),
+                len(gl.bytedict['orientation:']),
+                len(table),
+                _last_value(table['SCF_energy']),
+                _last_value(table['ONIOM_extrapol']),
+                time.time(),
+                int(link0['nprocshared']) if 'nprocshared' in link0 else None,
+                link0.get('mem'),
+                natoms,
+                _total(cpu),
+                _total(elapsed))
+        except Exception as error:
+            stderr.write('%s: not read (%s: %s)\n' % (
+                path, type(error).__name__, error))
+            return self._unreadable_row(path, stat)
+        return row
+
+    def _unreadable_row(self, path, stat):
+        """row of a log that could not be read: kept, with errorcode
+        'unreadable', so that it is only read again once it changes"""
+        row = dict((name, None) for (name, _) in COLUMNS)
+        row.update({'path': path, 'size': stat.st_size,
+                    'mtime': stat.st_mtime, 'errorcode': 'unreadable',
+                    'ingested': time.time()})
+        return tuple(row[name] for (name, _) in COLUMNS)
+
+    def query(self, where='1', params=(), columns='*'):
+        """
+        sqlite3.Row list of the logs matching the SQL where clause, i.e.
+            query("errorcode = ? AND path LIKE ?", ('intCoord', '/scans/%'))
+        """
+        return self.db.execute('SELECT %s FROM logs WHERE %s ORDER BY path'
+                               % (columns, where), params).fetchall()
+
+    def counts(self, column='errorcode', where='1', params=()):
+        """[(value, number of logs)] of column, i.e. per error code"""
+        return [tuple(row) for row in self.db.execute(
+            'SELECT %s, COUNT(*) FROM logs WHERE %s GROUP BY %s ORDER BY %s'
+            % (column, where, column, column), params)]
+
+
+def _last_value(values):
+    """last value that is not nan, as float, None if there is none"""
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    return float(values[-1])
+
+
+def _total(values):
+    """sum of the values that are not nan, as float, None if there are none"""
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    return float(values.sum())
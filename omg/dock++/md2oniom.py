@@ -32,25 +32,21 @@ INIT, END, STEP = ARGS.selection
 
 def main():
 
-    #open gaussian model file
-    gaussian_file = gaussian.GaussianCom(GAUCOM)
+    #open gaussian model file, only coordinates change between files
+    template = gaussian.ComTemplate(gaussian.GaussianCom(GAUCOM))
     
     # read coordinates from mdcrd
-    no_atoms = len(gaussian_file.atoms_list)
+    no_atoms = len(template)
     for step in range(INIT,END,STEP):
         new_coordinates = amber.extract_from_mdcrd(MDCRD, no_atoms, step-1,
                                                   output_box_info = True) 
         box_dimensions = new_coordinates[-1]
         new_coordinates = new_coordinates[:-1]
-        for i, atom in enumerate(gaussian_file.atoms_list):
-            atom.SetVector(new_coordinates[i][0],
-                           new_coordinates[i][1],
-                           new_coordinates[i][2])
 
         # make a new gaussian file with every conformation
         new_gaussian_filename = '{0:04d}_{1}'.format(step, GAUCOM) 
         print("Writing {}".format(new_gaussian_filename))
-        gaussian_file.write_to_file(new_gaussian_filename)
+        template.write(new_gaussian_filename, new_coordinates)
 
 if __name__ == "__main__":
     main()
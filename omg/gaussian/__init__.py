@@ -0,0 +1,3 @@
+from omg.gaussian.batch import load_logs, LogSummary
+
+__all__ = ['load_logs', 'LogSummary']
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Index and parse many Gaussian .log files in a process pool.
+
+Each worker builds a GaussianLog (which saves the byte index next to the
+log, as usual) and sends back a LogSummary: plain lists, dicts and NumPy
+arrays only, so it pickles cheaply and holds no open files or openbabel
+objects.
+"""
+
+# python modules
+import multiprocessing
+import os
+from sys import stderr
+import numpy as np
+
+
+class LogSummary():
+    """What load_logs() returns for each log"""
+
+    def __init__(self, gaussianlog):
+        self.name = gaussianlog.name
+        self.route_section = gaussianlog.route_section
+        self.gaussian_version = gaussianlog.gaussian_version
+        self.bytedict = gaussianlog.bytedict
+        self.energy_table = gaussianlog.energy_table
+        self.energies = gaussianlog.energies
+        self.termination = gaussianlog.termination   # Termination()
+        last_opt = [opt for opt in self.bytedict['orientation:'] if opt]
+        if last_opt:
+            self.final_xyz = gaussianlog.read_coordinates_array(
+                [last_opt[-1][-1]])[0]
+        else:
+            self.final_xyz = np.empty((0, 3))
+        # counted from the index or the z-matrix lines: no atoms.Atom made
+        self.natoms = len(self.final_xyz)
+        if not last_opt and 'Z-mat' in self.bytedict:
+            self.natoms = len(gaussianlog._read_zmat(
+                self.bytedict['Z-mat'][0][0]))
+
+
+def summarize_log(name):
+    """LogSummary of one log, None if it can not be read"""
+    from omg.gaussian.gaussian import GaussianLog # openbabel, load in workers
+    try:
+        # pool workers can not start pools: index in-process
+        return LogSummary(GaussianLog(name, lazy=True, workers=1))
+    except Exception as error:
+        stderr.write('%s: not loaded (%s: %s)\n' % (
+            name, type(error).__name__, error))
+        return None
+
+
+def load_logs(paths, workers=None):
+    """
+    List of LogSummary (or None for logs that failed), in the order of paths.
+    workers: number of processes, default os.cpu_count(). 1 runs serially.
+    """
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        return [summarize_log(name) for name in paths]
+    pool = multiprocessing.Pool(workers)
+    try:
+        # one log per task: sizes vary too much for bigger chunks
+        return pool.map(summarize_log, paths, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
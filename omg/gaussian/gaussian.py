@@ -2,23 +2,106 @@
 
 # python modules
 import re
+import bisect
 import collections
-import subprocess
 import linecache
-import pickle
 import openbabel as ob
 from copy import deepcopy
 from hashlib import md5
-from os.path import exists as hazfile
-from os.path import getsize
 from sys import stderr
+import calendar
 import copy
+import os
+import time
+import numpy as np
 
 # our python modules
 from omg import atoms
+from omg import atomtable
 from omg import molecules
 from omg import iolines
 from omg import misc
+from omg.gaussian import logfile
+from omg.gaussian import logindex
+from omg.gaussian import logblocks
+
+TERMINATION_LINES = ['Normal termination', 'Error termination']
+
+# title of charge tables in the log: kind of charges
+CHARGE_KEYWORDS = collections.OrderedDict([
+    ('Mulliken charges:',           'Mulliken'),
+    ('Mulliken atomic charges:',    'Mulliken'),    # g03
+    ('ESP charges:',                'ESP'),
+    ('Charges from ESP fit',        'ESP'),
+    ('APT charges:',                'APT'),
+    ('APT atomic charges:',         'APT')])
+
+# title of the normal modes sections (freq jobs), in freq_bytes
+FREQ_KEYWORD = 'Harmonic frequencies'
+
+# first line of every job (--Link1-- jobs too), in jobs
+JOB_KEYWORD = 'Entering Link 1 ='
+
+# point lines of IRC jobs, in irc_bytes:
+#  Point Number:   3          Path Number:   1
+#    CHANGE IN THE REACTION COORDINATE =    0.10003
+#    NET REACTION COORDINATE UP TO THIS POINT =    0.30011
+IRC_KEYWORD = 'Path Number:'
+IRC_COORDINATE_LABEL = 'NET REACTION COORDINATE UP TO THIS POINT ='
+IRC_POINT_LINES = 4 # the coordinate is within this many lines of the point
+
+# columns of the IRC table, one row per point, reverse path first. path
+# is 0 for the TS, 1 forward and 2 reverse. coordinate is negative for the
+# reverse path. scan and opt of the point's last step, -1 for the TS.
+IRC_DTYPE = np.dtype([
+    ('path', np.int32),
+    ('point', np.int32),
+    ('coordinate', np.float64),     # sqrt(amu)*bohr
+    ('energy', np.float64),         # ONIOM extrapolated, or SCF if no ONIOM
+    ('scan', np.int32),
+    ('opt', np.int32)])
+
+# timing lines, in timing_bytes
+TIMING_KEYWORDS = ['Leave Link', 'Job cpu time:', 'Elapsed time:']
+LEAVE_LINK_DATE = '%a %b %d %H:%M:%S %Y' # Mon Jan  1 00:00:00 2020
+
+# columns of GaussianLog.timings, one row per optimization step, seconds
+# of the links run since the previous step. elapsed is nan before g16.
+TIMINGS_DTYPE = np.dtype([
+    ('scan', np.int32),
+    ('opt', np.int32),
+    ('cpu', np.float64),        # sum of Leave Link cpu:
+    ('elapsed', np.float64),    # sum of Leave Link elap:
+    ('wall', np.float64),       # between Leave Link time stamps
+    ('scf_cycles', np.int32)])  # SCF Done: ... after N cycles, -1 if none
+
+# how cached indexes were validated: 'stat' (size and mtime), 'fingerprint'
+# (head and tail md5), 'deep' (z-matrix, route and last geometry), 'miss'
+INDEX_CHECKS = collections.Counter()
+
+HEADER_MAX_BYTES = 16 * 1024 * 1024 # ~200k lines, enough for big ONIOM z-mats
+HEADER_READ_SIZE = 64 * 1024
+GAUSSIAN_VERSIONS = [
+    ('g09/a_pgi105', 'g09a'),
+    ('g09/d_pgi133', 'g09d'),
+    ('g09/c_pgi133', 'g09c')]
+
+# columns of GaussianLog.energy_table, one row per optimization step.
+# ONIOM columns are nan for steps without ONIOM energies.
+ONIOM_ENERGY_LABELS = [
+    ('ONIOM_model_low',     'low   system:  model energy:'),
+    ('ONIOM_model_high',    'high  system:  model energy:'),
+    ('ONIOM_real_low',      'low   system:  real  energy:'),
+    ('ONIOM_extrapol',      'extrapolated energy =')]
+ENERGY_TABLE_DTYPE = np.dtype([
+    ('scan', np.int32),
+    ('opt', np.int32),
+    ('ONIOM_extrapol', np.float64),
+    ('ONIOM_model_high', np.float64),
+    ('ONIOM_model_low', np.float64),
+    ('ONIOM_real_low', np.float64),
+    ('ONIOM_lowlayer_low', np.float64),
+    ('SCF_energy', np.float64)])
 
 ADDITIONAL_INPUT_DICT = collections.OrderedDict([
                                                 ("connect", []),
@@ -80,6 +163,10 @@ class ModRed():
         pass
 
 class EmptyGaussianCom():
+
+    atom_table = None   # atomtable.AtomTable of the z-matrix, if read
+    _atoms_list = None  # made from atom_table when first used
+
     def __init__(self, name):
         self.name = name
         self.link_0_commands = ["%nproc=8\n", "%mem=6GB\n", "%chk=default.chk\n"]
@@ -89,31 +176,110 @@ class EmptyGaussianCom():
         self.atoms_list = []# ob.OBMol()
         self.additional_input_dict = ADDITIONAL_INPUT_DICT.copy()
 
+    @property
+    def atoms_list(self):
+        """atoms.Atom list, made from atom_table when first used"""
+        if self._atoms_list is None:
+            if self.atom_table is None:
+                self._atoms_list = []
+            else:
+                self._atoms_list = self.atom_table.atoms_list()
+        return self._atoms_list
+
+    @atoms_list.setter
+    def atoms_list(self, atoms_list):
+        self._atoms_list = atoms_list
+
     def write_to_file(self,name):
+        with open(name, 'w') as gaussian_com_file:
+            gaussian_com_file.write(self._head_text())
+            if self._atoms_list is None and self.atom_table is not None:
+                # atoms were never used: no need to make them
+                gaussian_com_file.writelines(self.atom_table.zmat_lines())
+            else:
+                for atom in self.atoms_list:
+                    line = iolines.atom2zmat(atom)
+                    gaussian_com_file.write(line)                
+            gaussian_com_file.write(self._tail_text())
+
+    def _head_text(self):
+        """link 0, route, title and multiplicity: what comes before the atoms"""
+        text = ''.join(self.link_0_commands)
+        text += self.route_section.write().replace('\n ','\n') # FIXME
+        text += "\n"
+        text += self.title_line
+        text += "\n"
+        text += self.multiplicity_line
+        return text
+
+    def _tail_text(self):
+        """additional input (connectivity, modred, ...) after the atoms"""
         self.additional_input_dict['modred'] = [m.write() for m in self.modreds]
+        text = ''
+        for section in self.additional_input_dict:
+            if self.additional_input_dict[section]:
+                text += "\n"
+                if section == 'first' and 'soft' in self.route_section.text:
+                    text += "\n"
+                elif section == 'dftb=read' and 'dftb=read' in self.route_section.text:
+                    text += "\n"
+                text += ''.join(self.additional_input_dict[section])
+        text += "\n\n\n\n\n"
+        return text
+
+class ComTemplate():
+    """
+    Input of a GaussianCom rendered once, with a %11.6f slot for each
+    coordinate: writing an input for a new geometry only formats the
+    coordinates, i.e. one input per frame of a trajectory:
+
+        template = ComTemplate(GaussianCom('model.com'))
+        for (k, xyz) in enumerate(frames):         # (n_atoms, 3)
+            template.write('%04d.com' % k, xyz)
+
+    Everything else (link 0, route, title, MM types and charges, residues,
+    connectivity, parameters) is what the GaussianCom had when the
+    template was made.
+    """
+
+    def __init__(self, gaussiancom):
+        self.name = gaussiancom.name
+        self.head = gaussiancom._head_text()
+        self.tail = gaussiancom._tail_text()
+        if gaussiancom._atoms_list is None and gaussiancom.atom_table is not None:
+            table = gaussiancom.atom_table
+            templates = [table.zmat_template(i) for i in range(len(table))]
+            self.xyz = table.xyz.copy()
+        else:
+            atoms_list = gaussiancom.atoms_list
+            templates = [iolines.atom2zmat_template(atom) for atom in atoms_list]
+            self.xyz = np.array([(atom.GetX(), atom.GetY(), atom.GetZ())
+                                 for atom in atoms_list]).reshape(-1, 3)
+        self.atoms_format = ''.join(templates)
+
+    def __len__(self):
+        return len(self.xyz)
+
+    def text(self, xyz=None):
+        """input with the coordinates in xyz, default those of the template"""
+        if xyz is None:
+            xyz = self.xyz
+        xyz = np.asarray(xyz, dtype=float)
+        if xyz.shape != self.xyz.shape:
+            raise RuntimeError('%s: template has %d atoms, got %s coordinates'
+                               % (self.name, len(self), xyz.shape))
+        return self.head + self.atoms_format % tuple(xyz.ravel().tolist()) + \
+            self.tail
+
+    def write(self, name, xyz=None):
         with open(name, 'w') as gaussian_com_file:
-            for line in self.link_0_commands:
-                gaussian_com_file.write(line)
-            gaussian_com_file.write(self.route_section.write().replace('\n ','\n')) # FIXME
-            gaussian_com_file.write("\n")   
-            gaussian_com_file.write(self.title_line)
-            gaussian_com_file.write("\n")
-            gaussian_com_file.write(self.multiplicity_line)
-            for atom in self.atoms_list:
-                line = iolines.atom2zmat(atom)
-                gaussian_com_file.write(line)                
-            for section in self.additional_input_dict:
-                if self.additional_input_dict[section]:
-                    gaussian_com_file.write("\n")
-                    if section == 'first' and 'soft' in self.route_section.text:
-                        gaussian_com_file.write("\n")
-                    elif section == 'dftb=read' and 'dftb=read' in self.route_section.text:
-                        gaussian_com_file.write("\n")
-                    for line in self.additional_input_dict[section]:
-                        gaussian_com_file.write(line)
-            gaussian_com_file.write("\n\n\n\n\n")
+            gaussian_com_file.write(self.text(xyz))
+
 
 class GaussianCom(EmptyGaussianCom):
+
+    _bonds_list = None  # made from connectivity_list when first used
+
     def __init__(self, name):
             self.name = name
             self.lines = self._read_lines()
@@ -125,7 +291,6 @@ class GaussianCom(EmptyGaussianCom):
             self._read_structure()
             self.additional_input_dict = self._read_additional_input()            
             self.connectivity_list = self.additional_input_dict["connect"]
-            self.bonds_list = self._read_bonds_list()  
             self.modreds = [ModRed(line)
                             for line in self.additional_input_dict["modred"]]
             self.modredundant_list = self.additional_input_dict["modred"]
@@ -183,12 +348,21 @@ class GaussianCom(EmptyGaussianCom):
         return multiplicity_line
 
     def _read_structure(self):
-        """ Return a list of atoms"""
-        #for line in self.lines[self.blank_lines[1]+2:self.blank_lines[2]]:
-        #    atoms_list.append(iolines.zmat2atom(line))
-        self.atoms_list = [] #ob.OBMol()
-        for line in self.lines[self.blank_lines[1]+2:self.blank_lines[2]]:
-            self.atoms_list.append(iolines.zmat2atom(line))
+        """ Reads the atoms into atom_table, atoms_list is made from it"""
+        self.atom_table = atomtable.AtomTable.from_zmat_lines(
+            self.lines[self.blank_lines[1]+2:self.blank_lines[2]])
+        self._atoms_list = None
+
+    @property
+    def bonds_list(self):
+        """molecules.Bond list of the connectivity, made when first used"""
+        if self._bonds_list is None:
+            self._bonds_list = self._read_bonds_list()
+        return self._bonds_list
+
+    @bonds_list.setter
+    def bonds_list(self, bonds_list):
+        self._bonds_list = bonds_list
 
     def _read_additional_input(self):
         """Reads additional input lines and stores it in a ordered dict"""
@@ -263,33 +437,179 @@ class GaussianCom(EmptyGaussianCom):
         return None
 
 class GaussianLog():
-    def __init__(self, name):
-        self.name = name
-        self.file = open(self.name, 'r')
-        self.route_section  = self._read_route_section()
-        self.modreds = self._read_modred()
 
+    # attribute: method that reads it, when first accessed
+    _LAZY_ATTRIBUTES = collections.OrderedDict([
+        ('header',              '_read_header'),
+        ('route_section',       '_read_route_section'),
+        ('routesection_md5sum', '_gen_routesection_md5sum'),
+        ('modreds',             '_read_modred'),
+        ('bytedict',            '_index_bytes'),
+        ('energy_table',        'read_energy_table'),
+        ('energies',            '_read_energies'),
+        ('atoms_list',          '_Zmat_to_atoms_list'),
+        ('zmat_md5sum',         '_gen_zmat_md5sum'),
+        ('final_geometry',      '_read_final_geometry'),
+        ('charge_bytes',        '_index_charges'),
+        ('micro_bytes',         '_index_microiterations'),
+        ('freq_bytes',          '_index_frequencies'),
+        ('timing_bytes',        '_index_timings'),
+        ('timings',             'read_timings'),
+        ('jobs',                '_index_jobs'),
+        ('irc_bytes',           '_index_irc'),
+        ('termination',         'get_termination'),     # read error / normal
+        ('gaussian_version',    'get_gaussian_version')
+    ])
+
+    # read in this order when the object is created, unless lazy=True
+    _EAGER_ATTRIBUTES = ['route_section', 'routesection_md5sum', 'modreds',
+                         'bytedict', 'energies', 'atoms_list', 'zmat_md5sum',
+                         'final_geometry', 'termination', 'gaussian_version']
+
+    def __init__(self, name, lazy=False, workers=1):
+        """
+            lazy=True postpones reading anything until it is needed, i.e.
+            GaussianLog(name, lazy=True).termination only reads the log tail
+            workers: processes that index big logs, default in-process
+        """
+        self.name = name
+        self.workers = workers
         self.grep_keywords = self._set_grep_keywords()
-
-        # make a function for this
-        (donebytes, bytelist) = self._check_bytelist()
-        bytelist = self._grep_bytelist(bytelist, donebytes)
-        self.bytedict = self.bytelist2dict(bytelist)
-        self.grep_bytes = self.bytedict # stupid thing to do
+        self._layouts = {} # orientation title: layout, kept in the index
+        self._keywords_added = False # index had fewer keywords: save it
+        self._job_start = 0     # bytes of the job, for LogJob
+        self._job_stop = None
 
         # Insanity check
         #self._sanity_check  = self._sanity_check(self.bytedict['Optimized Parameters'][0])
 
         # Load stuff automatically
-        self.energies       = self._read_energies()
         #self.convergency   = self._read_convergency()  # RMS Force, etc...
-        self.atoms_list     = self._Zmat_to_atoms_list()
         #self.summary = self._generate_summary()
-        self.final_geometry = self.read_geometry(-1, -1)
-        self._save_bytelist(bytelist, self._gen_signature())
-        self.termination    = self.get_termination()   # read error / normal
-        self.gaussian_version = self.get_gaussian_version()
-        self.close_file()
+        if not lazy:
+            for attribute in self._EAGER_ATTRIBUTES:
+                getattr(self, attribute)
+
+    def __getattr__(self, attribute):
+        """only called for missing attributes: read and keep them"""
+        if attribute not in self._LAZY_ATTRIBUTES:
+            raise AttributeError("'GaussianLog' object has no attribute '%s'"
+                                 % attribute)
+        value = getattr(self, self._LAZY_ATTRIBUTES[attribute])()
+        setattr(self, attribute, value)
+        return value
+
+    @property
+    def grep_bytes(self):
+        return self.bytedict # stupid thing to do
+
+    @property
+    def frames(self):
+        """Frames view of bytedict['orientation:'], see Frames"""
+        return Frames(self, self.bytedict['orientation:'])
+
+    @property
+    def _bytelist(self):
+        """(byte, key) list of the index, for the readers that walk it"""
+        self.bytedict # builds self._byteindex
+        return logindex.byteindex_to_bytelist(self._byteindex,
+                                              self.grep_keywords)
+
+    def _key_bytes(self, *keys):
+        """bytes of the lines with any of keys, in order"""
+        self.bytedict # builds self._byteindex
+        (allbytes, key_ids) = self._byteindex
+        ids = [self.grep_keywords.index(key) for key in keys
+               if key in self.grep_keywords]
+        return allbytes[np.isin(key_ids, ids)].tolist()
+
+    def _index_bytes(self):
+        (donebytes, byteindex) = self._check_bytelist()
+        self._indexed_bytes = logindex.complete_lines_size(self.name)
+        up_to_date = (donebytes == self._indexed_bytes and
+                      self._index_check in ('stat', 'fingerprint') and
+                      not self._keywords_added and
+                      logfile.has_stored_info(self.name))
+        byteindex = self._grep_bytelist(byteindex, donebytes)
+        # (bytes, key ids) arrays, kept in memory for refresh()
+        self._byteindex = byteindex
+        self._raw_bytedict, self._bytedict_buffers = self._new_bytedict()
+        self._update_bytedict(
+            self._raw_bytedict, self._bytedict_buffers, byteindex)
+        self.bytedict = self._ghostless(self._raw_bytedict)
+        if not up_to_date:
+            self._save_bytelist(byteindex, self._gen_signature())
+        return self.bytedict
+
+    def refresh(self, callbacks=None):
+        """
+        Indexes only the bytes written to the log since it was last indexed
+        (for running jobs). Energies, final geometry and termination are
+        read again when next accessed.
+
+        callbacks: {event: function(gaussianlog, byte)}, called for each new
+            event. Events are grep_keywords (i.e. 'Converged?', 'Step number')
+            and 'termination' (Normal or Error termination line).
+
+        Returns the list of new (byte, key), termination events included.
+        """
+        if callbacks is None:
+            callbacks = {}
+        self.bytedict # index if never indexed
+        start = self._indexed_bytes
+        stop = logindex.complete_lines_size(self.name)
+        if stop < start: # log was overwritten, start over
+            stderr.write('%s: log is smaller, indexing again\n' % self.name)
+            for attribute in self._LAZY_ATTRIBUTES:
+                self.__dict__.pop(attribute, None)
+            self.bytedict
+            return list(self._bytelist)
+        if stop == start:
+            return []
+
+        new_bytelist = logindex.index_file_parallel(
+            self.name, self.grep_keywords, start, stop, self.workers)
+        new_byteindex = logindex.bytelist_to_byteindex(new_bytelist,
+                                                       self.grep_keywords)
+        self._byteindex = tuple(np.concatenate(arrays) for arrays in
+                                zip(self._byteindex, new_byteindex))
+        self._update_bytedict(
+            self._raw_bytedict, self._bytedict_buffers, new_byteindex)
+        self.bytedict = self._ghostless(self._raw_bytedict)
+        self._indexed_bytes = stop
+        for attribute in ('energy_table', 'energies', 'final_geometry',
+                          'termination', 'charge_bytes', 'micro_bytes',
+                          'freq_bytes', 'timing_bytes', 'timings', 'jobs',
+                          'irc_bytes'):
+            self.__dict__.pop(attribute, None)
+
+        events = new_bytelist + [(byte, 'termination') for byte in
+            logindex.find_in_file(self.name, TERMINATION_LINES, start, stop)]
+        events.sort()
+        for (byte, key) in events:
+            if key in callbacks:
+                callbacks[key](self, byte)
+        return events
+
+    def follow(self, callbacks=None, interval=60, timeout=None):
+        """
+        Calls refresh(callbacks) every interval seconds until the job
+        terminates (a termination line and nothing written after it)
+        or timeout seconds pass. Then the index is saved. Returns at once
+        for logs that had already terminated.
+        """
+        begin = time.time()
+        self.bytedict # index if never indexed
+        terminated = self.termination.status is not None
+        while True:
+            events = self.refresh(callbacks)
+            if terminated and not events:
+                break
+            terminated = bool(events) and events[-1][1] == 'termination'
+            if timeout is not None and time.time() - begin > timeout:
+                break
+            time.sleep(interval)
+        self._save_bytelist(self._byteindex, self._gen_signature())
 
     def _set_grep_keywords(self):
         grep_keywords = [
@@ -301,23 +621,30 @@ class GaussianLog():
             'Step number',                  
             'Optimized Parameters',        # Also reads Non-Opt... 
             'Delta-x Convergence Met',     # For IRC
-            'CORRECTOR']                  # For IRC
+            'CORRECTOR',                  # For IRC
+            'Forces (Hartrees/Bohr)']
+        grep_keywords += list(CHARGE_KEYWORDS) # charge_bytes, not in bytedict
+        grep_keywords.append(FREQ_KEYWORD)      # freq_bytes, not in bytedict
+        grep_keywords += TIMING_KEYWORDS        # timing_bytes, not in bytedict
+        grep_keywords.append(JOB_KEYWORD)       # jobs, not in bytedict
+        grep_keywords.append(IRC_KEYWORD)       # irc_bytes, not in bytedict
         return grep_keywords
 
     def _read_zmat(self, locbyte):
-        self.file.seek(locbyte)
-        self.file.readline()                             # skip line 
-        while True:                              # skip multiplicity linee{4:4s}
-            line = self.file.readline()
-            if 'Charge' not in line:
-                break
-        Zmat_text = [line]
-        while True:
-            line = self.file.readline()
-            if line.strip() != '':
-                Zmat_text.append(line.strip())
-            else:
-                break
+        with logfile.open_log(self.name) as f:
+            f.seek(locbyte)
+            f.readline()                             # skip line 
+            while True:                              # skip multiplicity linee{4:4s}
+                line = f.readline()
+                if 'Charge' not in line:
+                    break
+            Zmat_text = [line]
+            while True:
+                line = f.readline()
+                if line.strip() != '':
+                    Zmat_text.append(line.strip())
+                else:
+                    break
 
         # generate md5sum
         self.zmat_md5sum = md5() 
@@ -327,6 +654,8 @@ class GaussianLog():
         return Zmat_text
 
     def _Zmat_to_atoms_list(self):
+        if 'Z-mat' not in self.bytedict: # i.e. error before the z-matrix
+            return []
         Zmat_text = self._read_zmat(self.bytedict['Z-mat'][0][0])
 
         atoms_list = []
@@ -334,407 +663,1009 @@ class GaussianLog():
             atoms_list.append(iolines.zmat2atom(line))
         return atoms_list
 
-    def _check_bytelist(self):
-        """check if bytelist file exists and matches current log"""
+    def _gen_zmat_md5sum(self):
+        if 'Z-mat' not in self.bytedict:
+            return None
+        self._read_zmat(self.bytedict['Z-mat'][0][0])
+        return self.zmat_md5sum
 
-        # haz file?
-        bytelist_filename = '%s.bytelist' % self.name
-        if not hazfile(bytelist_filename): 
-            stderr.write('Bytelist: no file\n')
-            return (0, [])
+    def _index_jobs(self):
+        """
+        LogJob of each job of the log: a new job starts at every
+        'Entering Link 1' line, i.e. after each --Link1-- of the input
+        """
+        starts = [0] + self._key_bytes(JOB_KEYWORD)[1:]
+        stops = starts[1:] + [self._indexed_bytes]
+        return [LogJob(self, start, stop) for (start, stop) in zip(starts, stops)]
+
+    def read_scf_energies(self):
+        """every 'SCF Done:' energy, in order: single points have no steps"""
+        scf_bytes = self._key_bytes('SCF Done:')
+        buf = logindex.open_mmap(self.name)
+        if buf is None:
+            return np.empty(0)
+        try:
+            return np.array([self._read_scf_energy(buf, byte)
+                             for byte in scf_bytes])
+        finally:
+            buf.close()
 
-        # load bytelist
-        bytelist, signature = self._read_bytelist()
+    def _check_bytelist(self):
+        """
+        check if bytelist file exists and matches current log. Cheap checks
+        first: size and mtime, then md5 of the head and tail of the indexed
+        bytes, then the deep check (z-matrix, route section, last geometry).
+        The check used is kept in self._index_check and INDEX_CHECKS.
+        """
+        self._index_check = 'miss'
+        (donebytes, byteindex) = self._validate_bytelist()
+        if self._index_check == 'miss':
+            self._layouts.clear()
+        INDEX_CHECKS[self._index_check] += 1
+        return (donebytes, byteindex)
+
+    def _validate_bytelist(self):
+
+        # haz file? (or old .bytelist, migrated)
+        byteindex, signature = self._read_bytelist()
+        if byteindex is None:
+            stderr.write('Bytelist: no file\n')
+            return (0, logindex.empty_byteindex())
+
+        # fast paths, for signatures with (..., size, mtime, fingerprint,
+        # st_size): the file on disk first, the (uncompressed) log after
+        stat = os.stat(self.name)
+        if len(signature) >= 7 and stat.st_size == signature[6] and \
+           stat.st_mtime == signature[4]:
+            self._index_check = 'stat'
+            stderr.write('%s: index match (size and mtime)\n' % self.name)
+            return (signature[3], byteindex)
+        size = logfile.log_size(self.name)
+        if len(signature) == 6 and size == signature[3] and \
+           stat.st_mtime == signature[4]:
+            self._index_check = 'stat'
+            stderr.write('%s: index match (size and mtime)\n' % self.name)
+            return (signature[3], byteindex)
+        if len(signature) >= 6 and size >= signature[3] and \
+           logindex.fingerprint(self.name, signature[3]) == signature[5]:
+            self._index_check = 'fingerprint'
+            stderr.write('%s: index match (head and tail md5), %5.1f%% complete\n'
+                         % (self.name, 100.0*signature[3]/max(size, 1)))
+            if size == signature[3]: # only touched, next time stat is enough
+                self._save_bytelist(byteindex, tuple(signature[:4]) +
+                    (stat.st_mtime, signature[5], stat.st_size))
+            return (signature[3], byteindex)
+
+        self._index_check = 'deep'
 
         """# check only if last xyz matches with byte, then if md5sum matches fingerprint """
         # check z-mat byte and md5sum
-        for byte, key in bytelist:
-            if key == 'atrix:':
-                zmat_byte = byte
-                break
-        self.file.seek(zmat_byte)
-        if 'atrix:' not in self.file.readline(): # no match 
+        (allbytes, key_ids) = byteindex
+        zmat_bytes = allbytes[key_ids == self.grep_keywords.index('atrix:')]
+        zmat_byte = int(zmat_bytes[0]) if len(zmat_bytes) else None
+        zmat_line = 'atrix:' # no z-matrix (geom=check): nothing to check
+        if zmat_byte is not None:
+            with logfile.open_log(self.name) as f:
+                f.seek(zmat_byte)
+                zmat_line = f.readline()
+        if (zmat_byte is None) != (signature[1] is None):
+            stderr.write('Bytelist: NO match (z-matrix)\n')
+            self._index_check = 'miss'
+            return (0, logindex.empty_byteindex())
+        elif zmat_byte is None:
+            pass
+        elif 'atrix:' not in zmat_line: # no match 
             stderr.write('Bytelist: NO match (z-matrix byte seek)\n')
-            return (0, []) 
+            self._index_check = 'miss'
+            return (0, logindex.empty_byteindex())
         else:
-            tentative_zmat = self._read_zmat(zmat_byte)
+            self._read_zmat(zmat_byte) # sets zmat_md5sum
             if self.zmat_md5sum != signature[1]:
                 stderr.write('Bytelist: NO match (z-matrix md5sum)\n')
-                return (0, [])
+                self._index_check = 'miss'
+                return (0, logindex.empty_byteindex())
 
         # check route_section md5sum
         if self.routesection_md5sum != signature[0]:
             stderr.write('Bytelist: NO match (route_section md5sum)\n')
-            return (0, [])
+            self._index_check = 'miss'
+            return (0, logindex.empty_byteindex())
 
-        if signature[3] > getsize(self.name):
+        if signature[3] > size:
             stderr.write('Bytelist: NO match (log is smaller then expected)\n')
-            return (0, [])
+            self._index_check = 'miss'
+            return (0, logindex.empty_byteindex())
 
         # bytelist total match if md5sum for lastxyz and sizeof match signature 
-        """get coords"""
-        atomidx = [i for i in range(len(tentative_zmat))] # num atoms
-        for (byte, key) in bytelist[::-1]:
-            if key == 'Converged?':
-                finalized_step = True
-            if key == 'orientation:':
-                last_xyz_byte = byte
-                break
-        last_xyz =  self.read_coordinates(atomidx, last_xyz_byte)
-        txt = ''.join(['%12.6f%12.6f%12.6f\n' % xyz for xyz in last_xyz])
+        last_xyz_md5sum = self._last_xyz_md5sum(byteindex)
 
         # Full Match?
-        if gen_md5sum(txt) == signature[2] and getsize(self.name) == signature[3]:
+        if last_xyz_md5sum == signature[2] and size == signature[3]:
             stderr.write('%s: full signature match\n' % self.name)
-            return (signature[3], bytelist)
-        elif gen_md5sum(txt) != signature[2]:
+            return (signature[3], byteindex)
+        elif last_xyz_md5sum != signature[2]:
             stderr.write('%s: last xyz no match\n' % (self.name))
-        elif getsize(self.name) != signature[3]:
+        elif size != signature[3]:
             stderr.write('%s: file size no match\n' % (self.name))
         
         # Partial match
-        for (byte, key) in bytelist:
-            self.file.seek(byte)
-            if not key in self.file.readline():
-                stderr.write('%s: NO match (%s)\n' % (self.name,grep_key))
-                return (0, [])
+        with logfile.open_log(self.name) as f:
+            for (byte, key) in logindex.byteindex_to_bytelist(
+                    byteindex, self.grep_keywords):
+                f.seek(byte)
+                if not key in f.readline():
+                    stderr.write('%s: NO match (%s)\n' % (self.name, key))
+                    self._index_check = 'miss'
+                    return (0, logindex.empty_byteindex())
 
         # if everything is OK
-        stderr.write('%s: %5.1f%% complete\n' % (self.name, 100.0*signature[3]/getsize(self.name)))
-        return (signature[3], bytelist)
+        stderr.write('%s: %5.1f%% complete\n' % (self.name, 100.0*signature[3]/max(size, 1)))
+        return (signature[3], byteindex)
 
 
     def _read_bytelist(self):
-        bytelist_filename = '%s.bytelist' % self.name
-        with open(bytelist_filename, 'rb') as bl:
-            bytelist = pickle.load(bl)
-        signature = bytelist.pop(-1)
-        return bytelist, signature
-
-    def _save_bytelist(self, bytelist, signature):
-        bytelist_filename = '%s.bytelist' % self.name
-        bytelist.append(signature)
-        with open(bytelist_filename, 'wb') as bl:
-            pickle.dump(bytelist, bl, protocol=2) # protocol=3 : python >= 3.0
-
-    def _grep_bytelist(self, bytelist, done_bytelist_offset): 
+        """(byteindex, signature) from <log>.index.npy, (None, None) if
+        missing or made with other grep_keywords"""
+        index = logindex.load_index(self.name)
+        if index is None:
+            return None, None
+        offsets, keywords, signature, layouts = index
+        if keywords != self.grep_keywords:
+            missing = [key for key in self.grep_keywords if key not in keywords]
+            if set(keywords) - set(self.grep_keywords) or len(signature) < 4:
+                stderr.write('Bytelist: NO match (grep keywords)\n')
+                return None, None
+            # i.e. migrated .bytelist: index only the new keywords
+            stderr.write('Bytelist: indexing %d new keywords\n' % len(missing))
+            bytelist = logindex.merge_bytelists(
+                logindex.offsets_to_bytelist(offsets, keywords),
+                logindex.index_file_parallel(self.name, missing, 0,
+                    signature[3], self.workers), self.grep_keywords)
+            self._keywords_added = True
+            byteindex = logindex.bytelist_to_byteindex(bytelist,
+                                                       self.grep_keywords)
+        else: # int64 arrays, no (byte, key) tuples
+            byteindex = logindex.offsets_to_byteindex(offsets, keywords)
+        self._layouts.update(layouts) # checked on every block anyway
+        return byteindex, signature
+
+    def _save_bytelist(self, byteindex, signature):
+        logindex.save_index(self.name, byteindex, self.grep_keywords, signature,
+                            self._layouts)
+
+    def _grep_bytelist(self, byteindex, done_bytelist_offset): 
         """       
         NOTE: Doesnt work for singlepoints yet. No 'Converged?' string in the output
         
         """
 
-        if done_bytelist_offset == getsize(self.name):
-            return bytelist
-
-        grep_string=""
-        for keywords in self.grep_keywords:
-            grep_string += '-e "'+keywords+'" '
+        if done_bytelist_offset >= self._indexed_bytes:
+            return byteindex
 
-        # Grep 
-        if done_bytelist_offset:
-            grep_output = subprocess.Popen(
-                'tail -c +%d %s| grep -b %s' % (
-                    done_bytelist_offset + 1, self.name, grep_string),
-                shell=True, stdout=subprocess.PIPE)
-        else:
-            grep_output = subprocess.Popen('grep -b ' +  grep_string + self.name , shell=True , stdout=subprocess.PIPE)
-
-        # process grep
-        grep_output = grep_output.communicate()[0]
-        #grep_output = str( grep_output).splitlines()
-        grep_output = grep_output.decode("utf8").splitlines() 
-        raw_grepped_bytes = []
-        for line in grep_output:
-            byte = int(line.split(':', 1)[0]) + done_bytelist_offset
-            line = line.split(':', 1)[1] 
-            for key in self.grep_keywords:
-                if key in line:
-                    bytelist.append((byte, key))
-                    break 
-        # keep only keywords from the line
-        return bytelist
+        # grep -b, in-process (or in a pool for big logs), up to the last full line
+        new_byteindex = logindex.bytelist_to_byteindex(
+            logindex.index_file_parallel(self.name, self.grep_keywords,
+                done_bytelist_offset, self._indexed_bytes, self.workers),
+            self.grep_keywords)
+        return tuple(np.concatenate(arrays) for arrays in
+                     zip(byteindex, new_byteindex))
             
 
     def bytelist2dict(self, bytelist):
+        bytedict, buffers = self._new_bytedict()
+        self._update_bytedict(bytedict, buffers, logindex.bytelist_to_byteindex(
+            bytelist, self.grep_keywords))
+        return self._ghostless(bytedict)
+
+    def _new_bytedict(self):
+        """empty bytedict and the buffers used by _update_bytedict"""
         bytedict = {}
         for key in self.grep_keywords:
+            if key in CHARGE_KEYWORDS or key in TIMING_KEYWORDS or \
+               key in (FREQ_KEYWORD, JOB_KEYWORD, IRC_KEYWORD):
+                continue
             bytedict[key] = [[]] 
-        buffer_ONIOM_calculating_energy = False
-        for (byte, key) in bytelist:
-            if key == 'orientation:':
-                buffer_orientation = byte
-            elif key == 'SCF Done:':
-                buffer_SCF_Done = byte
-            elif key == 'ONIOM: calculating energy.':
-                buffer_ONIOM_calculating_energy = byte
-            elif key == 'Step number':
-                buffer_Step_number = byte
-            elif key == 'Converged?' or key == "CORRECTOR":
-                bytedict['Converged?'][-1].append(byte)
-                bytedict['SCF Done:'][-1].append(buffer_SCF_Done)         # buffered
-                bytedict['orientation:'][-1].append(buffer_orientation)   # buffered
-                bytedict['Step number'][-1].append(buffer_Step_number)    # buffered
-                # now, append if oniom only
-                if buffer_ONIOM_calculating_energy: 
-                    bytedict['ONIOM: calculating energy.'][-1].append(
-                        buffer_ONIOM_calculating_energy) #buffered
-                    buffer_ONIOM_calculating_energy = False
-            elif key == 'Optimized Parameters' or key == "Delta-x Convergence Met":
-                bytedict['Optimized Parameters'][0].append(byte)
-                bytedict['ONIOM: calculating energy.'].append([])
-                bytedict['SCF Done:'].append([])
-                bytedict['Step number'].append([])
-                bytedict['Converged?'].append([])
-                bytedict['orientation:'].append([])
-
-        # Last list may be a ghost
-        if bytedict['orientation:'][-1] == []:
-            for data in bytedict:
-                bytedict[data].pop(-1)
+        buffers = {'ONIOM: calculating energy.': False,
+                   'Forces (Hartrees/Bohr)': False}
+        return bytedict, buffers
 
+    def _update_bytedict(self, bytedict, buffers, byteindex):
+        """
+        Adds the (bytes, key ids) arrays of byteindex to bytedict. May be
+        called again with the bytes that follow, since buffered bytes are
+        kept in buffers. Each step ('Converged?') gets the last geometry,
+        SCF and step number before it, and the ONIOM energy and forces
+        only if printed since the step before.
+        """
+        (allbytes, key_ids) = byteindex
+        ids = dict((key, i) for (i, key) in enumerate(self.grep_keywords))
+        def where(*keys):
+            return np.flatnonzero(np.isin(key_ids,
+                [ids[key] for key in keys if key in ids]))
+        steps = where('Converged?', 'CORRECTOR')
+        step_values = {}
+        for buffered in ['SCF Done:', 'orientation:', 'Step number']:
+            seen = allbytes[where(buffered)]
+            before = np.searchsorted(seen, allbytes[steps])
+            values = np.concatenate([[buffers.get(buffered, -1)], seen])
+            step_values[buffered] = values[before]
+            if (step_values[buffered] < 0).any():
+                raise RuntimeError('%s: step without %s' % (self.name, buffered))
+            if len(seen):
+                buffers[buffered] = int(seen[-1])
+        # now, append if oniom only (forces: if printed, #p)
+        printed = {}
+        for buffered in ['ONIOM: calculating energy.', 'Forces (Hartrees/Bohr)']:
+            seen = allbytes[where(buffered)]
+            before = np.searchsorted(seen, allbytes[steps])
+            pending = buffers[buffered] is not False
+            values = np.concatenate([[buffers[buffered] if pending else -1],
+                                     seen])
+            step_values[buffered] = values[before]
+            printed[buffered] = before > np.concatenate(
+                [[-1 if pending else 0], before[:-1]])
+            if len(steps) == 0:
+                if len(seen):
+                    buffers[buffered] = int(seen[-1])
+            elif len(seen) > before[-1]:
+                buffers[buffered] = int(seen[-1])
+            else:
+                buffers[buffered] = False
+
+        # one list per scan point, new ones after 'Optimized Parameters'
+        scans = where('Optimized Parameters', 'Delta-x Convergence Met')
+        cuts = [0] + np.searchsorted(steps, scans).tolist() + [len(steps)]
+        for (k, (a, b)) in enumerate(zip(cuts[:-1], cuts[1:])):
+            bytedict['Converged?'][-1] += allbytes[steps[a:b]].tolist()
+            for (buffered, values) in step_values.items():
+                if buffered in printed:
+                    values = values[a:b][printed[buffered][a:b]]
+                else:
+                    values = values[a:b]
+                bytedict[buffered][-1] += values.tolist()
+            if k < len(scans):
+                bytedict['Optimized Parameters'][0].append(
+                    int(allbytes[scans[k]]))
+                for key in ['ONIOM: calculating energy.', 'SCF Done:',
+                            'Step number', 'Converged?', 'orientation:',
+                            'Forces (Hartrees/Bohr)']:
+                    bytedict[key].append([])
         # Less apearing keywords 
-        for (byte, key) in bytelist:
-            if key == 'atrix:':
-                bytedict['Z-mat'] = [[byte]]
-                break
+        zmat = where('atrix:')
+        if len(zmat) and 'Z-mat' not in bytedict:
+            bytedict['Z-mat'] = [[int(allbytes[zmat[0]])]]
+
+    def _ghostless(self, bytedict):
+        """Last list may be a ghost: bytedict without it"""
+        if bytedict['orientation:'][-1] != []:
+            return bytedict
+        ghostless = {}
+        for data in bytedict:
+            if data in self.grep_keywords:
+                ghostless[data] = bytedict[data][:-1]
+            else:
+                ghostless[data] = bytedict[data]
 
         # Exchange "ard orientation:" for "orientation:" backwards compatible
         #bytedict['orientation:'] = bytedict['orientation:'] 
 
-        return bytedict
+        return ghostless
 
         # add signature: route_section + zmat + last_xyz + filesize
     def _gen_signature(self):
-        atomidx = [i for i in range(len(self.atoms_list))]
-        last_xyz_byte = self.bytedict['orientation:'][-1][-1]
-        lastxyz = self.read_coordinates(atomidx, last_xyz_byte)
-        lastxyz = ''.join(['%12.6f%12.6f%12.6f\n' % xyz for xyz in lastxyz])
+        stat = os.stat(self.name)
         return (
             self.routesection_md5sum,
             self.zmat_md5sum,
-            gen_md5sum(lastxyz),
-            getsize(self.name))
+            self._last_xyz_md5sum(self._byteindex),
+            self._indexed_bytes,
+            stat.st_mtime,
+            logindex.fingerprint(self.name, self._indexed_bytes),
+            stat.st_size)
     
-    def _read_route_section(self):
+    def _last_orientation_byte(self, byteindex):
+        """byte of the last 'orientation:' of byteindex, steps or not (single
+        points have no 'Converged?'), None if there is none"""
+        (allbytes, key_ids) = byteindex
+        found = allbytes[key_ids == self.grep_keywords.index('orientation:')]
+        if len(found) == 0:
+            return None
+        return int(found[-1])
+
+    def _last_xyz_md5sum(self, byteindex):
+        """md5sum of the last geometry of byteindex, of '' if there is none"""
+        last_xyz_byte = self._last_orientation_byte(byteindex)
+        if last_xyz_byte is None:
+            return gen_md5sum('')
+        atomidx = 'all' # atoms of the block: Link1 jobs may differ from the z-mat
+        lastxyz = self.read_coordinates(atomidx, last_xyz_byte)
+        return gen_md5sum(''.join(['%12.6f%12.6f%12.6f\n' % xyz
+                                   for xyz in lastxyz]))
+
+    def _read_header(self):
         """
-        This needs to become a class 
-        Returns a string with the route section commands"""
-        self.file.seek(0)
-        reading = False
-        for line in self.file:
-            if '#' in line:
-                route_section = line
-                reading = True
-            elif reading:
-                if'-------' in line:
+        One pass over the beginning of the log (at most HEADER_MAX_BYTES)
+        for what is printed before the first geometry. Returns a dict:
+            route_section:      str, None if not found
+            modred_lines:       lines after 'The following ModRedundant',
+                                None if the route section has no modredundant
+                                or they were not found
+            gaussian_version:   'g09a', 'g09c', 'g09d' or None
+            link0:              {'nprocshared': '12', 'mem': '6GB', ...}
+        """
+        header = {'route_section': None, 'modred_lines': None,
+                  'gaussian_version': None, 'link0': {}}
+        route_lines = []
+        route_done = False
+        modred_lines = None
+        nlines = 0
+        with logfile.open_log(self.name, 'rb') as f:
+            f.seek(self._job_start)
+            rest = b''
+            while f.tell() - self._job_start < HEADER_MAX_BYTES:
+                data = f.read(HEADER_READ_SIZE)
+                if not data:
                     break
+                lines = (rest + data).split(b'\n')
+                rest = lines.pop(-1)
+                for line in lines:
+                    line = line.decode('utf8', 'replace') + '\n'
+                    nlines += 1
+                    if nlines <= 11 and line.startswith(' Entering Link 1 ='):
+                        for (path, version) in GAUSSIAN_VERSIONS:
+                            if path in line:
+                                header['gaussian_version'] = version
+                                break
+                    if not route_done and not route_lines and \
+                       line.startswith(' %'):
+                        (key, _, value) = line.strip()[1:].partition('=')
+                        header['link0'][key.lower()] = value.strip()
+                    if not route_done:
+                        if route_lines and '-------' in line:
+                            route_done = True
+                            header['route_section'] = ''.join(route_lines).strip()
+                            if 'modr' not in header['route_section'].lower():
+                                return header
+                        elif route_lines or '#' in line:
+                            route_lines.append(line)
+                    elif modred_lines is not None:
+                        if len(line.strip()) == 0 or line.startswith(' I'):
+                            header['modred_lines'] = modred_lines
+                            return header
+                        modred_lines.append(line)
+                    elif line.startswith(' The following ModRedundant'):
+                        modred_lines = []
+                    elif 'orientation:' in line: # past the input section
+                        break
                 else:
-                    route_section += line
-        route_section = route_section.strip()
+                    continue
+                break
+        if route_lines and not route_done:
+            header['route_section'] = ''.join(route_lines).strip()
+        return header
 
-        md5sum = md5()
-        md5sum.update(route_section.encode())
-        self.routesection_md5sum = md5sum.hexdigest()
+    def _read_route_section(self):
+        """Returns a string with the route section commands"""
+        return self.header['route_section']
 
-        return route_section
+    def _gen_routesection_md5sum(self):
+        return gen_md5sum(self.route_section)
 
     def _read_modred(self):
         if 'modr' not in self.route_section.lower():
             return None
-        MAXLINES = 200*1000
-        self.file.seek(0)
-        read = False
-        modreds = []
-        k = 0
-        for line in self.file:
-            k += 1
-            if read:
-                if len(line.strip()) == 0 or line.startswith(' I'):
-                    return modreds
-                else:
-                    modreds.append(ModRed(line))
-            if line.startswith(' The following ModRedundant'):
-                read = True
-            if k > MAXLINES: # to prevent long waits
-                stderr.write('WARNING: missed ModRed in _read_modred()')
-                return 'Failed'
-        # EOF...
-        stderr.write('WARNING: missed ModRed in _read_modred()')
-        return 'Failed'
-
-    def _read_energies(self):
-        oniom_loc_bytes = self.bytedict['ONIOM: calculating energy.']
-        scf_loc_bytes   = self.bytedict['SCF Done:']
-
-        ONIOM_extrapol  = []
-        ONIOM_model_high= []
-        ONIOM_model_low = []
-        ONIOM_real_low  = []
-        ONIOM_lowlayer_low = []
-        SCF_energy = []
-
-        f = open(self.name)
-        for complete_opt in oniom_loc_bytes:
-            ONIOM_model_high.append([])
-            ONIOM_model_low.append([])
-            ONIOM_real_low.append([])
-            ONIOM_lowlayer_low.append([])
-            ONIOM_extrapol.append([])
-            for location_byte in complete_opt:
-                f.seek(location_byte)
-                f.readline() # discard this line
-                model_low  = misc.starfloat(f.readline().split('low   system:  model energy:')[1])
-                ONIOM_model_low[-1].append(model_low)
-
-                model_high = misc.starfloat(f.readline().split('high  system:  model energy:')[1])
-                ONIOM_model_high[-1].append(model_high)
-
-                real_low   = misc.starfloat(f.readline().split('low   system:  real  energy:')[1])
-                ONIOM_real_low[-1].append(real_low)
-
-                extrapol   = misc.starfloat(f.readline().split('extrapolated energy =')[1])
-                ONIOM_extrapol[-1].append(extrapol)
-                
-                ONIOM_lowlayer_low[-1].append(real_low-model_low)
-        for complete_opt in scf_loc_bytes:
-            SCF_energy.append([])
-            for location_byte in complete_opt:
-                f.seek(location_byte)
-                SCF_energy[-1].append(float(f.readline().split('=')[1].split()[0]))
+        if self.header['modred_lines'] is None:
+            stderr.write('WARNING: missed ModRed in _read_modred()')
+            return 'Failed'
+        return [ModRed(line) for line in self.header['modred_lines']]
 
-        energies = {}
-        energies['ONIOM_extrapol'] = ONIOM_extrapol
-        energies['ONIOM_model_high'] = ONIOM_model_high
-        energies['ONIOM_lowlayer_low'] = ONIOM_lowlayer_low
-        energies['SCF_energy'] = SCF_energy
+    def read_energy_table(self):
+        """
+        Structured array (ENERGY_TABLE_DTYPE), one row per optimization
+        step: table['scan'], table['opt'] and one column per energy.
+        The log is read once, in the order the energies appear.
+        """
+        converged = self.bytedict['Converged?']
+        nrows = sum([len(opt) for opt in converged])
+        table = np.zeros(nrows, dtype=ENERGY_TABLE_DTYPE)
+        for name in ENERGY_TABLE_DTYPE.names[2:]:
+            table[name] = np.nan
+        row = 0
+        for scan, opt in enumerate(converged):
+            table['scan'][row:row + len(opt)] = scan
+            table['opt'][row:row + len(opt)] = np.arange(len(opt))
+            row += len(opt)
+
+        # ONIOM blocks precede the 'Converged?' of their step
+        converged_bytes = [byte for opt in converged for byte in opt]
+        oniom_bytes = [byte for opt in self.bytedict[
+            'ONIOM: calculating energy.'] for byte in opt]
+        oniom_rows = np.searchsorted(converged_bytes, oniom_bytes).tolist()
+        scf_bytes = [byte for opt in self.bytedict['SCF Done:'] for byte in opt]
+        jobs = sorted(
+            [(byte, 'oniom', row) for (byte, row) in zip(oniom_bytes, oniom_rows)] +
+            [(byte, 'scf', row) for (row, byte) in enumerate(scf_bytes)])
+
+        buf = logindex.open_mmap(self.name)
+        try:
+            for (byte, kind, row) in jobs:
+                if kind == 'scf':
+                    table['SCF_energy'][row] = self._read_scf_energy(buf, byte)
+                    continue
+                for (name, energy) in self._read_oniom_energies(buf, byte):
+                    table[name][row] = energy
+        finally:
+            if buf is not None:
+                buf.close()
+        table['ONIOM_lowlayer_low'] = table['ONIOM_real_low'] - table['ONIOM_model_low']
+        return table
+
+    def _index_timings(self):
+        """{keyword: bytes} of TIMING_KEYWORDS"""
+        return dict((key, self._key_bytes(key)) for key in TIMING_KEYWORDS)
+
+    def read_timings(self):
+        """
+        Structured array (TIMINGS_DTYPE), one row per optimization step
+        (the rows of energy_table), with the cost of each step: the links
+        between the 'Converged?' of the previous step and its own. The
+        first step includes the setup links (l1, l101, ...).
+        """
+        converged = self.bytedict['Converged?']
+        converged_bytes = [byte for opt in converged for byte in opt]
+        nrows = len(converged_bytes)
+        timings = np.zeros(nrows, dtype=TIMINGS_DTYPE)
+        row = 0
+        for scan, opt in enumerate(converged):
+            timings['scan'][row:row + len(opt)] = scan
+            timings['opt'][row:row + len(opt)] = np.arange(len(opt))
+            row += len(opt)
+        for column in ('cpu', 'elapsed', 'wall'):
+            timings[column] = np.nan
+        timings['scf_cycles'] = -1
+
+        leave_bytes = self.timing_bytes['Leave Link']
+        rows = np.searchsorted(converged_bytes, leave_bytes)
+        scf_bytes = [byte for opt in self.bytedict['SCF Done:'] for byte in opt]
+        buf = logindex.open_mmap(self.name)
+        if buf is None:
+            return timings
+        try:
+            cpu = np.full(len(leave_bytes), np.nan)
+            elapsed = np.full(len(leave_bytes), np.nan)
+            for (i, byte) in enumerate(leave_bytes):
+                words = self._mmap_line(buf, byte).split()
+                if 'cpu:' in words:
+                    cpu[i] = misc.starfloat(words[words.index('cpu:') + 1])
+                if 'elap:' in words:
+                    elapsed[i] = misc.starfloat(words[words.index('elap:') + 1])
+            inside = rows < nrows # links after the last step are not a step
+            for (column, values) in (('cpu', cpu), ('elapsed', elapsed)):
+                printed = inside & ~np.isnan(values)
+                total = np.zeros(nrows)
+                np.add.at(total, rows[printed], values[printed])
+                total[np.bincount(rows[printed], minlength=nrows) == 0] = np.nan
+                timings[column] = total
+
+            # wall: time stamp of the last link of each step minus the
+            # one of the step before (first link of the log for step 0)
+            if leave_bytes and nrows:
+                last = np.searchsorted(rows, np.arange(nrows), side='right') - 1
+                stamps = [self._leave_link_time(buf, leave_bytes[0])]
+                for (row, i) in enumerate(last.tolist()):
+                    if i >= 0 and rows[i] == row:
+                        stamps.append(self._leave_link_time(buf, leave_bytes[i]))
+                    else: # step without links
+                        stamps.append(np.nan)
+                timings['wall'] = np.diff(np.array(stamps, dtype=np.float64))
+
+            for (row, byte) in enumerate(scf_bytes[:nrows]):
+                words = self._mmap_line(buf, byte).split()
+                if 'cycles' in words:
+                    timings['scf_cycles'][row] = int(words[words.index('cycles') - 1])
+        finally:
+            buf.close()
+        return timings
+
+    def _leave_link_time(self, buf, byte):
+        """seconds since the epoch of a Leave Link line, nan if unreadable"""
+        line = self._mmap_line(buf, byte)
+        try:
+            date = ' '.join(line.split(' at ', 1)[1].split(',')[0].split())
+            return float(calendar.timegm(time.strptime(date, LEAVE_LINK_DATE)))
+        except (IndexError, ValueError):
+            return np.nan
+
+    def read_job_times(self):
+        """
+        (cpu, elapsed) arrays in seconds, one value per job (Link1) that
+        printed 'Job cpu time:' and 'Elapsed time:' at its end
+        """
+        buf = logindex.open_mmap(self.name)
+        if buf is None:
+            return np.empty(0), np.empty(0)
+        times = []
+        try:
+            for key in ('Job cpu time:', 'Elapsed time:'):
+                seconds = []
+                for byte in self.timing_bytes[key]:
+                    words = self._mmap_line(buf, byte).split(':', 1)[1].split()
+                    # 0 days  1 hours 23 minutes 45.6 seconds.
+                    values = [float(words[i]) for i in range(0, 8, 2)]
+                    seconds.append(np.dot(values, [86400, 3600, 60, 1]))
+                times.append(np.array(seconds))
+        finally:
+            buf.close()
+        return tuple(times)
+
+    def steps_per_hour(self):
+        """optimization steps per hour of wall time, nan if unknown"""
+        wall = self.timings['wall']
+        wall = wall[~np.isnan(wall)]
+        if len(wall) == 0 or wall.sum() <= 0:
+            return np.nan
+        return 3600.0 * len(wall) / wall.sum()
+
+    def _read_scf_energy(self, buf, byte):
+        """energy of the 'SCF Done:' line at byte"""
+        return float(self._mmap_line(buf, byte).split('=')[1].split()[0])
+
+    def _read_oniom_energies(self, buf, byte):
+        """[(name, energy)] of the 'ONIOM: calculating energy.' block at byte"""
+        energies = []
+        byte = logblocks.skip_lines(buf, byte, 1) # discard this line
+        for (name, label) in ONIOM_ENERGY_LABELS:
+            line = self._mmap_line(buf, byte)
+            energies.append((name, misc.starfloat(line.split(label)[1])))
+            byte += len(line)
         return energies
 
+    def _mmap_line(self, buf, byte):
+        """line of the memory mapped log starting at byte, as str"""
+        return buf[byte:buf.find(b'\n', byte) + 1].decode('utf8', 'replace')
 
-    def close_file(self):
-        self.file.close()
-    
-    def read_coordinates(self, atom_nr, byte):
-        """To request or not to request N_ATOMS, it would allow checking -----"""
-
-        bytesOFF = 383 # between "orientation" line and 1st atom X coordinate
-        offset = byte + bytesOFF
+    def _read_energies(self):
+        """energy_table as {energy: [[values of scan 0], [scan 1], ...]}"""
+        table = self.energy_table
+        nscans = len(self.bytedict['Converged?'])
+        scans = np.split(table, np.searchsorted(table['scan'], range(1, nscans)))
+        energies = {}
+        for name in ['ONIOM_extrapol', 'ONIOM_model_high',
+                     'ONIOM_lowlayer_low', 'SCF_energy']:
+            energies[name] = []
+            for scan in scans:
+                values = scan[name]
+                energies[name].append(values[~np.isnan(values)].tolist())
+        return energies
 
-        # What atom indexes?
+    def _atom_indexes(self, atom_nr):
+        """list of atom indexes, or None for all atoms"""
         if atom_nr in ['*', 'all']:
-            idx = [i for i in range(len(self.atoms_list))] # must have been initialized
+            return None
         elif type(atom_nr) == int:
-            idx = [atom_nr]
+            return [atom_nr]
         elif type(atom_nr) == list or type(atom_nr) == tuple:
-            idx = atom_nr
+            return list(atom_nr)
         else:
             raise RuntimeError('atom_nr must be */all, int, or list of ints')
 
-        coords = []
-        with open(self.name, 'r') as f:
-            f.seek(byte-1)
-            if f.read(1) != '\n':
-                byte = byte - 1
-                stderr.write('WARNING: grep -b 1 byte ahead\n')
-
-            for i in idx:
-                f.seek(offset + i*71)
-                x = float(f.read(12))
-                y = float(f.read(12))
-                z = float(f.read(12))
-                coords.append((x,y,z))
-        return coords
+    def read_coordinates(self, atom_nr, byte):
+        """list of (x, y, z) of the orientation block at byte"""
+        xyz = self.read_coordinates_array([byte], atom_nr)[0]
+        return [tuple(coords) for coords in xyz.tolist()]
+
+    def read_coordinates_array(self, bytes_list, atom_nr='all'):
+        """
+        (n_frames, n_atoms, 3) array with the coordinates of the orientation
+        blocks at bytes_list (any bytes from bytedict['orientation:'])
+        """
+        idx = self._atom_indexes(atom_nr)
+        buf = logindex.open_mmap(self.name)
+        try:
+            frames = [logblocks.read_orientation(buf, byte, idx,
+                                                 self._orientation_layout(buf, byte))
+                      for byte in bytes_list]
+        finally:
+            buf.close()
+        if not frames:
+            return np.empty((0, 0 if idx is None else len(idx), 3))
+        return np.array(frames)
+
+    def _orientation_layout(self, buf, byte):
+        """layout of the blocks titled as the one at byte, found once"""
+        title = logblocks.orientation_title(buf, byte)
+        if title not in self._layouts:
+            self._layouts[title] = logblocks.detect_orientation_layout(buf, byte)
+        return self._layouts[title]
+
+    def orientation_bytes(self, orientation=None):
+        """
+        bytedict['orientation:'] (default), or the same list of lists with
+        the last block of each step titled orientation ('Input', 'Standard'
+        or 'Z-Matrix'), when a log prints more than one per step.
+        """
+        if orientation is None:
+            return self.bytedict['orientation:']
+        title = '%s orientation:' % orientation
+        selected = [[]]
+        last = None
+        buf = logindex.open_mmap(self.name)
+        try:
+            for (byte, key) in self._bytelist:
+                if key == 'orientation:':
+                    if logblocks.orientation_title(buf, byte) == title:
+                        last = byte
+                elif key in ('Converged?', 'CORRECTOR'):
+                    if last is None:
+                        raise RuntimeError('%s: no %s before byte %d' % (
+                            self.name, title, byte))
+                    selected[-1].append(last)
+                    last = None
+                elif key in ('Optimized Parameters', 'Delta-x Convergence Met'):
+                    selected.append([])
+        finally:
+            buf.close()
+        return selected[:len(self.bytedict['orientation:'])]
+
+    def read_trajectory(self, atom_nr='all', orientation_bytes=None,
+                        orientation=None):
+        """
+        Coordinates of every orientation block in orientation_bytes
+        (default = orientation_bytes(orientation)), which is a list of lists
+        of bytes, one list per scan point:
+            (n_scan, n_opt, n_atoms, 3) array if all scan points have
+            the same number of opt steps, else a list of (n_opt, n_atoms, 3)
+        """
+        if orientation_bytes is None:
+            orientation_bytes = self.orientation_bytes(orientation)
+        flat = [byte for scan in orientation_bytes for byte in scan]
+        xyz = self.read_coordinates_array(flat, atom_nr)
+        n_opts = [len(scan) for scan in orientation_bytes]
+        if len(set(n_opts)) == 1:
+            return xyz.reshape((len(n_opts), n_opts[0]) + xyz.shape[1:])
+        return np.split(xyz, np.cumsum(n_opts)[:-1])
 
     def read_converged(self, byte):
+        """(labels, values, thresholds) lists of the 'Converged?' block at byte"""
+        (labels, values, thresholds) = self.convergence_table([byte])
+        return labels, values[0].tolist(), thresholds[0].tolist()
 
-        OFF = 60
-        LINE_OFF = 56 
-        LABEL_START = 1
-        VALUE_START = 26 
-        THRESH_START = 39 
-        NCHARS_LABEL = 20
-        NCHARS_FLOAT = 8
-        stop_label = 'Predicted change in '
-        short_labels = {
-            'Maximum Force       ': 'Max F',
-            'RMS     Force       ': 'rms F',
-            'Maximum Displacement': 'Max D',
-            'RMS     Displacement': 'rms D',
-            'Maximum MM Force    ': 'MaxMM',
-            'RMS     MM Force    ': 'rmsMM'
-        }
+    def convergence_table(self, bytes_list=None):
+        """
+        (labels, values, thresholds) of many convergence blocks at once,
+        values and thresholds are (n_steps, n_criteria) arrays (nan where a
+        step lacks a criterion, e.g. MM force rows).
+        bytes_list: 'Converged?' bytes, default all steps of all scan points
+        """
+        if bytes_list is None:
+            bytes_list = [byte for opt in self.bytedict['Converged?']
+                          for byte in opt]
+        buf = logindex.open_mmap(self.name)
+        if buf is None:
+            return [], np.empty((0, 0)), np.empty((0, 0))
+        try:
+            return logblocks.read_converged_blocks(buf, bytes_list)
+        finally:
+            buf.close()
+
+    def read_forces(self, bytes_list=None, atom_nr='all'):
+        """
+        (n_steps, n_atoms, 3) array with the forces (Hartrees/Bohr) of the
+        blocks at bytes_list, default those of all steps of all scan points
+        (bytedict['Forces (Hartrees/Bohr)'], only printed with #p)
+        """
+        if bytes_list is None:
+            bytes_list = [byte for opt in self.bytedict['Forces (Hartrees/Bohr)']
+                          for byte in opt]
+        idx = self._atom_indexes(atom_nr)
+        if not bytes_list:
+            return np.empty((0, 0 if idx is None else len(idx), 3))
+        buf = logindex.open_mmap(self.name)
+        try:
+            forces = [logblocks.read_forces(buf, byte, idx)
+                      for byte in bytes_list]
+        finally:
+            buf.close()
+        return np.array(forces)
+
+    def forces_max_rms(self, forces=None):
+        """
+        (max, rms) arrays with one value per step, as Gaussian's
+        'Cartesian Forces:  Max ... RMS ...' (over all x, y, z components)
+        """
+        if forces is None:
+            forces = self.read_forces()
+        forces = forces.reshape(len(forces), -1)
+        if forces.shape[1] == 0:
+            return np.zeros(len(forces)), np.zeros(len(forces))
+        return (np.abs(forces).max(axis=1),
+                np.sqrt((forces ** 2).mean(axis=1)))
+
+    def residue_max_forces(self, forces=None):
+        """
+        (residues, (n_steps, n_residues) array) with the largest atomic
+        force (norm) of each residue, residues being (resname, resnum, chain)
+        of the z-matrix atoms' resinfo in order of appearance, and None for
+        the atoms without resinfo.
+        """
+        if forces is None:
+            forces = self.read_forces()
+        residues = []
+        residue_ids = {}
+        atom_residue = []
+        for atom in self.atoms_list:
+            resinfo = atom.resinfo
+            if resinfo is not None:
+                resinfo = (resinfo.resname, resinfo.resnum, resinfo.chain)
+            if resinfo not in residue_ids:
+                residue_ids[resinfo] = len(residues)
+                residues.append(resinfo)
+            atom_residue.append(residue_ids[resinfo])
+        norms = np.sqrt((forces ** 2).sum(axis=2))
+        maxima = np.zeros((len(residues), len(forces)))
+        np.maximum.at(maxima, np.array(atom_residue, dtype=int), norms.T)
+        return residues, maxima.T
+
+    def _index_charges(self):
+        """{'Mulliken': bytes, 'ESP': bytes, 'APT': bytes} of charge tables"""
+        self.bytedict # builds self._byteindex
+        charge_bytes = {'Mulliken': [], 'ESP': [], 'APT': []}
+        buf = logindex.open_mmap(self.name)
+        if buf is None:
+            return charge_bytes
+        (allbytes, key_ids) = self._byteindex
+        found = np.isin(key_ids, [self.grep_keywords.index(key)
+                                  for key in CHARGE_KEYWORDS])
+        fit_table = None # where the table of the last ESP fit line starts
+        try:
+            for (byte, k) in zip(allbytes[found].tolist(),
+                                 key_ids[found].tolist()):
+                key = self.grep_keywords[k]
+                # g16 titles the table of 'Charges from ESP fit' 'ESP charges:',
+                # after the fit line and its 'Charge= ... Dipole=' line
+                if key == 'ESP charges:' and byte == fit_table:
+                    charge_bytes['ESP'].pop(-1)
+                charge_bytes[CHARGE_KEYWORDS[key]].append(byte)
+                fit_table = None
+                if key == 'Charges from ESP fit':
+                    fit_table = buf.find(b'\n', byte) + 1
+                    if buf[fit_table:fit_table + 8] == b' Charge=':
+                        fit_table = buf.find(b'\n', fit_table) + 1
+        finally:
+            buf.close()
+        return charge_bytes
+
+    def read_charges(self, kind='Mulliken', last=False):
+        """
+        (n_tables, n_atoms) array with the charges of every table of kind
+        ('Mulliken', 'ESP' or 'APT') in the log, or (1, n_atoms) if last.
+        For ONIOM only the atoms of the model system are printed.
+        """
+        bytes_list = self.charge_bytes[kind]
+        if last:
+            bytes_list = bytes_list[-1:]
+        if not bytes_list:
+            return np.empty((0, 0))
+        buf = logindex.open_mmap(self.name)
+        try:
+            tables = [logblocks.read_charges(buf, byte) for byte in bytes_list]
+        finally:
+            buf.close()
+        if len(set([len(charges) for charges in tables])) > 1:
+            raise RuntimeError('%s: %s tables with different number of atoms'
+                               % (self.name, kind))
+        return np.array(tables)
+
+    def _index_microiterations(self):
+        """
+        Bytes of the microiteration geometries: orientation blocks, titled
+        as those of the optimization steps, that are not kept as a step
+        (i.e. followed by another one before 'Converged?'). A list of lists,
+        one per step, and the last one for the blocks after the last step,
+        where jobs stop with 'Maximum number of microiterations cycles'.
+        """
+        self.bytedict # builds self._byteindex
+        step_bytes = set(byte for opt in self.bytedict['orientation:']
+                         for byte in opt)
+        micro_bytes = [[]]
+        buf = logindex.open_mmap(self.name)
+        if buf is None:
+            return micro_bytes
+        title = None # e.g. 'Input orientation:', not 'Standard orientation:'
+        if step_bytes:
+            title = self._mmap_line(buf, min(step_bytes)).strip()
+        try:
+            for (byte, key) in self._bytelist:
+                if key == 'orientation:' and byte not in step_bytes:
+                    if title is None or \
+                       self._mmap_line(buf, byte).strip() == title:
+                        micro_bytes[-1].append(byte)
+                elif key in ('Converged?', 'CORRECTOR'):
+                    micro_bytes.append([])
+        finally:
+            buf.close()
+        return micro_bytes
+
+    def read_last_microiterations(self, k=2):
+        """
+        (k, n_atoms, 3) array with the last k microiteration geometries,
+        oldest first (fewer if the log has less than k).
+        """
+        flat = [byte for step in self.micro_bytes for byte in step]
+        return self.read_coordinates_array(flat[-k:] if k else [])
 
-        labels = []
-        values = []
-        thresholds = []
-
-        # correct byte
-        f = open(self.name)
-        f.seek(byte-1)
-        if f.read(1) != '\n':
-            byte = byte - 1
-            stderr.write('WARTING: grep -b 1 byte ahead\n')
-
-        for i in range(7):
-            off = byte + OFF + i*LINE_OFF
-            f.seek(off + LABEL_START)
-            label = f.read(NCHARS_LABEL)
-            if label == stop_label:
-                f.close()
-                return (labels, values, thresholds)
-            labels.append(short_labels[label])
-            f.seek(off + VALUE_START)
-            values.append(misc.starfloat(f.read(NCHARS_FLOAT)))
-            f.seek(off + THRESH_START)
-            thresholds.append(misc.starfloat(f.read(NCHARS_FLOAT)))
-
-        # if here, stop_label not found
-        f.close()
-        error_msg = 'Expected %s after Converged section' % stop_label
-        print(labels, values, thresholds)
-        raise RuntimeError(error_msg)
+    def rank_microiteration_displacements(self, skip_hydrogens=True, xyz=None):
+        """
+        (atom indexes, displacements in angstrom) between the last two
+        microiteration geometries, largest displacement first. xyz: those
+        of read_last_microiterations(2), if already read
+        """
+        if xyz is None:
+            xyz = self.read_last_microiterations(2)
+        if len(xyz) < 2:
+            raise RuntimeError('%s: less than two microiteration geometries'
+                               % self.name)
+        displacements = np.sqrt(((xyz[1] - xyz[0]) ** 2).sum(axis=1))
+        idx = np.arange(len(displacements))
+        if skip_hydrogens:
+            idx = np.array([i for i in idx
+                            if self.atoms_list[i].GetType() != 'H'], dtype=int)
+        order = idx[np.argsort(-displacements[idx], kind='stable')]
+        return order, displacements[order]
+
+    def _index_frequencies(self):
+        """bytes of the 'Harmonic frequencies' sections, one per freq job"""
+        return self._key_bytes(FREQ_KEYWORD)
+
+    def read_normal_modes(self, byte=None, n_modes=None):
+        """
+        dict of arrays with frequencies, reduced_masses, force_constants,
+        ir_intensities (n_modes,) and the modes (n_modes, n_atoms, 3) of
+        the freq section at byte, default the last one in the log.
+        Imaginary frequencies are the negative ones. n_modes: decode the
+        displacements of the first n_modes only, i.e. 1 to check a TS.
+        """
+        if byte is None:
+            if not self.freq_bytes:
+                raise RuntimeError('%s: no frequencies' % self.name)
+            byte = self.freq_bytes[-1]
+        buf = logindex.open_mmap(self.name)
+        try:
+            return logblocks.read_normal_modes(buf, byte, n_modes)
+        finally:
+            buf.close()
+
+    def _index_irc(self):
+        """bytes of the 'Point Number: ... Path Number:' lines of IRC jobs"""
+        return self._key_bytes(IRC_KEYWORD)
+
+    def _read_irc_point(self, buf, byte):
+        """(point, path, coordinate) of the IRC point line at byte"""
+        line = self._mmap_line(buf, byte)
+        fields = line.split()
+        (point, path) = (int(fields[2]), int(fields[5]))
+        coordinate = np.nan
+        for _ in range(IRC_POINT_LINES):
+            byte += len(line)
+            line = self._mmap_line(buf, byte)
+            if IRC_COORDINATE_LABEL in line:
+                coordinate = float(line.split('=')[1])
+                break
+        return (point, path, coordinate)
 
-    def read_geometry(self, opt_step, scan_step):
+    def read_irc(self, atom_nr='all'):
+        """
+        IRC path as (table, xyz), with the points in path order: the
+        reverse path from its last point, the TS, then the forward path.
+            table: structured array (IRC_DTYPE), one row per point
+            xyz: (n_points, n_atoms, 3) array, the geometry of each point
+        Each point is the last step before its 'Point Number:' line; the
+        TS is the first geometry and energy of the log (or job).
+        """
+        if not self.irc_bytes:
+            raise RuntimeError('%s: no IRC points' % self.name)
+        converged_bytes = [byte for opt in self.bytedict['Converged?']
+                           for byte in opt]
+        orientation_bytes = [byte for opt in self.bytedict['orientation:']
+                             for byte in opt]
+        energies = self.energy_table['ONIOM_extrapol']
+        energies = np.where(np.isnan(energies),
+                            self.energy_table['SCF_energy'], energies)
+
+        # TS: what comes before the first step of the first point
+        first_step = converged_bytes[0] if converged_bytes else None
+        ts = {}
+        for (byte, key) in self._bytelist:
+            if first_step is not None and byte > first_step:
+                break
+            if key in ('orientation:', 'SCF Done:',
+                       'ONIOM: calculating energy.'):
+                ts.setdefault(key, byte)
+        if 'orientation:' not in ts:
+            raise RuntimeError('%s: no TS geometry' % self.name)
+
+        rows = []
+        buf = logindex.open_mmap(self.name)
+        try:
+            if 'ONIOM: calculating energy.' in ts:
+                ts_energy = dict(self._read_oniom_energies(
+                    buf, ts['ONIOM: calculating energy.']))['ONIOM_extrapol']
+            elif 'SCF Done:' in ts:
+                ts_energy = self._read_scf_energy(buf, ts['SCF Done:'])
+            else:
+                ts_energy = np.nan
+            for byte in self.irc_bytes:
+                (point, path, coordinate) = self._read_irc_point(buf, byte)
+                step = bisect.bisect(converged_bytes, byte) - 1
+                if point == 0 or step < 0: # the TS, added below
+                    continue
+                rows.append((path, point, coordinate, step))
+        finally:
+            buf.close()
+
+        forward = [row for row in rows if row[0] != 2]
+        reverse = [row for row in rows if row[0] == 2][::-1]
+        table = np.zeros(len(rows) + 1, dtype=IRC_DTYPE)
+        bytes_list = []
+        for (i, row) in enumerate(reverse + [None] + forward):
+            if row is None:
+                table[i] = (0, 0, 0.0, ts_energy, -1, -1)
+                bytes_list.append(ts['orientation:'])
+                continue
+            (path, point, coordinate, step) = row
+            if path == 2:
+                coordinate = -abs(coordinate)
+            table[i] = (path, point, coordinate, energies[step],
+                        self.energy_table['scan'][step],
+                        self.energy_table['opt'][step])
+            bytes_list.append(orientation_bytes[step])
+        return table, self.read_coordinates_array(bytes_list, atom_nr)
 
-        with open(self.name, 'r') as f:
-            f.seek(self.bytedict['orientation:'][scan_step][opt_step])
+    def read_geometry(self, opt_step, scan_step):
+        byte = self.bytedict['orientation:'][scan_step][opt_step]
+        return self._read_geometry_at(byte)
+
+    def _read_geometry_at(self, byte):
+        """atoms.Atom list of the orientation block at byte"""
+        xyz_list = self.read_coordinates_array([byte])[0].tolist()
+        with logfile.open_log(self.name) as f:
+            f.seek(byte)
             atoms_list = []
             for _ in range(5):
                 f.readline()
-            for model_atom in self.atoms_list:
+            for xyz in xyz_list: # atoms of the block, not of the z-mat
                 line = f.readline()
                 atomic_number = int(line.split()[1])
-                x, y, z = line.split()[3:6]
                 element = atoms.PERIODIC_TABLE.GetSymbol(atomic_number)
-                xyz = (float(x),float(y),float(z))
                 atom = atoms.Atom(element, xyz) 
                 atoms_list.append(atom)    
         return atoms_list
 
+    def _read_final_geometry(self):
+        """last step, or the last geometry if there are no steps (single
+        points), None if the log has no geometry"""
+        if self.bytedict['orientation:']:
+            return self.read_geometry(-1, -1)
+        self.bytedict # builds self._byteindex
+        byte = self._last_orientation_byte(self._byteindex)
+        if byte is None:
+            return None
+        return self._read_geometry_at(byte)
+
     def get_gaussian_version(self):
-        """read 10 first lines and grep a_pgi or d_pgi"""
-        MAXLINES = 10
-        with open(self.name, 'r') as f:
-            for line in f:
-                MAXLINES -= 1
-                if line.startswith(" Entering Link 1 ="):
-                    if 'g09/a_pgi105' in line:
-                        return 'g09a'
-                    elif 'g09/d_pgi133' in line:
-                        return 'g09d'
-                    elif 'g09/c_pgi133' in line:
-                        return 'g09c'
-                if MAXLINES < 0:
-                    return None
-                    #return " Entering Link 1 = NOT FOUND IN FIRST %d LINES" % MAXLINES
-        return None
+        """Entering Link 1 in the first 10 lines: g09a, g09c, g09d or None"""
+        return self.header['gaussian_version']
 
     def get_termination(self):
         """read 10 tail lines and return Termination() class"""
-        logtail_lines = []
-        with open(self.name, 'r') as f:
-            f.seek(max(-800, -getsize(self.name)),2) # approx. 10 tail lines
-            for line in f:
-                logtail_lines.append(line)
+        with logfile.open_log(self.name, 'rb') as f: # end-relative seeks need bytes
+            if self._job_stop is None:
+                f.seek(max(-800, -logfile.log_size(self.name)),2) # approx. 10 tail lines
+                logtail = f.read()
+            else: # tail of the job
+                f.seek(max(self._job_stop - 800, self._job_start))
+                logtail = f.read(self._job_stop - f.tell())
+            logtail_lines = logtail.decode('utf8', 'replace').splitlines(True)
         return Termination(logtail_lines)       # goes to self.termination
         
 
@@ -743,7 +1674,7 @@ class GaussianLog():
         #ve se os passos opt e scanpoint estao consecutivos ou se ficheiro foi danificado entre isso #nos scan ve se optimizaram
         #checks if it is a singlepoint_job or opt_job or scan_job; checks if it is oniom_job
         """
-        with open(self.name, 'r') as f:
+        with logfile.open_log(self.name) as f:
             if 'oniom' in self.route_section.lower(): oniom_job=True
             else: oniom_job=False
             
@@ -1087,6 +2018,129 @@ class Opt():
         else:
             return argument
  
+class LogJob(GaussianLog):
+    """
+    GaussianLog.jobs[k]: the GaussianLog API over the bytes of one job of
+    a log with --Link1-- jobs (energies, frames, route section, ...),
+    built from the byte index of the whole log, which is not read again.
+    """
+
+    def __init__(self, gaussianlog, start, stop):
+        self.name = gaussianlog.name
+        self.grep_keywords = gaussianlog.grep_keywords
+        self.workers = gaussianlog.workers
+        self._layouts = gaussianlog._layouts
+        self._log = gaussianlog
+        self._job_start = start
+        self._job_stop = stop
+        self._indexed_bytes = stop
+        (allbytes, key_ids) = gaussianlog._byteindex
+        (first, last) = np.searchsorted(allbytes, [start, stop])
+        self._byteindex = (allbytes[first:last], key_ids[first:last])
+        self._raw_bytedict, self._bytedict_buffers = self._new_bytedict()
+        self._update_bytedict(
+            self._raw_bytedict, self._bytedict_buffers, self._byteindex)
+        self.bytedict = self._ghostless(self._raw_bytedict)
+
+    def _Zmat_to_atoms_list(self):
+        if 'Z-mat' not in self.bytedict: # geom=check, as the job before
+            return self._log.atoms_list
+        return GaussianLog._Zmat_to_atoms_list(self)
+
+    def _gen_zmat_md5sum(self):
+        if 'Z-mat' not in self.bytedict:
+            return self._log.zmat_md5sum
+        return GaussianLog._gen_zmat_md5sum(self)
+
+    def _index_jobs(self):
+        return [self]
+
+    def refresh(self, callbacks=None):
+        raise RuntimeError('refresh() the GaussianLog and get its jobs again')
+
+
+class Frames():
+    """
+    Geometries of a GaussianLog by [scan, opt], as nested lists do:
+        frames[scan, opt]   one geometry
+        frames[:, -1]       last opt step of each scan point
+        frames[3, :]        every opt step of scan point 4 (or frames[3])
+    Indexing only selects bytes of the orientation blocks and returns
+    Frames again: coordinates are read from the log by read() (or
+    np.asarray(frames)). len() is that of the first axis left, as for
+    the arrays read() returns.
+    """
+
+    def __init__(self, gaussianlog, orientation_bytes, scan_int=False,
+                 opt_int=False):
+        self.log = gaussianlog
+        self.orientation_bytes = orientation_bytes # [[byte, ...], ...]
+        self.scan_int = scan_int    # indexed with an int: axis dropped
+        self.opt_int = opt_int
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        axes = [axis for (axis, dropped) in
+                [('scan', self.scan_int), ('opt', self.opt_int)] if not dropped]
+        if len(key) > len(axes):
+            raise IndexError('too many indices for Frames')
+        keys = dict(zip(axes, key))
+        rows = self.orientation_bytes
+        scan_int, opt_int = self.scan_int, self.opt_int
+        if 'scan' in keys:
+            if isinstance(keys['scan'], slice):
+                rows = rows[keys['scan']]
+            else:
+                rows = [rows[keys['scan']]]
+                scan_int = True
+        if 'opt' in keys:
+            if isinstance(keys['opt'], slice):
+                rows = [opt[keys['opt']] for opt in rows]
+            else:
+                rows = [[opt[keys['opt']]] for opt in rows]
+                opt_int = True
+        return Frames(self.log, rows, scan_int, opt_int)
+
+    def __len__(self):
+        if not self.scan_int:
+            return len(self.orientation_bytes)
+        if not self.opt_int:
+            return len(self.orientation_bytes[0])
+        raise TypeError('len() of a single frame')
+
+    @property
+    def n_frames(self):
+        return sum([len(opt) for opt in self.orientation_bytes])
+
+    def bytes_list(self):
+        """flat list of the orientation bytes, scan point after scan point"""
+        return [byte for opt in self.orientation_bytes for byte in opt]
+
+    def read(self, atom_nr='all'):
+        """
+        Coordinates: (n_atoms, 3) for one frame, (n, n_atoms, 3) if one
+        axis was indexed with an int, else (n_scan, n_opt, n_atoms, 3) or a
+        list of (n_opt, n_atoms, 3) if scan points have different n_opt.
+        """
+        xyz = self.log.read_coordinates_array(self.bytes_list(), atom_nr)
+        if self.scan_int and self.opt_int:
+            return xyz[0]
+        if self.scan_int or self.opt_int:
+            return xyz
+        n_opts = [len(opt) for opt in self.orientation_bytes]
+        if len(set(n_opts)) == 1:
+            return xyz.reshape((len(n_opts), n_opts[0]) + xyz.shape[1:])
+        return np.split(xyz, np.cumsum(n_opts)[:-1])
+
+    def __array__(self, dtype=None, **kwargs):
+        """np.asarray(frames); kwargs: copy= of numpy >= 2, always a copy"""
+        xyz = self.read()
+        if type(xyz) == list:
+            raise RuntimeError('scan points with different number of steps')
+        return np.asarray(xyz, dtype=dtype)
+
+
 class Termination():
     def __init__(self, logtail_lines):
         self.errorcodedict = self._gen_errorcode()
@@ -1147,23 +2201,15 @@ class ModRed():
 
 def read_mulliken_charges(filename):
     """Returns a list of the Mulliken charges that first appear in the file"""
-    with open(filename,'r') as gaussian_file:
-        for line in gaussian_file:
-            if "Mulliken atomic charges:" in line or "Mulliken charges:" in line:
-                break
-        for line in gaussian_file:
-            break
-        charges = []
-        ready = False
-        for line in gaussian_file:
-            if ready:
-                words = line.split()
-                if len(words) == 3:
-                    charges.append(float(words[2]))
-                elif len(words) > 3:
-                    return charges
-            elif "Mulliken atomic charges:" in line:
-                ready = True
-
-    return charges
-
+    keywords = [key for key in CHARGE_KEYWORDS if CHARGE_KEYWORDS[key] == 'Mulliken']
+    buf = logindex.open_mmap(filename)
+    if buf is None:
+        return []
+    try:
+        found = [buf.find(key.encode()) for key in keywords]
+        found = [byte for byte in found if byte != -1]
+        if not found:
+            return []
+        return logblocks.read_charges(buf, min(found)).tolist()
+    finally:
+        buf.close()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+"""
+Decoding of the fixed width tables Gaussian prints in .log files.
+
+The tables are read straight from the bytes of the log (mmap or bytes)
+with NumPy: a block of N rows, each 'stride' bytes long, is viewed as a
+(N, stride) array of chars and the numeric columns are converted at once.
+"""
+
+# python modules
+import collections
+import numpy as np
+
+NEWLINE = ord('\n')
+
+
+def line_start(buf, byte):
+    """Byte where the line containing byte begins"""
+    return buf.rfind(b'\n', 0, byte + 1) + 1
+
+
+def skip_lines(buf, byte, nlines):
+    """Byte after the next nlines newlines, counted from byte"""
+    for _ in range(nlines):
+        byte = buf.find(b'\n', byte) + 1
+        if byte == 0:
+            raise RuntimeError('unexpected end of log')
+    return byte
+
+
+def fixed_width_rows(buf, byte, nrows, stride):
+    """(nrows, stride) array of chars of the nrows lines starting at byte"""
+    nbytes = nrows * stride
+    rows = np.frombuffer(buf[byte:byte + nbytes], dtype=np.uint8)
+    if rows.size != nbytes:
+        raise RuntimeError('unexpected end of log')
+    rows = rows.reshape(nrows, stride)
+    if not (rows[:, -1] == NEWLINE).all():
+        raise RuntimeError('table rows are not %d bytes long' % stride)
+    return rows
+
+
+def columns_to_floats(rows, start, width, ncols):
+    """(nrows, ncols) floats from ncols consecutive fields of width chars"""
+    fields = np.ascontiguousarray(rows[:, start:start + width * ncols])
+    return fields.view('S%d' % width).astype(np.float64)
+
+
+### orientation: blocks
+
+ORIENTATION_HEADER_LINES = 5    # title, ---, Center..., Number..., ---
+XYZ_WIDTH = 12                  # F12.6
+
+
+def table_layout(buf, byte, header_lines, name='table'):
+    """
+    Returns (data_byte, stride, nrows) for the block of rows that starts
+    header_lines after the line containing byte and ends at a ' ---' line.
+    """
+    data = skip_lines(buf, line_start(buf, byte), header_lines)
+    stride = buf.find(b'\n', data) + 1 - data
+    end = buf.find(b'\n ---', data) + 1
+    if stride <= 0 or end == 0:
+        raise RuntimeError('incomplete %s block at byte %d' % (name, byte))
+    return data, stride, (end - data) // stride
+
+
+def orientation_layout(buf, byte):
+    """
+    Returns (data_byte, stride, natoms) for the orientation block whose
+    title line contains byte.
+    """
+    return table_layout(buf, byte, ORIENTATION_HEADER_LINES, 'orientation')
+
+
+def orientation_title(buf, byte):
+    """'Input orientation:', 'Standard orientation:', ... of the block"""
+    start = line_start(buf, byte)
+    return buf[start:buf.find(b'\n', start)].strip().decode()
+
+
+def detect_orientation_layout(buf, byte):
+    """
+    (header_bytes, stride, natoms) of the orientation block at byte, to
+    be given to read_orientation() for the other blocks with that title.
+    None if its rows are not all equally long (i.e. > 99999 atoms).
+    """
+    data, stride, natoms = orientation_layout(buf, byte)
+    try:
+        fixed_width_rows(buf, data, natoms, stride)
+    except RuntimeError:
+        return None
+    return (data - line_start(buf, byte), stride, natoms)
+
+
+def _fits_layout(buf, byte, layout):
+    """data byte of the block at byte if it has the layout, else None"""
+    (header_bytes, stride, natoms) = layout
+    data = line_start(buf, byte) + header_bytes
+    end = data + natoms * stride
+    if buf[data - 1:data] != b'\n' or buf[end:end + 4] != b' ---' or \
+       buf[end - 1:end] != b'\n':
+        return None
+    return data
+
+
+def read_orientation(buf, byte, idx=None, layout=None):
+    """
+    (natoms, 3) coordinates of the orientation block at byte.
+    idx: list of atom indexes (0-based) to keep, default all
+    layout: from detect_orientation_layout(), saves finding the end of
+        the block. Blocks that do not fit it are measured again, and
+        those with rows of different lengths are split into words.
+    """
+    data = None
+    if layout is not None:
+        data = _fits_layout(buf, byte, layout)
+    if data is not None:
+        stride, natoms = layout[1:]
+    else:
+        data, stride, natoms = orientation_layout(buf, byte)
+    try:
+        rows = fixed_width_rows(buf, data, natoms, stride)
+    except RuntimeError:
+        return read_orientation_words(buf, byte, idx)
+    if idx is not None:
+        rows = rows[idx]
+    return columns_to_floats(rows, stride - 1 - 3 * XYZ_WIDTH, XYZ_WIDTH, 3)
+
+
+def read_orientation_words(buf, byte, idx=None):
+    """read_orientation() for irregular blocks: the last 3 words of rows"""
+    pos = skip_lines(buf, line_start(buf, byte), ORIENTATION_HEADER_LINES)
+    xyz = []
+    while True:
+        end = buf.find(b'\n', pos)
+        if end == -1:
+            raise RuntimeError('incomplete orientation block at byte %d' % byte)
+        line = buf[pos:end]
+        if line.startswith(b' ---'):
+            break
+        xyz.append([float(word) for word in line.split()[-3:]])
+        pos = end + 1
+    xyz = np.array(xyz, dtype=np.float64).reshape(-1, 3)
+    if idx is not None:
+        xyz = xyz[idx]
+    return xyz
+
+
+### Forces (Hartrees/Bohr) blocks
+
+FORCES_HEADER_LINES = 3         # Center... Forces (Hartrees/Bohr), Number..., ---
+FORCE_WIDTH = 15                # F15.9
+
+
+def read_forces(buf, byte, idx=None):
+    """
+    (natoms, 3) forces of the block whose 'Forces (Hartrees/Bohr)' line
+    contains byte. idx: list of atom indexes (0-based) to keep, default all
+    """
+    data, stride, natoms = table_layout(buf, byte, FORCES_HEADER_LINES, 'forces')
+    rows = fixed_width_rows(buf, data, natoms, stride)
+    if idx is not None:
+        rows = rows[idx]
+    return columns_to_floats(rows, stride - 1 - 3 * FORCE_WIDTH, FORCE_WIDTH, 3)
+
+
+### convergence blocks: Item  Value  Threshold  Converged?
+
+CONVERGED_STRIDE = 56           # ' Maximum Force            0.000281     0.000450     YES'
+CONVERGED_MAX_ROWS = 6
+CONVERGED_LABEL = (1, 20)       # (first char, width)
+CONVERGED_VALUE = (26, 8)
+CONVERGED_THRESHOLD = (39, 8)
+CONVERGED_LABELS = collections.OrderedDict([
+    (b'Maximum Force       ', 'Max F'),
+    (b'RMS     Force       ', 'rms F'),
+    (b'Maximum Displacement', 'Max D'),
+    (b'RMS     Displacement', 'rms D'),
+    (b'Maximum MM Force    ', 'MaxMM'),
+    (b'RMS     MM Force    ', 'rmsMM')])
+
+
+def _fields(rows, start, width):
+    """(nrows,) array of 'S<width>' with one field of each row"""
+    return np.ascontiguousarray(rows[:, start:start + width]).view(
+        'S%d' % width).ravel()
+
+
+def _starfloats(rows, start, width):
+    """floats of a column where Gaussian may print ****** (as +inf)"""
+    fields = _fields(rows, start, width)
+    stars = (rows[:, start:start + width] == ord('*')).any(axis=1)
+    fields[stars] = b'inf'
+    return fields.astype(np.float64)
+
+
+CONVERGED_WORDS = dict((b' '.join(label.split()), short)
+                       for (label, short) in CONVERGED_LABELS.items())
+
+
+def _starfloat(word):
+    if word.startswith(b'*'):
+        return float('inf')
+    return float(word)
+
+
+def read_converged_words(buf, byte):
+    """[(short label, value, threshold)] of a block, split into words"""
+    pos = skip_lines(buf, line_start(buf, byte), 1)
+    rows = []
+    while True:
+        end = buf.find(b'\n', pos)
+        words = buf[pos:end].split()
+        if end == -1 or len(words) < 4 or words[-1] not in (b'YES', b'NO'):
+            return rows
+        label = b' '.join(words[:-3])
+        rows.append((CONVERGED_WORDS.get(label, label.decode()),
+                     _starfloat(words[-3]), _starfloat(words[-2])))
+        pos = end + 1
+
+
+def read_converged_blocks(buf, bytes_list):
+    """
+    Returns (labels, values, thresholds) of the convergence blocks whose
+    header line contains each byte of bytes_list.
+        labels:     short labels (CONVERGED_LABELS) in order of appearance
+        values:     (len(bytes_list), len(labels)) array
+        thresholds: same shape as values
+    Criteria missing from a block are nan. Blocks whose rows are not
+    CONVERGED_STRIDE long are split into words (read_converged_words).
+    """
+    nblocks = len(bytes_list)
+    window = CONVERGED_MAX_ROWS * CONVERGED_STRIDE
+    rows = np.full((nblocks, window), ord(' '), dtype=np.uint8)
+    datas = []
+    for i, byte in enumerate(bytes_list):
+        data = skip_lines(buf, line_start(buf, byte), 1)
+        block = np.frombuffer(buf[data:data + window], dtype=np.uint8)
+        rows[i, :block.size] = block
+        datas.append(data)
+    rows = rows.reshape(nblocks * CONVERGED_MAX_ROWS, CONVERGED_STRIDE)
+
+    # a block ends at the first row that is not a criterion
+    labels = _fields(rows, *CONVERGED_LABEL)
+    known = (rows[:, -1] == NEWLINE) & np.isin(labels, list(CONVERGED_LABELS))
+    known = np.logical_and.accumulate(
+        known.reshape(nblocks, CONVERGED_MAX_ROWS), axis=1)
+    irregular = []
+    for (i, nrows) in enumerate(known.sum(axis=1).tolist()):
+        after = datas[i] + nrows * CONVERGED_STRIDE
+        if nrows == 0 or buf[after:after + 8] in (b' Maximum', b' RMS    '):
+            irregular.append(i)
+            known[i] = False
+    known = known.ravel()
+
+    found, first = np.unique(labels[known], return_index=True)
+    found = found[np.argsort(first)].tolist()
+    columns = np.zeros(len(labels), dtype=np.intp)
+    for (column, label) in enumerate(found):
+        columns[labels == label] = column
+
+    block_idx = np.repeat(np.arange(nblocks), CONVERGED_MAX_ROWS)[known]
+    values = np.full((nblocks, len(found)), np.nan)
+    thresholds = np.full((nblocks, len(found)), np.nan)
+    known_rows = rows[known]
+    values[block_idx, columns[known]] = _starfloats(
+        known_rows, *CONVERGED_VALUE)
+    thresholds[block_idx, columns[known]] = _starfloats(
+        known_rows, *CONVERGED_THRESHOLD)
+    labels = [CONVERGED_LABELS[label] for label in found]
+
+    for i in irregular:
+        for (label, value, threshold) in read_converged_words(buf, bytes_list[i]):
+            if label not in labels:
+                labels.append(label)
+                values = np.hstack([values, np.full((nblocks, 1), np.nan)])
+                thresholds = np.hstack(
+                    [thresholds, np.full((nblocks, 1), np.nan)])
+            values[i, labels.index(label)] = value
+            thresholds[i, labels.index(label)] = threshold
+    return labels, values, thresholds
+
+
+### atomic charge tables: Mulliken, ESP, APT
+
+
+def read_charges(buf, byte):
+    """
+    (natoms,) charges of the table whose title line contains byte:
+        title line ('Mulliken charges:', 'Charges from ESP fit...')
+        'Charge= ... Dipole= ...' (ESP fit only)
+        column number ('1')
+        one '     1  C   -0.373212' row per atom
+    """
+    pos = skip_lines(buf, line_start(buf, byte), 1)
+    for _ in range(2):
+        end = buf.find(b'\n', pos)
+        if end == -1:
+            raise RuntimeError('incomplete charges block at byte %d' % byte)
+        words = buf[pos:end].split()
+        pos = end + 1
+        if words == [b'1']:
+            break
+    else:
+        raise RuntimeError('no charges table at byte %d' % byte)
+    charges = []
+    while True:
+        end = buf.find(b'\n', pos)
+        words = buf[pos:end].split()
+        if end == -1 or len(words) != 3 or not words[0].isdigit():
+            break
+        charges.append(float(words[2]))
+        pos = end + 1
+    return np.array(charges)
+
+
+### normal modes: 'Harmonic frequencies (cm**-1), IR intensities ...'
+
+# label of the lines above each group of (up to) 3 modes: name
+FREQ_LABELS = collections.OrderedDict([
+    (b' Frequencies --', 'frequencies'),
+    (b' Red. masses --', 'reduced_masses'),
+    (b' Frc consts  --', 'force_constants'),
+    (b' IR Inten    --', 'ir_intensities')])
+MODE_ATOM_WIDTH = 10            # '%6d%4d', atom and atomic number
+MODE_WIDTH = 23                 # 2 spaces and 3 F7.2
+MODE_XYZ_WIDTH = 7
+
+
+def _next_line(buf, pos):
+    """(line, byte after it)"""
+    end = buf.find(b'\n', pos)
+    if end == -1:
+        raise RuntimeError('incomplete normal modes block at byte %d' % pos)
+    return buf[pos:end], end + 1
+
+
+def _is_mode_numbers(line):
+    """'                      4                      5' line"""
+    words = line.split()
+    return bool(words) and all(word.isdigit() for word in words)
+
+
+def read_normal_modes(buf, byte, n_modes=None):
+    """
+    Normal modes of the section whose 'Harmonic frequencies' title line
+    contains byte, as a dict of arrays:
+        frequencies, reduced_masses, force_constants, ir_intensities
+                (n_modes,), nan if the line is not printed
+        modes   (n_modes, n_atoms, 3) displacements, only of the first
+                n_modes if given (the tables of the others are skipped)
+    Only the lines above the tables are split, the three mode tables
+    are decoded at once from their fixed width columns.
+    The high precision tables (freq=HPModes) are not read.
+    """
+    pos = skip_lines(buf, line_start(buf, byte), 1)
+    while True:
+        line, pos = _next_line(buf, pos)
+        if _is_mode_numbers(line):
+            break
+    values = dict((name, []) for name in FREQ_LABELS.values())
+    modes = []
+    natoms = None
+    while _is_mode_numbers(line):
+        nmodes = len(line.split())
+        group = dict((name, [np.nan] * nmodes) for name in FREQ_LABELS.values())
+        while True:
+            line, pos = _next_line(buf, pos)
+            if line.startswith(b'  Atom  AN'):
+                break
+            if b'Coord Atom Element' in line:
+                raise RuntimeError('high precision modes at byte %d' % byte)
+            if line[:15] in FREQ_LABELS:
+                group[FREQ_LABELS[line[:15]]] = [
+                    float(word) for word in line[15:].split()]
+        for name in FREQ_LABELS.values():
+            values[name] += group[name]
+        stride = buf.find(b'\n', pos) + 1 - pos
+        if natoms is None: # first table: count its rows
+            natoms = 0
+            row = pos
+            while buf[row:row + 6].strip().isdigit() and \
+                  buf.find(b'\n', row) + 1 - row == stride:
+                natoms += 1
+                row += stride
+        if n_modes is not None and len(values['frequencies']) - nmodes >= n_modes:
+            pos += natoms * stride
+            if buf[pos - 1:pos] != b'\n':
+                raise RuntimeError('table rows are not %d bytes long' % stride)
+            line, pos = _next_line(buf, pos)
+            continue
+        rows = fixed_width_rows(buf, pos, natoms, stride)
+        fields = np.ascontiguousarray(rows[:, MODE_ATOM_WIDTH:
+            MODE_ATOM_WIDTH + nmodes * MODE_WIDTH].reshape(
+            natoms, nmodes, MODE_WIDTH)[:, :, MODE_WIDTH - 3 * MODE_XYZ_WIDTH:])
+        xyz = fields.view('S%d' % MODE_XYZ_WIDTH).astype(np.float64)
+        modes.append(xyz.reshape(natoms, nmodes, 3).transpose(1, 0, 2))
+        pos += natoms * stride
+        if pos >= len(buf):
+            break
+        line, pos = _next_line(buf, pos)
+    normal_modes = dict((name, np.array(values[name])) for name in values)
+    if not modes:
+        modes = [np.empty((0, natoms or 0, 3))]
+    normal_modes['modes'] = np.concatenate(modes)[:n_modes]
+    return normal_modes
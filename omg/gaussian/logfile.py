@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+"""
+Gaussian logs compressed with gzip (.log.gz) or xz (.log.xz), read in
+place as if they were memory mapped: len(), slices, find() and rfind(),
+all in bytes of the uncompressed log, so the byte index works unchanged.
+
+The log is decompressed in windows of WINDOW_SIZE bytes and the windows
+used last are kept (LRU). For gzip a copy of the decompressor is kept at
+every window boundary (a checkpoint), so going back to a window only
+decompresses that window. Python can not copy lzma decompressors: xz logs
+are read forward and start over when an earlier window is needed, which is
+fine for readers going through the log in order (all of GaussianLog's).
+Checkpoints live in memory, as zlib can not restore a saved state. What
+is kept between runs, in the index of the log (see logindex.save_index),
+is stored_info(): the uncompressed size, the end of the last line, the
+last TAIL_SIZE bytes and the seek points, where a member (gzip) or stream
+(xz) starts and a new decompressor can begin. So reopening an indexed log
+answers its size, termination and fingerprint without decompressing it.
+"""
+
+# python modules
+import collections
+import io
+import lzma
+import mmap
+import os
+import zlib
+from os.path import getsize
+
+COMPRESSED_EXTENSIONS = ('.gz', '.xz')
+WINDOW_SIZE = 4 * 1024 * 1024   # uncompressed bytes per window/checkpoint
+CACHED_WINDOWS = 8              # > logindex.CHUNK_SIZE / WINDOW_SIZE
+READ_SIZE = 256 * 1024          # compressed bytes read at once
+OPEN_BUFFERS = 2                # compressed logs whose checkpoints are kept
+TAIL_SIZE = 128 * 1024          # > logindex.FINGERPRINT_SIZE, tails it hashes
+
+_open_buffers = collections.OrderedDict() # (name, size, mtime): buffer
+
+
+def is_compressed(filename):
+    return filename.endswith(COMPRESSED_EXTENSIONS)
+
+
+def open_buffer(filename):
+    """
+    Memory map of a plain log (None if empty) or a CompressedBuffer. The
+    CompressedBuffer of a file is shared: its close() keeps it for later.
+    """
+    if not is_compressed(filename):
+        if getsize(filename) == 0:
+            return None
+        with open(filename, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    stat = os.stat(filename)
+    key = (os.path.abspath(filename), stat.st_size, stat.st_mtime)
+    if key not in _open_buffers:
+        _open_buffers[key] = CompressedBuffer(filename, _load_info(filename, stat))
+        while len(_open_buffers) > OPEN_BUFFERS:
+            _open_buffers.popitem(last=False)[1].f.close()
+    _open_buffers.move_to_end(key)
+    buf = _open_buffers[key]
+    if buf.size == 0 or not buf[0:1]: # empty, decompressing one window at most
+        return None
+    return buf
+
+
+def _load_info(filename, stat):
+    """stored_info() saved in the index of filename, if it is of this file"""
+    from omg.gaussian import logindex # imports this module
+    info = logindex.load_compressed_info(filename)
+    if info is None or info.get('stat') != [stat.st_size, stat.st_mtime]:
+        return None
+    return info
+
+
+def stored_info(filename):
+    """
+    What the index of a compressed log keeps of it (json), for the file
+    as it is now on disk:
+        stat        [st_size, st_mtime] of the compressed file
+        size        uncompressed size
+        line_end    bytes up to the last newline
+        seek        [[uncompressed byte, compressed byte]] where a new
+                    member/stream starts
+        tail        last TAIL_SIZE bytes (latin-1)
+    """
+    stat = os.stat(filename)
+    buf = open_buffer(filename)
+    if buf is None:
+        return None
+    size = len(buf)
+    buf.stored = True # i.e. save_index() is keeping it
+    return {'stat': [stat.st_size, stat.st_mtime],
+            'size': size,
+            'line_end': buf.rfind(b'\n') + 1,
+            'seek': sorted([list(point) for point in buf.seek_points.items()]),
+            'tail': buf[max(size - TAIL_SIZE, 0):size].decode('latin-1')}
+
+
+def has_stored_info(filename):
+    """False for compressed logs opened without stored_info() of their index"""
+    if not is_compressed(filename):
+        return True
+    buf = open_buffer(filename)
+    return buf is None or buf.stored
+
+
+def log_size(filename):
+    """Size of the (uncompressed) log"""
+    if not is_compressed(filename):
+        return getsize(filename)
+    buf = open_buffer(filename)
+    if buf is None:
+        return 0
+    return len(buf)
+
+
+def open_log(filename, mode='r'):
+    """open(filename, mode) for 'r' and 'rb' that also reads compressed logs"""
+    if not is_compressed(filename):
+        return open(filename, mode)
+    buf = open_buffer(filename)
+    f = io.BufferedReader(BufferReader(buf if buf is not None else b''))
+    if mode == 'rb':
+        return f
+    return io.TextIOWrapper(f, encoding='utf8')
+
+
+class CompressedBuffer():
+    """
+    Read-only, mmap-like view of a .gz or .xz log. info: stored_info() of
+    the file, saved by an earlier run
+    """
+
+    def __init__(self, filename, info=None):
+        self.filename = filename
+        self.gzip = filename.endswith('.gz')
+        self.f = open(filename, 'rb')
+        self.windows = collections.OrderedDict()  # window number: bytes
+        self.checkpoints = {}   # window number: (file position, decompressor)
+        self.seek_points = {0: 0} # uncompressed byte: file position of member
+        self.size = None        # known after the last window is decompressed
+        self.line_end = None
+        self.tail = b''         # the last bytes, from tail_start
+        self.tail_start = None
+        self.stored = info is not None
+        if info is not None:
+            self.size = info['size']
+            self.line_end = info['line_end']
+            self.seek_points.update(dict(info['seek']))
+            self.tail = info['tail'].encode('latin-1')
+            self.tail_start = self.size - len(self.tail)
+        self._restart(0)
+
+    def _new_decompressor(self):
+        if self.gzip:
+            return zlib.decompressobj(zlib.MAX_WBITS | 16)
+        return lzma.LZMADecompressor()
+
+    def _restart(self, window):
+        """next bytes decompressed are the beginning of window"""
+        if window in self.checkpoints:
+            (position, decompressor) = self.checkpoints[window]
+            self.decompressor = decompressor.copy()
+            if self.decompressor.eof:
+                self.decompressor = self._new_decompressor()
+        else:
+            (window, position) = (0, 0)
+            self.decompressor = self._new_decompressor()
+        self.f.seek(position)
+        self.pending = b''      # compressed bytes not given to decompressor
+        self.window = window
+        self.position = window * WINDOW_SIZE # of the next decompressed byte
+
+    def _restart_at_seek_point(self, byte, position, window):
+        """_restart(window) from the member starting at byte (in the log)
+        and position (in the file), decompressing the bytes in between"""
+        self.decompressor = self._new_decompressor()
+        self.f.seek(position)
+        self.pending = b''
+        self.position = byte
+        while self.position < window * WINDOW_SIZE:
+            if not self._decompress(
+                    min(window * WINDOW_SIZE - self.position, WINDOW_SIZE)):
+                break
+        self.window = window
+
+    def _decompress(self, max_length):
+        """at most max_length more bytes of the log, b'' at the end"""
+        while True:
+            if self.decompressor.eof: # concatenated members/streams
+                self.pending = self.decompressor.unused_data + self.pending
+                if not self.pending:
+                    self.pending = self.f.read(READ_SIZE)
+                if not self.pending:
+                    return b''
+                self.decompressor = self._new_decompressor()
+                self.seek_points[self.position] = \
+                    self.f.tell() - len(self.pending)
+            if self.gzip or self.decompressor.needs_input:
+                if not self.pending:
+                    self.pending = self.f.read(READ_SIZE)
+                    if not self.pending:
+                        return b'' # truncated file
+                data, self.pending = self.pending, b''
+            else:
+                data = b''
+            out = self.decompressor.decompress(data, max_length)
+            if self.gzip: # at the end of a member the rest is in unused_data
+                self.pending = b''
+                if not self.decompressor.eof:
+                    self.pending = self.decompressor.unconsumed_tail
+            if out:
+                self.position += len(out)
+                return out
+
+    def _window(self, k):
+        """bytes of window k, b'' past the end of the log"""
+        if k in self.windows:
+            self.windows.move_to_end(k)
+            return self.windows[k]
+        if self.size is not None and k * WINDOW_SIZE >= self.size:
+            return b''
+        checkpoint = max([c for c in self.checkpoints if c <= k] or [0])
+        (member, position) = max([point for point in self.seek_points.items()
+                                  if point[0] <= k * WINDOW_SIZE])
+        current = self.window if k >= self.window else 0 # or start over
+        if member > max(checkpoint, current) * WINDOW_SIZE:
+            self._restart_at_seek_point(member, position, k)
+        elif k < self.window or checkpoint > self.window:
+            self._restart(checkpoint)
+        while True:
+            if self.gzip and self.window not in self.checkpoints:
+                position = self.f.tell() - len(self.pending)
+                if self.decompressor.eof: # restart with the next member
+                    position -= len(self.decompressor.unused_data)
+                self.checkpoints[self.window] = (
+                    position, self.decompressor.copy())
+            parts = []
+            n = 0
+            while n < WINDOW_SIZE:
+                out = self._decompress(WINDOW_SIZE - n)
+                if not out:
+                    break
+                parts.append(out)
+                n += len(out)
+            data = b''.join(parts)
+            self.windows[self.window] = data
+            while len(self.windows) > CACHED_WINDOWS:
+                self.windows.popitem(last=False)
+            if n < WINDOW_SIZE:
+                self.size = self.window * WINDOW_SIZE + n
+            self.window += 1
+            if self.window > k:
+                return data
+            if n < WINDOW_SIZE:
+                return b''
+
+    def __len__(self):
+        k = self.window
+        while self.size is None:
+            self._window(k)
+            k += 1
+        return self.size
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += len(self)
+            if self.tail_start is not None and index >= self.tail_start:
+                return self.tail[index - self.tail_start]
+            data = self._window(index // WINDOW_SIZE)
+            return data[index % WINDOW_SIZE]
+        if index.step not in (None, 1):
+            raise RuntimeError('CompressedBuffer slices must be contiguous')
+        start, stop = index.start, index.stop
+        if start is None:
+            start = 0
+        if stop is None or stop < 0 or start < 0:
+            (start, stop, _) = index.indices(len(self))
+        if stop <= start:
+            return b''
+        if self.tail_start is not None and start >= self.tail_start:
+            return self.tail[start - self.tail_start:stop - self.tail_start]
+        parts = []
+        for k in range(start // WINDOW_SIZE, (stop - 1) // WINDOW_SIZE + 1):
+            base = k * WINDOW_SIZE
+            parts.append(self._window(k)[max(start - base, 0):stop - base])
+        return b''.join(parts)
+
+    def _border(self, k, lo, n):
+        """(offset, bytes) around the end of window k, for matches across"""
+        data = self._window(k)
+        lo = max(lo, len(data) - n + 1)
+        return lo, data[lo:] + self._window(k + 1)[:n - 1]
+
+    def find(self, sub, start=0, stop=None):
+        if self.tail_start is not None and start >= self.tail_start:
+            i = self.tail.find(sub, start - self.tail_start,
+                               stop - self.tail_start if stop is not None else None)
+            return i if i == -1 else self.tail_start + i
+        if stop is None:
+            stop = float('inf')
+        n = len(sub)
+        k = start // WINDOW_SIZE
+        while k * WINDOW_SIZE < stop:
+            base = k * WINDOW_SIZE
+            data = self._window(k)
+            if not data:
+                return -1
+            lo = max(start - base, 0)
+            i = data.find(sub, lo, int(min(stop - base, len(data))))
+            if i != -1:
+                return base + i
+            if n > 1 and len(data) == WINDOW_SIZE:
+                (lo, edge) = self._border(k, lo, n)
+                i = edge.find(sub, 0, int(min(stop - base - lo, len(edge))))
+                if i != -1:
+                    return base + lo + i
+            k += 1
+        return -1
+
+    def rfind(self, sub, start=0, stop=None):
+        if stop is None:
+            stop = len(self)
+        n = len(sub)
+        if self.tail_start is not None and stop > self.tail_start:
+            i = self.tail.rfind(sub, max(start - self.tail_start, 0),
+                                stop - self.tail_start)
+            if i != -1:
+                return self.tail_start + i
+            # matches that begin before the tail
+            stop = min(stop, self.tail_start + n - 1)
+            if stop - start < n:
+                return -1
+        k = (stop - 1) // WINDOW_SIZE
+        while k >= 0 and (k + 1) * WINDOW_SIZE > start:
+            base = k * WINDOW_SIZE
+            data = self._window(k)
+            lo = max(start - base, 0)
+            if n > 1 and len(data) == WINDOW_SIZE and stop > base + len(data):
+                (edge_lo, edge) = self._border(k, lo, n)
+                i = edge.rfind(sub, 0, stop - base - edge_lo)
+                if i != -1:
+                    return base + edge_lo + i
+            i = data.rfind(sub, lo, min(stop - base, len(data)))
+            if i != -1:
+                return base + i
+            k -= 1
+        return -1
+
+    def close(self):
+        """kept open (and its checkpoints) for the next reader"""
+        pass
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable raw file over a CompressedBuffer, for io.BufferedReader"""
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.buf)
+        if offset < 0:
+            raise ValueError('negative seek position %d' % offset)
+        self.position = offset
+        return self.position
+
+    def readinto(self, b):
+        data = self.buf[self.position:self.position + len(b)]
+        b[:len(data)] = data
+        self.position += len(data)
+        return len(data)
@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+"""
+Byte index of Gaussian .log files.
+
+Finds the lines where a set of keywords appear, the same way
+'grep -b -e key1 -e key2 ... file' does, but in-process over a memory
+mapped file: no shell, no grep, no decoding of the matched lines.
+
+Most of a log is digits and spaces (coordinates, forces, charges), so each
+keyword is anchored on its rarest byte. The anchors are located with
+find() of a single byte (memchr speed) and the keyword is only compared
+where an anchor shows up. Keywords without a rare byte are searched for
+directly.
+"""
+
+# python modules
+import json
+from hashlib import md5
+import multiprocessing
+import os
+import pickle
+from sys import stderr
+import numpy as np
+
+# our python modules
+from omg.gaussian import logfile
+
+CHUNK_SIZE = 16 * 1024 * 1024   # bytes scanned per window (fits in cache)
+PARALLEL_MIN_SIZE = 256 * 1024 * 1024 # smaller ranges are indexed in-process
+SAMPLE_SIZE = 1024 * 1024       # bytes used to choose the anchor bytes
+MAX_ANCHOR_RATE = 1.0 / 2000    # above this frequency, search keyword instead
+
+
+def open_mmap(filename):
+    """
+    Read-only memory map of filename, None if the file is empty.
+    Compressed logs (.gz, .xz) give a logfile.CompressedBuffer instead.
+    """
+    return logfile.open_buffer(filename)
+
+
+def _search_plan(sample, bkeys):
+    """
+    Returns (anchors, direct):
+        anchors:    {anchor byte: [(priority, key, anchor index in key)]}
+        direct:     [(priority, key)] to be searched as a whole
+    """
+    counts = {}
+    for key in bkeys:
+        for i in range(len(key)):
+            char = key[i:i+1]
+            if char not in counts:
+                counts[char] = sample.count(char)
+    anchors = {}
+    direct = []
+    for priority, key in enumerate(bkeys):
+        count, i = min([(counts[key[i:i+1]], i) for i in range(len(key))])
+        if count > MAX_ANCHOR_RATE * max(len(sample), 1):
+            direct.append((priority, key))
+        else:
+            anchors.setdefault(key[i:i+1], []).append((priority, key, i))
+    return anchors, direct
+
+
+def find_keywords(buf, keywords, start=0, stop=None):
+    """
+    Returns a sorted list of (byte, key) for each line of buf that
+    contains any of the keywords starting in buf[start:stop].
+
+        byte:   offset of the beginning of the line (as in grep -b)
+        key:    first keyword of the list found in that line
+
+    buf is anything supporting slicing and find/rfind on bytes (mmap, bytes).
+    Lines are never considered to begin before start, which mimics
+    'tail -c +start file | grep -b'.
+    """
+    if stop is None:
+        stop = len(buf)
+    bkeys = [key.encode() for key in keywords]
+    overlap = max([len(key) for key in bkeys]) - 1
+    anchors, direct = _search_plan(
+        buf[start:min(stop, start + SAMPLE_SIZE)], bkeys)
+
+    matches = {} # line byte: keyword priority
+
+    def add_match(byte, priority):
+        line_byte = max(buf.rfind(b'\n', start, byte) + 1, start)
+        if matches.get(line_byte, priority) >= priority:
+            matches[line_byte] = priority
+
+    for chunk_start in range(start, stop, CHUNK_SIZE):
+        chunk_stop = min(chunk_start + CHUNK_SIZE, stop)
+        window_stop = min(chunk_stop + overlap, len(buf))
+        for anchor, group in anchors.items():
+            pos = buf.find(anchor, chunk_start, window_stop)
+            while pos != -1:
+                for priority, key, i in group:
+                    byte = pos - i
+                    if chunk_start <= byte < chunk_stop and \
+                       buf[byte:byte + len(key)] == key:
+                        add_match(byte, priority)
+                pos = buf.find(anchor, pos + 1, window_stop)
+        for priority, key in direct:
+            pos = buf.find(key, chunk_start, window_stop)
+            while pos != -1 and pos < chunk_stop:
+                add_match(pos, priority)
+                pos = buf.find(key, pos + 1, window_stop)
+
+    return [(byte, keywords[matches[byte]]) for byte in sorted(matches)]
+
+
+def index_file(filename, keywords, start=0, stop=None):
+    """find_keywords() over the memory mapped file, default up to EOF"""
+    buf = open_mmap(filename)
+    if buf is None:
+        return []
+    try:
+        return find_keywords(buf, keywords, start, stop)
+    finally:
+        buf.close()
+
+
+def split_lines(buf, start, stop, n):
+    """n (or fewer) consecutive ranges of buf[start:stop], cut after a newline"""
+    cuts = [start]
+    for k in range(1, n):
+        cut = buf.find(b'\n', start + k * (stop - start) // n, stop) + 1
+        if cut > cuts[-1]:
+            cuts.append(cut)
+    cuts.append(stop)
+    return [(a, b) for (a, b) in zip(cuts[:-1], cuts[1:]) if a < b]
+
+
+def index_file_parallel(filename, keywords, start=0, stop=None, workers=1):
+    """
+    index_file() with the range split in one range per process. Ranges
+    are cut after a newline, so no line (and no keyword) is split between
+    them and the merged list is what index_file() returns.
+    workers: None for os.cpu_count(). Ranges below PARALLEL_MIN_SIZE and
+    compressed logs (decompressed from the start in each process) are
+    indexed in-process, as everything is with the default of 1.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    buf = open_mmap(filename)
+    if buf is None:
+        return []
+    try:
+        if stop is None:
+            stop = len(buf)
+        if workers <= 1 or stop - start < PARALLEL_MIN_SIZE or \
+           logfile.is_compressed(filename):
+            return find_keywords(buf, keywords, start, stop)
+        ranges = split_lines(buf, start, stop, workers)
+    finally:
+        buf.close()
+    pool = multiprocessing.Pool(min(workers, len(ranges)))
+    try:
+        found = pool.starmap(index_file, [(filename, keywords, a, b)
+                                          for (a, b) in ranges])
+    finally:
+        pool.close()
+        pool.join()
+    return [match for matches in found for match in matches]
+
+
+def merge_bytelists(bytelist, new_bytelist, keywords):
+    """
+    Sorted (byte, key) list of two indexes of the same bytes made with
+    different keywords. Lines found in both keep the key that comes first
+    in keywords, as if they had been indexed together.
+    """
+    priority = dict((key, i) for (i, key) in enumerate(keywords))
+    merged = {}
+    for (byte, key) in bytelist + new_bytelist:
+        if byte not in merged or priority[key] < priority[merged[byte]]:
+            merged[byte] = key
+    return [(byte, merged[byte]) for byte in sorted(merged)]
+
+
+def find_in_file(filename, text_list, start=0, stop=None):
+    """Sorted bytes where any of the strings in text_list appear"""
+    buf = open_mmap(filename)
+    if buf is None:
+        return []
+    if stop is None:
+        stop = len(buf)
+    found = []
+    try:
+        for text in text_list:
+            text = text.encode()
+            byte = buf.find(text, start, stop)
+            while byte != -1:
+                found.append(byte)
+                byte = buf.find(text, byte + 1, stop)
+    finally:
+        buf.close()
+    return sorted(found)
+
+
+def complete_lines_size(filename):
+    """Bytes up to the last newline: lines after it may still be written"""
+    buf = open_mmap(filename)
+    if buf is None:
+        return 0
+    try:
+        if getattr(buf, 'line_end', None) is not None: # stored_info()
+            return buf.line_end
+        return buf.rfind(b'\n') + 1
+    finally:
+        buf.close()
+
+
+FINGERPRINT_SIZE = 64 * 1024    # bytes hashed at each end of the log
+
+
+def fingerprint(filename, size):
+    """md5 of the first and last FINGERPRINT_SIZE bytes of filename[:size]"""
+    buf = open_mmap(filename)
+    if buf is None:
+        return md5().hexdigest()
+    try:
+        digest = md5(buf[:min(FINGERPRINT_SIZE, size)])
+        digest.update(buf[max(size - FINGERPRINT_SIZE, 0):size])
+    finally:
+        buf.close()
+    return digest.hexdigest()
+
+
+### index sidecar: <log>.index.npy
+
+INDEX_VERSION = 1
+INDEX_MAGIC = 0x4f4d47494458     # 'OMGIDX'
+HEADER_WORDS = 4                # magic, version, n_keywords, text words
+
+# keywords of the pickled .bytelist files, for migration. GaussianLog
+# indexes the keywords added since then over the migrated bytes only.
+LEGACY_KEYWORDS = [
+    'atrix:',
+    'orientation:',
+    'ONIOM: calculating energy.',
+    'SCF Done:',
+    'Converged?',
+    'Step number',
+    'Optimized Parameters',
+    'Delta-x Convergence Met',
+    'CORRECTOR']
+
+
+def index_filename(logname):
+    return '%s.index.npy' % logname
+
+
+def save_index(logname, bytelist, keywords, signature, layouts=None):
+    """
+    Writes the (byte, key) list, or its (bytes, key ids) byteindex, next
+    to the log, as one int64 .npy:
+        magic, version, n_keywords, n_text_words
+        n_keywords counts
+        text (json with keywords, signature and layouts of the tables,
+              i.e. {'Input orientation:': [header_bytes, stride, natoms]},
+              and for compressed logs logfile.stored_info(),
+              padded to 8 bytes)
+        offsets of keyword 0, offsets of keyword 1, ...
+    The file is written to a temporary name and renamed, so readers never
+    see half written indexes.
+    """
+    text = {'keywords': keywords, 'signature': list(signature),
+            'layouts': layouts or {}}
+    if logfile.is_compressed(logname):
+        text['compressed'] = logfile.stored_info(logname)
+    text = json.dumps(text)
+    text = text.encode()
+    text += b' ' * (-len(text) % 8)
+
+    if isinstance(bytelist, list):
+        bytelist = bytelist_to_byteindex(bytelist, keywords)
+    (allbytes, key_ids) = bytelist
+    offsets = [allbytes[key_ids == i] for i in range(len(keywords))]
+
+    header = [INDEX_MAGIC, INDEX_VERSION, len(keywords), len(text) // 8]
+    header += [len(key_offsets) for key_offsets in offsets]
+    words = np.concatenate([
+        np.array(header, dtype=np.int64),
+        np.frombuffer(text, dtype=np.int64)] + offsets)
+
+    filename = index_filename(logname)
+    tmpname = '%s.%d.tmp' % (filename, os.getpid())
+    try:
+        with open(tmpname, 'wb') as f:
+            np.save(f, words)
+        os.replace(tmpname, filename)
+    except OSError as error:
+        stderr.write('Index: could not save %s (%s)\n' % (filename, error))
+        if os.path.exists(tmpname):
+            os.remove(tmpname)
+
+
+def load_index(logname):
+    """
+    Returns (offsets, keywords, signature, layouts) or None if there is
+    no valid index. offsets is {keyword: int64 array}, zero-copy views of the
+    memory mapped file. Legacy pickled .bytelist files are migrated.
+    """
+    filename = index_filename(logname)
+    if not os.path.exists(filename):
+        if not _migrate_bytelist(logname):
+            return None
+    words = _load_words(filename)
+    if words is None:
+        return None
+    n_keywords, n_text = int(words[2]), int(words[3])
+    counts = words[HEADER_WORDS:HEADER_WORDS + n_keywords]
+    start = HEADER_WORDS + n_keywords
+    text = json.loads(words[start:start + n_text].tobytes().decode())
+    start += n_text
+    offsets = {}
+    for (key, count) in zip(text['keywords'], counts.tolist()):
+        offsets[key] = words[start:start + count]
+        start += count
+    return (offsets, text['keywords'], tuple(text['signature']),
+            text.get('layouts', {}))
+
+
+def empty_byteindex():
+    return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+
+def load_compressed_info(logname):
+    """logfile.stored_info() kept in the index of logname, None if none"""
+    filename = index_filename(logname)
+    if not os.path.exists(filename):
+        return None
+    words = _load_words(filename, quiet=True)
+    if words is None:
+        return None
+    start = HEADER_WORDS + int(words[2])
+    text = json.loads(words[start:start + int(words[3])].tobytes().decode())
+    return text.get('compressed')
+
+
+def _load_words(filename, quiet=False):
+    """int64 words of the index file (memory mapped), None if not one"""
+    try:
+        words = np.load(filename, mmap_mode='r', allow_pickle=False)
+    except (OSError, ValueError) as error:
+        if not quiet:
+            stderr.write('Index: unreadable %s (%s)\n' % (filename, error))
+        return None
+    if words.dtype != np.int64 or words.ndim != 1 or \
+       len(words) < HEADER_WORDS or words[0] != INDEX_MAGIC:
+        if not quiet:
+            stderr.write('Index: %s is not an index file\n' % filename)
+        return None
+    if words[1] != INDEX_VERSION:
+        if not quiet:
+            stderr.write('Index: %s has version %d, expected %d\n' % (
+                filename, words[1], INDEX_VERSION))
+        return None
+    return words
+
+
+def offsets_to_byteindex(offsets, keywords):
+    """
+    {keyword: offsets} to the byteindex, (bytes, key ids): two int64
+    arrays sorted by byte, key ids being indexes of keywords. It is what
+    the [(byte, key)] list holds, without a python tuple per line.
+    """
+    if not keywords:
+        return empty_byteindex()
+    allbytes = np.concatenate([offsets[key] for key in keywords])
+    key_ids = np.repeat(np.arange(len(keywords), dtype=np.int64),
+                        [len(offsets[key]) for key in keywords])
+    order = np.argsort(allbytes, kind='stable')
+    return (allbytes[order], key_ids[order])
+
+
+def bytelist_to_byteindex(bytelist, keywords):
+    """sorted [(byte, key)] list to (bytes, key ids)"""
+    key_ids = dict((key, i) for (i, key) in enumerate(keywords))
+    return (np.array([byte for (byte, _) in bytelist], dtype=np.int64),
+            np.array([key_ids[key] for (_, key) in bytelist], dtype=np.int64))
+
+
+def byteindex_to_bytelist(byteindex, keywords):
+    """(bytes, key ids) back to the sorted [(byte, key)] list"""
+    (allbytes, key_ids) = byteindex
+    return list(zip(allbytes.tolist(),
+                    [keywords[k] for k in key_ids.tolist()]))
+
+
+def offsets_to_bytelist(offsets, keywords):
+    """{keyword: offsets} back to the sorted [(byte, key)] list"""
+    return byteindex_to_bytelist(offsets_to_byteindex(offsets, keywords),
+                                 keywords)
+
+
+class _BytelistUnpickler(pickle.Unpickler):
+    """.bytelist files only hold lists, tuples, ints and strs"""
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError('refusing to load %s.%s' % (module, name))
+
+
+def _migrate_bytelist(logname):
+    """
+    Converts <log>.bytelist (pickle) to <log>.index.npy. True if done.
+    The pickle is kept as <log>.bytelist.bak, for older versions.
+    """
+    bytelist_filename = '%s.bytelist' % logname
+    if not os.path.exists(bytelist_filename):
+        return False
+    try:
+        with open(bytelist_filename, 'rb') as bl:
+            bytelist = _BytelistUnpickler(bl).load()
+        signature = tuple(bytelist.pop(-1))
+    except Exception as error:
+        stderr.write('Index: cannot migrate %s (%s)\n' % (
+            bytelist_filename, error))
+        return False
+    save_index(logname, bytelist, LEGACY_KEYWORDS, signature)
+    if not os.path.exists(index_filename(logname)):
+        return False
+    os.replace(bytelist_filename, bytelist_filename + '.bak')
+    stderr.write('Index: migrated %s\n' % bytelist_filename)
+    return True
@@ -2,6 +2,7 @@
 
 # qt modules
 from omg import atoms
+from omg import atomtable
 
 # (1)Parsing and (2)Printing
 # Gaussian Z-MAT Line 
@@ -104,83 +105,96 @@ def zmat2atom(line):
 
         
 def atom2zmat(atom, print_resinfo = True):
+    return atom2zmat_template(atom, print_resinfo) % (
+        atom.GetX(), atom.GetY(), atom.GetZ())
 
-    # check attributes
-    res = atom.resinfo and print_resinfo
-
-    # el + mm + resinfo
+def atom2zmat_template(atom, print_resinfo = True):
+    """
+    atom2zmat() line with %11.6f for the coordinates, so that only these
+    are formatted for each geometry
+    """
+    mm, resinfo, oniom = None, None, None
     if atom.mm:
-        line = '{0}-{1.mm.atype}-{1.mm.charge:.9f}'.format(atom.GetType(),atom)
-        line = '{0:.15s}'.format(line) # fill with spaces (max 15 char)
-    else:
-        line = ' {0:1s}'.format(atom.GetType()) #NOTA:provavelment vai ser preciso adicionar 14s apos a resinfo 
-
-    if res:
-        line = ('{0}(PDBName={1.resinfo.name},'
-        'ResName={1.resinfo.resname},'
-        'ResNum={1.resinfo.resnum}_{1.resinfo.chain})'
-        .format(line, atom))
-        line = '{0:60s}'.format(line) # fill with spaces
-
-    # add:  mask + (x, y, z) + layer
+        mm = (atom.mm.atype, atom.mm.charge)
+    if atom.resinfo and print_resinfo:
+        resinfo = (atom.resinfo.name, atom.resinfo.resname,
+                   atom.resinfo.resnum, atom.resinfo.chain)
     if atom.oniom:
-        line += (
-        '{0.oniom.mask:>4d} {1:>11.6f} {2:>11.6f} '
-        '{3:>11.6f} {0.oniom.layer:s}'
-        .format(atom,
-                atom.GetX(),
-                atom.GetY(),
-                atom.GetZ(),
-               ))
-
-        # add link
+        link = None
         if atom.oniom.has_link:
             link_atom = atom.oniom.link_atom
+            link_mm = None
             if link_atom.mm:
-                line += (
-                ' {0}-{1.mm.atype}-{1.mm.charge}'
-                ' {2.oniom.link_bound_to} {2.oniom.link_scale1}'
-                .format(link_atom.GetType(), link_atom, atom))
-            else:
-                line += (
-                ' {0}'
-                ' {1.oniom.link_bound_to} {1.oniom.link_scale1}'
-                .format(link_atom.GetType(), atom))
-
-    # add (x, y, z)
-    else:
-        line += '{0:>11.6f} {1:>11.6f} {2:>11.6f}'.format(atom.x(),
-                                                          atom.y(),
-                                                          atom.z())
-    
-    line = "{0}\n".format(line)
-
-    return line
+                link_mm = (link_atom.mm.atype, link_atom.mm.charge)
+            link = (link_atom.GetType(), link_mm, atom.oniom.link_bound_to,
+                    atom.oniom.link_scale1)
+        oniom = (atom.oniom.mask, atom.oniom.layer, link)
+    return atomtable.zmat_template(atom.GetType(), mm, resinfo, oniom)
 
 
 def atom2pdb(atom):
     if atom.pdbinfo == None:
         atom.set_pdbinfo( atoms.PDBinfo('ATOM', 0) )
-    if not atom.resinfo:
-        line =(
-        '{1.keyword:<6s}          {1.altloc:1s}' 
-        '         {1.icode:1s}'
-        '   {2:8.3f}{3:8.3f}{4:8.3f}'
-        '{1.occupancy:6.2f}{1.bfact:6.2f}'
-        '          {5:>2s}{1.formalcharge:2s}\n'
-        .format(atom, atom.pdbinfo, atom.x(), atom.y(), atom.z(),
-                atom.GetType()))
-        return line
+    return pdb_template(atom.pdbinfo, atom.GetType(), atom.resinfo) % (
+        atom.GetX(), atom.GetY(), atom.GetZ())
+
+def atom2pdb_template(atom, serial):
+    """
+    atom2pdb() line with %8.3f for the coordinates, so that only these
+    are formatted for each frame. Does not touch atom.pdbinfo.
+    """
+    return pdb_template(atoms.PDBinfo('ATOM', serial), atom.GetType(),
+                        atom.resinfo)
+
+def pdb_template(pdbinfo, element, resinfo=None):
+    """PDB line of atoms.PDBinfo and RESinfo with %8.3f for the coordinates"""
+    if not resinfo:
+        head = '{0.keyword:<6s}          {0.altloc:1s}         {0.icode:1s}   '\
+            .format(pdbinfo)
     else:
-        line =(
-        '{2.keyword:<6s}{2.serial:>5d} {1.name:4s}{2.altloc:1s}' 
-        '{1.resname:3s} {1.chain:1s}{3:4d}{2.icode:1s}'
-        '   {4:8.3f}{5:8.3f}{6:8.3f}'
-        '{2.occupancy:6.2f}{2.bfact:6.2f}'
-        '          {7:>2s}{2.formalcharge:2s}\n'
-        .format(atom, atom.resinfo, atom.pdbinfo, atom.resinfo.resnum%10000,
-            atom.GetX(), atom.GetY(), atom.GetZ(), atom.GetType()))
-    return line
+        head = ('{1.keyword:<6s}{1.serial:>5d} {0.name:4s}{1.altloc:1s}'
+            '{0.resname:3s} {0.chain:1s}{2:4d}{1.icode:1s}   '
+            .format(resinfo, pdbinfo, resinfo.resnum%10000))
+    tail = ('{0.occupancy:6.2f}{0.bfact:6.2f}          {1:>2s}{0.formalcharge:2s}\n'
+        .format(pdbinfo, element))
+    return head.replace('%', '%%') + '%8.3f%8.3f%8.3f' + tail.replace('%', '%%')
+
+class TrajectoryWriter():
+    """
+    Writes frames of atoms_list, one (n_atoms, 3) array at a time, to an
+    open file. Everything but the coordinates is formatted only once.
+        fmt:    'pdb' (MODEL/ENDMDL blocks) or 'xyz'
+        idx:    indexes of the atoms to write (i.e. high layer), default all
+    """
+    def __init__(self, f, atoms_list, fmt='pdb', idx=None, title=''):
+        if idx is not None:
+            idx = list(idx)
+        self.f = f
+        self.idx = idx
+        self.fmt = fmt
+        self.nframes = 0
+        if idx is None:
+            idx = range(len(atoms_list))
+        if fmt == 'pdb':
+            # serial as in the gaussian input, for subsets too
+            lines = [atom2pdb_template(atoms_list[i], i+1) for i in idx]
+            self.frame_format = ''.join(lines) + 'ENDMDL\n'
+        elif fmt == 'xyz':
+            lines = ['%-2s %%12.6f %%12.6f %%12.6f\n' % atoms_list[i].GetType()
+                     for i in idx]
+            self.frame_format = '%d\n%s\n' % (len(lines),
+                title.replace('%', '%%')) + ''.join(lines)
+        else:
+            raise RuntimeError('fmt must be pdb or xyz, got %s' % fmt)
+
+    def write(self, xyz):
+        """xyz: (n_atoms, 3) coordinates of all atoms in atoms_list"""
+        self.nframes += 1
+        if self.fmt == 'pdb':
+            self.f.write('MODEL %d\n' % self.nframes)
+        if self.idx is not None:
+            xyz = xyz[self.idx]
+        self.f.write(self.frame_format % tuple(xyz.ravel().tolist()))
 
 def atom2pdbqt(atom):
     if not atom.resinfo:
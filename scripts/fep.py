@@ -181,14 +181,16 @@ def log_to_sp():
 
     sp_jobs_list = []
     # criar inputs de gaussian sp para o resp 
+    template = gaussian.ComTemplate(
+        gaussian.GaussianCom(GAUSSIAN_CHARGE_EXAMPLE))
     for no, atoms_list in enumerate(geometries_list): 
         gaussian_sp_input_name = "charge_sp_{:03d}.com".format(no)
         sp_jobs_list.append(gaussian_sp_input_name)
-        gaussian_sp_file = gaussian.GaussianCom(GAUSSIAN_CHARGE_EXAMPLE)
-        for no, atom in enumerate(atoms_list):
-            gaussian_sp_file.atoms_list[no].SetVector(atom.GetVector())
-        gaussian_sp_file.write_to_file("{}/{}"
-                .format(GAUSSIAN_CHARGE_FOLDER, gaussian_sp_input_name))
+        xyz = template.xyz.copy()
+        xyz[:len(atoms_list)] = [(atom.GetX(), atom.GetY(), atom.GetZ())
+                                 for atom in atoms_list]
+        template.write("{}/{}".format(GAUSSIAN_CHARGE_FOLDER,
+                                      gaussian_sp_input_name), xyz)
     
     #write bash script to run everything
     with open(RUN_SP_SCRIPT_NAME, 'w') as script_file:
@@ -317,8 +319,8 @@ def sp_to_md():
 
 def md_to_sp():
     """ Creates gaussian sp inputs from the molecular dynamics"""
-    oniom_gaussian_example = gaussian.GaussianCom(GAUSSIAN_AMBER_EXAMPLE)
-    example_atoms_list = oniom_gaussian_example.atoms_list
+    oniom_template = gaussian.ComTemplate(
+        gaussian.GaussianCom(GAUSSIAN_AMBER_EXAMPLE))
 
     ## read single point charge inputs to know the geometries to create 
     charge_com_files = []
@@ -382,14 +384,9 @@ def md_to_sp():
         for sp_no in range(0, 1000, 1):  ####### TODO!!!!!!
             
             mdcrd_coordinates = snapshots[sp_no]
-            gaussian_atoms_list = []
             # an example file is used to read the pdb info
-
-            for no, atom in enumerate(example_atoms_list):
-                atom.SetVector(float(mdcrd_coordinates[no][0]),
-                               float(mdcrd_coordinates[no][1]),
-                               float(mdcrd_coordinates[no][2]))
-                gaussian_atoms_list.append(atom)
+            xyz = np.array(mdcrd_coordinates[:len(oniom_template)],
+                           dtype=float)
             
             #### high layer geometry and charges come from the 
             ####charge single points
@@ -408,14 +405,14 @@ def md_to_sp():
                         amber_no    = amber_hl_no_atoms_list[index]
                                                
                         #gaussian_atoms_list[amber_no].charge =\
-                        gaussian_atoms_list[amber_no].SetVector(
-                            geometries_list[hl_geometry_no][gaussian_no].GetVector())
+                        hl_atom = geometries_list[hl_geometry_no][gaussian_no]
+                        xyz[amber_no] = (hl_atom.GetX(), hl_atom.GetY(),
+                                         hl_atom.GetZ())
                             #geometries_list[hl_geometry_no][gaussian_no].charge
 
                     sp_jobs_list.append("{:03d}_on_{:03d}_{:03d}.com"\
                             .format(hl_geometry_no, int(md_no), sp_no))
-                    oniom_gaussian_example.atoms_list = gaussian_atoms_list
-                    oniom_gaussian_example.write_to_file(gaussian_name)
+                    oniom_template.write(gaussian_name, xyz)
                     print("Using {} and md:{}".format(charge_com_files[int(md_no)+position],md_no ))
                     print("Saved {}".format(gaussian_name))
               
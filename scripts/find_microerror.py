@@ -25,29 +25,27 @@ def main():
     gaussian_com_name = gaussian_name + '.com'
     new_gaussian_com_name = gaussian_name + '_rst.com'
     
-    log_geometries = gaussian.GaussianLog(gaussian_log_name)\
-            .read_last_microiterations()
-
-    dist_list = []
-    for no, atom in enumerate(log_geometries[-1]):
-        if atom.element != 'H':
-            dist_list.append((no, atom.distance(log_geometries[-2][no])))
-        
-    dist_list.sort(key=lambda x: -x[1])
+    gaussian_log = gaussian.GaussianLog(gaussian_log_name, lazy=True)
+    last_xyz = gaussian_log.read_last_microiterations(2)
+    if len(last_xyz) < 2:
+        sys.stderr.write('%s: %s\n' % (gaussian_log_name,
+            'only one microiteration' if len(last_xyz) else 'no microiterations'))
+        sys.exit(2)
+    atom_idx, displacements = gaussian_log.rank_microiteration_displacements(
+        xyz=last_xyz)
+    last_xyz = last_xyz[-1]
 
     gaussian_com_file = gaussian.GaussianCom(gaussian_com_name)
     atoms_list = gaussian_com_file.atoms_list
     
     for no, atom in enumerate(atoms_list):
-        atom.x = log_geometries[-1][no].x
-        atom.y = log_geometries[-1][no].y
-        atom.z = log_geometries[-1][no].z
+        atom.SetVector(*last_xyz[no])
 
     print("Freezing atoms:")
-    for i in range(HOW_MANY_ATOMS):
-        atom = atoms_list[dist_list[i][0]]
-        atom.mask = "-1"
-        print(atom, dist_list[i][0]+1)
+    for i in range(min(HOW_MANY_ATOMS, len(atom_idx))):
+        atom = atoms_list[atom_idx[i]]
+        atom.oniom.mask = -1
+        print(atom, atom_idx[i]+1, '%.3f' % displacements[i])
 
 
     ## Write new gaussian file from a model com file
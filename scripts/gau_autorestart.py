@@ -240,7 +240,7 @@ def main():
 
     TIMECAP = 24
 
-    glog = GL(logname)
+    glog = GL(logname, lazy=True) # glog_status needs little of it
     modtime = hours_since_mod(logname)
 
     coords = [] # this is user input for bonds, angles, and dihedrals
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Benchmark the in-process byte indexer of GaussianLog against the
+'grep -b' shell pipeline it replaced, on a synthetic ONIOM log.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from omg.gaussian import logindex
+
+KEYWORDS = [
+    'atrix:',
+    'orientation:',
+    'ONIOM: calculating energy.',
+    'SCF Done:',
+    'Converged?',
+    'Step number',
+    'Optimized Parameters',
+    'Delta-x Convergence Met',
+    'CORRECTOR']
+
+SEP = ' ' + '-' * 69 + '\n'
+
+
+def get_args():
+    "Parse arguments of gau_benchindex"
+    parser = argparse.ArgumentParser(
+        description="""
+            Write a synthetic Gaussian .log of the requested size and time
+            the byte indexing with logindex and with grep -b.""",
+        formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('log', help='synthetic .log to (over)write')
+    parser.add_argument('-g', '--gigabytes', type=float, default=2.0,
+                        help='size of the synthetic log (default = 2)')
+    parser.add_argument('-n', '--natoms', type=int, default=5000,
+                        help='atoms per geometry (default = 5000)')
+    parser.add_argument('--keep', action='store_true', default=False,
+                        help='reuse log if it exists and keep it afterwards')
+    return parser.parse_args()
+
+
+def opt_step_text(natoms, step):
+    """one optimization step, roughly what g09 prints for ONIOM"""
+    txt = '                          Input orientation:                          \n'
+    txt += SEP
+    txt += ' Center     Atomic      Atomic             Coordinates (Angstroms)\n'
+    txt += ' Number     Number       Type             X           Y           Z\n'
+    txt += SEP
+    for i in range(natoms):
+        txt += ' %6d %10d %11d    %12.6f%12.6f%12.6f\n' % (
+            i + 1, 6, 0, 0.001 * i, -0.002 * i, 0.003 * step)
+    txt += SEP
+    txt += ' ONIOM: calculating energy.\n'
+    txt += ' ONIOM: gridpoint  1 method:  low   system:  model energy:      -0.123456789012\n'
+    txt += ' ONIOM: gridpoint  2 method:  high  system:  model energy:    -345.678901234567\n'
+    txt += ' ONIOM: gridpoint  3 method:  low   system:  real  energy:      -1.234567890123\n'
+    txt += ' ONIOM: extrapolated energy =    -346.790012335678\n'
+    txt += ' SCF Done:  E(RB3LYP) =  -345.678901234     A.U. after   12 cycles\n'
+    txt += ' Step number %3d out of a maximum of  100\n' % (step % 100 + 1)
+    txt += '         Item               Value     Threshold  Converged?\n'
+    txt += ' Maximum Force            0.000123     0.000450     YES\n'
+    txt += ' RMS     Force            0.000034     0.000300     YES\n'
+    txt += ' Maximum Displacement     0.001234     0.001800     YES\n'
+    txt += ' RMS     Displacement     0.000456     0.001200     YES\n'
+    txt += ' Predicted change in Energy=-1.234567D-08\n'
+    return txt
+
+
+def write_log(name, gigabytes, natoms):
+    target = int(gigabytes * 1024**3)
+    with open(name, 'w') as f:
+        f.write(' Symbolic Z-matrix:\n')
+        step = 0
+        while f.tell() < target:
+            f.write(opt_step_text(natoms, step))
+            step += 1
+        f.write('                           !   Optimized Parameters   !\n')
+    return step
+
+
+def shell_grep(name):
+    """the former GaussianLog._grep_bytelist pipeline"""
+    grep_string = ''.join(['-e "%s" ' % key for key in KEYWORDS])
+    grep_output = subprocess.Popen('grep -b ' + grep_string + name,
+                                   shell=True, stdout=subprocess.PIPE)
+    grep_output = grep_output.communicate()[0].decode("utf8").splitlines()
+    bytelist = []
+    for line in grep_output:
+        byte, line = line.split(':', 1)
+        for key in KEYWORDS:
+            if key in line:
+                bytelist.append((int(byte), key))
+                break
+    return bytelist
+
+
+def timeit(func, *args):
+    start = time.time()
+    out = func(*args)
+    return time.time() - start, out
+
+
+def main():
+    args = get_args()
+    if not (args.keep and os.path.exists(args.log)):
+        sys.stderr.write('Writing %.1f GB to %s...\n' % (
+            args.gigabytes, args.log))
+        write_log(args.log, args.gigabytes, args.natoms)
+    size = os.path.getsize(args.log) / 1024.0**2
+
+    # first read warms the page cache for both
+    t_grep, grep_list = timeit(shell_grep, args.log)
+    t_grep, grep_list = timeit(shell_grep, args.log)
+    t_idx, idx_list = timeit(logindex.index_file, args.log, KEYWORDS)
+
+    print('log size:   %10.1f MB' % size)
+    print('matches:    %10d' % len(idx_list))
+    print('grep -b:    %10.2f s  %8.1f MB/s' % (t_grep, size / t_grep))
+    print('logindex:   %10.2f s  %8.1f MB/s' % (t_idx, size / t_idx))
+    print('identical:  %10s' % (grep_list == idx_list))
+
+    if not args.keep:
+        os.remove(args.log)
+
+if __name__ == '__main__':
+    main()
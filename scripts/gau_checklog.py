@@ -6,6 +6,7 @@ def symbolizer(value, threshold):
     for i in range(12):
         if value <= factor[i] * threshold:
             return symbols[i]
+    return ' ' # nan: criterion not printed in this step
 
 def print_label_index(start, stop):
     TOL = 4 # dont print in ending chars
@@ -117,7 +118,8 @@ def main():
     from os.path import splitext
     import getopt, sys
     from gaussian import GaussianLog as GL
-    import misc, asciiplot, geom
+    import asciiplot, geom
+    import numpy as np
 
     try:
         opts, args = getopt.gnu_getopt(sys.argv[1:], 'e:w:h')
@@ -165,12 +167,10 @@ def main():
     # read gaussian.log
     gl = GL(filein)
 
-    converged = []
-    for byte in gl.bytedict['Converged?'][-1]:
-        # labels and thresh are constant for every byte, keep only last iter
-        (labels, values, thresh) = gl.read_converged(byte)
-        converged.append(values)
-    converged = misc.transpose_list_of_lists(converged)
+    # labels and thresh are constant for every byte, keep only last iter
+    (labels, values, thresh) = gl.convergence_table(gl.bytedict['Converged?'][-1])
+    converged = values.T.tolist()
+    thresh = thresh[-1].tolist()
 
     # print!
     pretty = print_convergence_symbols(thresh, converged, 
@@ -230,11 +230,13 @@ def main():
     energykey = energytype_convert(gl, energytype)
 
     # ENERGIES:     if scan: last opt in each step;     if opt: last scan_pt
+    table = gl.energy_table
     if len(gl.bytedict['Converged?']) > 1:
-        energies = [e[-1] for e in gl.energies[energykey]]
+        last_opt = np.append(table['scan'][1:] != table['scan'][:-1], True)
+        energies = table[energykey][last_opt].tolist()
         oneopt = False
     else:
-        energies = gl.energies[energykey][-1]
+        energies = table[energykey][table['scan'] == table['scan'][-1]].tolist()
         x_axis = [i+1 for i in range(len(energies))]
         oneopt = True
 
@@ -59,11 +59,11 @@ def main():
     Gaussian Com file and creates a new Gaussian Com.
     """
     args = get_args()
-    gaulog = GaussianLog(args.log)
+    gaulog = GaussianLog(args.log, lazy=True)
     gaucom = GaussianCom(args.template_com)
-    atoms_log_coords = gaulog.read_geometry(args.opt_step, args.scan_step)
+    log_xyz = gaulog.frames[args.scan_step, args.opt_step].read()
     for no, atom in enumerate(gaucom.atoms_list):
-        atom.SetVector(atoms_log_coords[no].GetVector())
+        atom.SetVector(*log_xyz[no])
     gaucom.write_to_file(args.new_com)
 
 if __name__ == "__main__":
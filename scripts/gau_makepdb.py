@@ -41,6 +41,7 @@ def get_args():
                     action='store_true', default=False)
     parser.add_argument('--pdb', help='Name for output .pdb file')
     parser.add_argument('--pdbh', help='Name .pdb file with high layer only')
+    parser.add_argument('--xyz', help='Name for output .xyz file (.log only)')
     parser.add_argument('--align',
                     help='Request Pymol alignment', default=False,
                     action='store_true')
@@ -77,46 +78,48 @@ def get_args():
     return args
 
  
-def write_pdb(gaulog, scan_pts, opt_pts):
+FRAMES_PER_READ = 100 # frames decoded at once, bounds memory for -s all -o all
+
+def write_pdb(gaulog, scan_pts, opt_pts, pdbname, pdbhname=None,
+              xyzname=None):
+    """
+    Streams the chosen frames as MODEL/ENDMDL blocks to pdbname and, if
+    pdbhname, the high layer atoms only to pdbhname, and if xyzname, as
+    an .xyz trajectory to xyzname, all in the same pass.
+    """
 
     # get the bytes
-    chosen_bytes = []
-    if scan_pts == 'all':
-        for sbytes in gaulog.grep_bytes['orientation:']:
-            if opt_pts == 'all':
-                for byte in sbytes:
-                    chosen_bytes.append(byte) # this is crazy
-            else:
-                chosen_bytes.append(sbytes[opt_pts])
-    else:
-        sbytes = gaulog.grep_bytes['orientation:'][scan_pts]
-        if opt_pts == 'all':
-            for byte in sbytes:
-                chosen_bytes.append(byte) # this is reasonable 
-        else:
-            chosen_bytes.append(sbytes[opt_pts])
-
-    # produce txt output
-    txt = ''
-    txth = ''
-    model_number = 0
-    for byte in chosen_bytes:
-        model_number += 1
-        xyz = gaulog.read_coordinates('all', byte)
-        counter = 0 
-        txt += 'MODEL %d\n' % model_number
-        txth += 'MODEL %d\n' % model_number
-        for (coords, atom) in zip(xyz, gaulog.atoms_list):
-            counter += 1 # consistent with gaussian line number
-            atom.SetVector(coords[0],coords[1],coords[2])
-            atom.set_pdbinfo(atoms.PDBinfo('ATOM', counter))
-            txt += iolines.atom2pdb(atom)
-            if atom.oniom and args.highlayer:
-                if atom.oniom.layer == 'H':
-                    txth += iolines.atom2pdb(atom)
-        txt += 'ENDMDL\n'
-        txth += 'ENDMDL\n'
-    return txt, txth
+    scan = slice(None) if scan_pts == 'all' else scan_pts
+    opt = slice(None) if opt_pts == 'all' else opt_pts
+    chosen_bytes = gaulog.frames[scan, opt].bytes_list()
+
+    outputs = []
+    writers = []
+    o = open(pdbname, 'w')
+    outputs.append(o)
+    writers.append(iolines.TrajectoryWriter(o, gaulog.atoms_list))
+    if pdbhname:
+        highlayer = [i for (i, atom) in enumerate(gaulog.atoms_list)
+                     if atom.oniom and atom.oniom.layer == 'H']
+        o = open(pdbhname, 'w')
+        outputs.append(o)
+        writers.append(iolines.TrajectoryWriter(o, gaulog.atoms_list,
+                                                idx=highlayer))
+    if xyzname:
+        o = open(xyzname, 'w')
+        outputs.append(o)
+        writers.append(iolines.TrajectoryWriter(o, gaulog.atoms_list,
+            fmt='xyz', title=os.path.basename(gaulog.name)))
+    try:
+        for start in range(0, len(chosen_bytes), FRAMES_PER_READ):
+            frames = gaulog.read_coordinates_array(
+                chosen_bytes[start:start + FRAMES_PER_READ])
+            for xyz in frames:
+                for writer in writers:
+                    writer.write(xyz)
+    finally:
+        for o in outputs:
+            o.close()
 
 def main():
     
@@ -146,12 +149,12 @@ def main():
 
     # Gaussian .log
     gaulog = GAULOG(args.gau)
-    txt, txth = write_pdb(gaulog, args.scan_step, args.opt_step)
-    with open(args.pdb, 'w') as o:
-        o.write(txt)
     if args.highlayer:
-        with open(args.pdbh, 'w') as o:
-            o.write(txth)
+        write_pdb(gaulog, args.scan_step, args.opt_step, args.pdb, args.pdbh,
+                  args.xyz)
+    else:
+        write_pdb(gaulog, args.scan_step, args.opt_step, args.pdb,
+                  xyzname=args.xyz)
 
     # Alignment Pymol
     if 'all' not in [args.scan_step, args.opt_step] or not args.align:
@@ -141,22 +141,18 @@ def get_energy_by(gl, atomidx_list, energykey):
     metrics = []
 
     # ENERGIES:     if scan: last opt in each step;     if opt: last scan_pt
+    table = gl.energy_table
     if len(gl.bytedict['Converged?']) > 1:
-        energies = [e[-1] for e in gl.energies[energykey]]
-        for atomidx in atomidx_list:
-            metric = []
-            for byteS in gl.bytedict['orientation:']:
-                xyz = gl.read_coordinates(atomidx, byteS[-1])
-                metric.append(geom.anymetric(xyz))
-            metrics.append(metric)
+        last_opt = np.append(table['scan'][1:] != table['scan'][:-1], True)
+        energies = table[energykey][last_opt].tolist()
+        orientation_bytes = [byteS[-1] for byteS in gl.bytedict['orientation:']]
     else:
-        energies = gl.energies[energykey][-1]
-        for atomidx in atomidx_list:
-            metric = []
-            for byte in gl.bytedict['orientation:'][-1]:
-                xyz = gl.read_coordinates(atomidx, byte)
-                metric.append(geom.anymetric(xyz))
-            metrics.append(metric)
+        energies = table[energykey][table['scan'] == table['scan'][-1]].tolist()
+        orientation_bytes = gl.bytedict['orientation:'][-1]
+
+    for atomidx in atomidx_list:
+        xyz_frames = gl.read_coordinates_array(orientation_bytes, atomidx)
+        metrics.append([geom.anymetric(xyz) for xyz in xyz_frames.tolist()])
 
     return metrics, energies
 
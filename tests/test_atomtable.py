@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+# python modules
+import unittest
+import numpy as np
+
+
+# qt modules
+from omg import atomtable
+
+ZMAT_LINES = [
+    ' C-CT--0.2(PDBName=CA,ResName=ALA,ResNum=12_A)  0  1.0 1.1 1.2 L\n',
+    ' H-HC  -1  2.0 2.1 2.2 L H-HC-0.1 1 0.709\n',
+    ' O  0  3.0 3.1 3.2 H\n',
+    ' N(PDBName=N,ResName=ALA,ResNum=13)  4.0 4.1 4.2\n']
+
+
+class test_atomtable(unittest.TestCase):
+
+    def test_columns(self):
+        """z-matrix lines are read into columns"""
+        table = atomtable.AtomTable.from_zmat_lines(ZMAT_LINES)
+        self.assertEqual(len(table), 4)
+        self.assertTrue(np.allclose(table.xyz[:, 0], [1., 2., 3., 4.]))
+        self.assertEqual(list(table.element), ['C', 'H', 'O', 'N'])
+        self.assertEqual(list(table.atype), ['CT', 'HC', '', ''])
+        self.assertTrue(np.allclose(table.charge, [-0.2, 0., 0., 0.]))
+        self.assertEqual(list(table.layer), ['L', 'L', 'H', ''])
+        self.assertEqual(list(table.mask), [0, -1, 0, 0])
+        self.assertEqual(list(table.is_oniom), [True, True, True, False])
+        self.assertEqual(list(table.link_bound_to), [0, 1, 0, 0])
+        self.assertEqual(table.link_atype[1], 'HC')
+        self.assertAlmostEqual(table.link_scale1[1], 0.709)
+        self.assertEqual(list(table.resnum), [12, 0, 0, 13])
+        self.assertEqual(list(table.chain), ['A', '', '', ''])
+
+    def test_zmat_lines(self):
+        """lines are written as iolines.atom2zmat does"""
+        table = atomtable.AtomTable.from_zmat_lines(ZMAT_LINES)
+        lines = table.zmat_lines()
+        self.assertEqual(lines[0], '{0:60s}{1}'.format(
+            'C-CT--0.2000000(PDBName=CA,ResName=ALA,ResNum=12_A)',
+            '   0    1.000000    1.100000    1.200000 L\n'))
+        self.assertEqual(lines[1], 'H-HC-0.00000000  -1    2.000000    '
+                         '2.100000    2.200000 L H-HC-0.1 1 0.709\n')
+        self.assertEqual(lines[2], ' O   0    3.000000    3.100000    3.200000 H\n')
+        self.assertEqual(table.zmat_lines(print_resinfo=False)[3],
+                         ' N   4.000000    4.100000    4.200000\n')
+
+if __name__ == '__main__':
+    unittest.main()
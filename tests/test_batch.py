@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+# python modules
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+
+# qt modules
+from omg.gaussian import batch
+from omg.gaussian import gaussian
+from test_gaussianlog import job_text
+
+
+class test_batch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, text):
+        name = os.path.join(self.tmpdir, name)
+        with open(name, 'w') as f:
+            f.write(text)
+        return name
+
+    def test_natoms(self):
+        """atoms are counted without making atoms_list"""
+        name = self.write('opt.log', job_text(3))
+        gl = gaussian.GaussianLog(name, lazy=True)
+        summary = batch.LogSummary(gl)
+        self.assertEqual(summary.natoms, 3)
+        self.assertNotIn('atoms_list', gl.__dict__)
+        self.assertTrue(np.allclose(summary.final_xyz[1], [1.12, 0.0, 0.0]))
+
+        # error before the first geometry: atoms of the z-matrix
+        text = job_text(0).split('                          Input')[0]
+        name = self.write('early.log', text + ' Error termination via Lnk1e\n')
+        summary = batch.LogSummary(gaussian.GaussianLog(name, lazy=True))
+        self.assertEqual(summary.natoms, 3)
+        self.assertEqual(summary.final_xyz.shape, (0, 3))
+
+    def test_load_logs(self):
+        """summaries come in the order of the paths, None if not read"""
+        names = [self.write('%d.log' % n, job_text(n)) for n in (0, 2, 3)]
+        names.insert(1, os.path.join(self.tmpdir, 'missing.log'))
+        for workers in (1, 2):
+            summaries = batch.load_logs(names, workers=workers)
+            self.assertIsNone(summaries[1])
+            self.assertEqual([len(s.energy_table) for s in summaries
+                              if s is not None], [0, 2, 3])
+            self.assertEqual(summaries[3].termination.status, 'Normal')
+
+if __name__ == '__main__':
+    unittest.main()
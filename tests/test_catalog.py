@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+# python modules
+import os
+import shutil
+import tempfile
+import unittest
+
+
+# qt modules
+from omg import catalog
+from test_gaussianlog import job_text
+
+
+class test_catalog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.catalog = catalog.Catalog(os.path.join(self.tmpdir, 'jobs.sqlite'))
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, text):
+        name = os.path.join(self.tmpdir, name)
+        with open(name, 'w') as f:
+            f.write(text)
+        return name
+
+    def test_ingest_query(self):
+        """logs are read once, queried, and read again when they change"""
+        opt = self.write('opt.log', job_text(3))
+        text = job_text(3)
+        early = self.write('early.log', text[:text.index(' Symbolic')] +
+                           ' Error termination via Lnk1e in l101.exe\n')
+        junk = self.write('junk.log', 'not a gaussian log\n')
+        self.assertEqual(sorted(self.catalog.ingest_tree(self.tmpdir)),
+                         sorted([opt, early, junk]))
+        self.assertEqual(self.catalog.ingest_tree(self.tmpdir), [])
+
+        rows = self.catalog.query('status = ?', ('Normal',))
+        self.assertEqual([row['path'] for row in rows], [opt])
+        self.assertEqual(rows[0]['n_steps'], 3)
+        self.assertAlmostEqual(rows[0]['scf_energy'], -1.002)
+        self.assertEqual(rows[0]['natoms'], 3)
+        self.assertEqual(self.catalog.counts('status'),
+                         [(None, 1), ('Error', 1), ('Normal', 1)])
+        self.assertEqual([row['path'] for row in self.catalog.query(
+            'errorcode = ?', ('unreadable',))], [junk])
+
+        with open(opt, 'a') as f:
+            f.write(job_text(0))
+        self.assertEqual(self.catalog.ingest([opt, early, junk]), [opt])
+        os.remove(early)
+        self.assertEqual(self.catalog.prune(self.tmpdir), [early])
+
+    def test_missing_modred(self):
+        """ModRedundant jobs without the modred block are ingested"""
+        name = self.write('modred.log', job_text(3).replace(
+            '#p hf/3-21g opt', '#p hf/3-21g opt=modredundant'))
+        self.assertEqual(self.catalog.ingest([name]), [name])
+        rows = self.catalog.query('path = ?', (name,))
+        self.assertEqual(rows[0]['status'], 'Normal')
+        self.assertEqual(rows[0]['is_scan'], 0)
+        self.assertIsNone(rows[0]['errorcode'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+# python modules
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+
+# qt modules
+from omg.gaussian import gaussian
+
+COM_TEXT = '''%nprocshared=4
+%chk=test.chk
+#p oniom(hf/3-21g:amber) geom=connectivity nosymm
+
+50% of the title
+
+0 1 0 1 0 1
+C-CT--0.2(PDBName=CA,ResName=ALA,ResNum=12_A)  0  1.0 1.1 1.2 H
+H-HC-0.1(PDBName=HA,ResName=ALA,ResNum=12_A)  -1  2.0 2.1 2.2 L H-HC-0.1 1 0.709
+O-O--0.5(PDBName=O,ResName=ALA,ResNum=12_A)  0  3.0 3.1 3.2 L
+
+ 1 2 1.0 3 1.0
+ 2
+ 3
+
+'''
+SHIFT = np.array([0.5, -0.25, 1.0])
+
+
+class test_comtemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.name = os.path.join(self.tmpdir, 'test.com')
+        with open(self.name, 'w') as f:
+            f.write(COM_TEXT)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self, name):
+        with open(os.path.join(self.tmpdir, name)) as f:
+            return f.read()
+
+    def write_to_file(self, name):
+        """GaussianCom.write_to_file of the input with shifted atoms"""
+        gaussiancom = gaussian.GaussianCom(self.name)
+        for atom in gaussiancom.atoms_list:
+            (x, y, z) = np.array([atom.GetX(), atom.GetY(), atom.GetZ()]) + SHIFT
+            atom.SetVector(x, y, z)
+        gaussiancom.write_to_file(os.path.join(self.tmpdir, name))
+        return self.read(name)
+
+    def test_write(self):
+        """written inputs are those of write_to_file with new coordinates"""
+        expected = self.write_to_file('expected.com')
+        gaussiancom = gaussian.GaussianCom(self.name)
+        template = gaussian.ComTemplate(gaussiancom)   # from the atom table
+        self.assertEqual(len(template), 3)
+        template.write(os.path.join(self.tmpdir, 'a.com'), template.xyz + SHIFT)
+        self.assertEqual(self.read('a.com'), expected)
+
+        gaussiancom = gaussian.GaussianCom(self.name)
+        gaussiancom.atoms_list                          # from atoms.Atom
+        template = gaussian.ComTemplate(gaussiancom)
+        template.write(os.path.join(self.tmpdir, 'b.com'), template.xyz + SHIFT)
+        self.assertEqual(self.read('b.com'), expected)
+
+    def test_template_xyz(self):
+        """default coordinates are those of the input, shapes are checked"""
+        gaussiancom = gaussian.GaussianCom(self.name)
+        gaussiancom.write_to_file(os.path.join(self.tmpdir, 'expected.com'))
+        template = gaussian.ComTemplate(gaussiancom)
+        self.assertEqual(template.text(), self.read('expected.com'))
+        self.assertRaises(RuntimeError, template.text, np.zeros((2, 3)))
+
+if __name__ == '__main__':
+    unittest.main()
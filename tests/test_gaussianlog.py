@@ -0,0 +1,519 @@
+#!/usr/bin/env python
+
+# python modules
+import gzip
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+import numpy as np
+
+
+# qt modules
+from omg.gaussian import gaussian
+from omg.gaussian import logfile
+from omg.gaussian import logindex
+
+SEPARATOR = ' ' + '-' * 69 + '\n'
+XYZ = [(0.0, 0.0, 0.0), (1.1, 0.0, 0.0), (0.0, 1.2, 0.0)]
+ATOMIC_NUMBERS = [6, 1, 8]
+
+
+def orientation_text(xyz):
+    text = '                          Input orientation:' + ' ' * 28 + '\n'
+    text += SEPARATOR
+    text += ' Center     Atomic      Atomic             Coordinates (Angstroms)\n'
+    text += ' Number     Number       Type             X           Y           Z\n'
+    text += SEPARATOR
+    for (i, (x, y, z)) in enumerate(xyz):
+        text += ' %6d %10d %11d    %12.6f%12.6f%12.6f\n' % (
+            i + 1, ATOMIC_NUMBERS[i], 0, x, y, z)
+    return text + SEPARATOR
+
+
+def converged_text():
+    text = '         Item               Value     Threshold  Converged?\n'
+    for label in ['Maximum Force', 'RMS     Force', 'Maximum Displacement',
+                  'RMS     Displacement']:
+        text += ' %-20s%13.6f%13.6f     YES\n' % (label, 0.0001, 0.00045)
+    return text
+
+
+def oniom_text(energy):
+    """ONIOM block of the SCF energy of the real system with the low level"""
+    text = ' ONIOM: calculating energy.\n'
+    for (i, (method, system, value)) in enumerate([
+            ('low ', 'model', energy / 2), ('high', 'model', energy / 4),
+            ('low ', 'real ', energy)]):
+        text += ' ONIOM: gridpoint  %d method:  %s  system:  %s energy: %17.12f\n' % (
+            i + 1, method, system, value)
+    return text + ' ONIOM: extrapolated energy = %19.12f\n' % (
+        energy - energy / 4)
+
+
+def leave_link_text(link, seconds, cpu, elap):
+    date = time.strftime('%a %b %d %H:%M:%S %Y', time.gmtime(1577836800 + seconds))
+    return ' Leave Link %4d at %s, MaxMem=  100000000 cpu: %11.1f elap: %11.1f\n' % (
+        link, date, cpu, elap)
+
+
+def job_text(n_steps, energy=-1.0, oniom=False, scan_points=1, timings=False):
+    """
+    one job: a single point if n_steps is 0, an optimization otherwise,
+    of n_steps steps at each scan point. timings: Leave Link lines of
+    l1 (at 0 s), l502 (cpu 10 s, 60 s after the step before) and l103
+    (cpu 1 s, after the 'Converged?' lines), and the job times at the end
+    """
+    text = ' Entering Link 1 = /opt/g09/d_pgi133/g09/l1.exe PID=     12345.\n'
+    text += ' %nprocshared=4\n'
+    text += ' ' + '-' * 20 + '\n'
+    text += ' #p hf/3-21g%s\n' % (' opt' if n_steps else '')
+    text += ' ' + '-' * 20 + '\n'
+    text += ' Symbolic Z-matrix:\n Charge =  0 Multiplicity = 1\n'
+    text += ''.join([' %s  %10.6f %10.6f %10.6f\n' % ((symbol,) + xyz)
+                     for (symbol, xyz) in zip(['C', 'H', 'O'], XYZ)])
+    text += ' \n'
+    if timings:
+        text += leave_link_text(1, 0, 0.5, 0.1)
+    for scan in range(scan_points):
+        for step in range(max(n_steps, 1)):
+            xyz = [(x + 0.01 * step, y + 0.1 * scan, z) for (x, y, z) in XYZ]
+            text += orientation_text(xyz)
+            scf_energy = energy - 0.001 * step - 0.1 * scan
+            text += ' SCF Done:  E(RHF) =  %17.12f     A.U. after   10 cycles\n' % (
+                scf_energy)
+            if oniom:
+                text += oniom_text(scf_energy)
+            if timings:
+                text += leave_link_text(502, 60 * (scan * n_steps + step + 1),
+                                        10.0, 2.0)
+            if n_steps:
+                text += ' Step number %3d out of a maximum of  100\n' % (step + 1)
+                text += converged_text()
+                if timings:
+                    text += leave_link_text(103, 60 * (
+                        scan * n_steps + step + 1) + 30, 1.0, 0.5)
+        if n_steps:
+            text += '                           !   Optimized Parameters   !\n'
+    if timings:
+        text += ' Job cpu time:       0 days  0 hours  1 minutes 23.4 seconds.\n'
+        text += ' Elapsed time:       0 days  0 hours  0 minutes 12.0 seconds.\n'
+    text += ' Normal termination of Gaussian 09 at Mon Jan  1 00:00:00 2020.\n'
+    return text
+
+
+def irc_text(n_points=2, n_steps=2):
+    """
+    IRC job from the TS at XYZ: n_points on path 1 (forward, x shifted by
+    +0.1 * point), then on path 2 (reverse, -0.1 * point), each of n_steps
+    """
+    text = job_text(0).split('                          Input')[0]
+    text = text.replace('#p hf/3-21g', '#p hf/3-21g irc')
+    text += orientation_text(XYZ)
+    text += ' SCF Done:  E(RHF) =  %17.12f     A.U. after   10 cycles\n' % -1.0
+    text += (' Point Number:   0          Path Number:   1\n'
+             '  # OF POINTS ALONG THE PATH =   0\n')
+    for (path, sign) in ((1, 1), (2, -1)):
+        for point in range(1, n_points + 1):
+            for step in range(n_steps):
+                shift = sign * 0.1 * point + 0.001 * step
+                text += orientation_text([(x + shift, y, z)
+                                          for (x, y, z) in XYZ])
+                text += ' SCF Done:  E(RHF) =  %17.12f     A.U. after   10 cycles\n' % (
+                    -1.0 - 0.01 * path * point - 0.0001 * step)
+                text += ' Step number %3d out of a maximum of  20\n' % (step + 1)
+                text += converged_text()
+            text += (' Point Number:%4d          Path Number:   %d\n'
+                     '   CHANGE IN THE REACTION COORDINATE =    0.10000\n'
+                     '   NET REACTION COORDINATE UP TO THIS POINT =  %9.5f\n'
+                     '  # OF POINTS ALONG THE PATH =   %d\n') % (
+                         point, path, 0.1 * point, point)
+    return text + ' Normal termination of Gaussian 09 at Mon Jan  1 00:00:00 2020.\n'
+
+
+class test_gaussianlog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, text):
+        name = os.path.join(self.tmpdir, name)
+        with open(name, 'w') as f:
+            f.write(text)
+        return name
+
+    def test_link1_single_points(self):
+        """Link1 logs of single points open, eager and lazy"""
+        name = self.write('sp.log', job_text(0) + job_text(0, energy=-2.0))
+        for lazy in (False, True):
+            gl = gaussian.GaussianLog(name, lazy=lazy)
+            self.assertEqual(len(gl.jobs), 2)
+            self.assertEqual(len(gl.energy_table), 0)
+            self.assertTrue(np.allclose(gl.read_scf_energies(), [-1.0, -2.0]))
+            self.assertEqual(gl.termination.status, 'Normal')
+            self.assertTrue(np.allclose(
+                gl.jobs[1].read_scf_energies(), [-2.0]))
+
+    def test_refresh(self):
+        """a step written to a running job is indexed from the old size"""
+        text = job_text(3)
+        # sizes before the third step, and before 'Optimized Parameters'
+        old_size = text.rindex('                          Input', 0,
+                               text.index(' Step number   3'))
+        new_size = text.index('                           !   Optimized')
+        name = self.write('running.log', text[:old_size])
+        gl = gaussian.GaussianLog(name, lazy=True)
+        self.assertEqual(len(gl.energy_table), 2)
+        self.assertEqual(gl._indexed_bytes, old_size)
+
+        calls = []
+        events = []
+        callbacks = dict((key, lambda gl, byte, key=key:
+                          events.append((byte, key)))
+                         for key in ['Converged?', 'Step number', 'termination'])
+        index_file_parallel = logindex.index_file_parallel
+        def recorded(name, keywords, start=0, stop=None, workers=1):
+            calls.append((start, stop))
+            return index_file_parallel(name, keywords, start, stop, workers)
+        logindex.index_file_parallel = recorded
+        try:
+            with open(name, 'a') as f:
+                f.write(text[old_size:new_size])
+            new = gl.refresh(callbacks)
+            self.assertEqual(calls, [(old_size, new_size)])
+            self.assertEqual([key for (_, key) in events],
+                             ['Step number', 'Converged?'])
+            self.assertEqual(events, [event for event in new
+                                      if event[1] in callbacks])
+            self.assertEqual(gl.refresh(callbacks), [])
+            self.assertEqual(len(events), 2)
+        finally:
+            logindex.index_file_parallel = index_file_parallel
+        fresh = gaussian.GaussianLog(self.write('fresh.log', text[:new_size]),
+                                     lazy=True)
+        self.assertEqual(gl.bytedict, fresh.bytedict)
+        self.assertEqual(gl._bytelist, fresh._bytelist)
+        self.assertTrue(np.allclose(gl.energy_table['SCF_energy'],
+                                    [-1.0, -1.001, -1.002]))
+
+        with open(name, 'a') as f:
+            f.write(text[new_size:])
+        gl.refresh(callbacks)
+        self.assertEqual([key for (_, key) in events[2:]], ['termination'])
+        self.assertEqual(gl.termination.status, 'Normal')
+        fresh = gaussian.GaussianLog(self.write('done.log', text), lazy=True)
+        self.assertEqual(gl.bytedict, fresh.bytedict)
+
+    def test_link1_optimization(self):
+        """Link1 log of a single point then an optimization"""
+        name = self.write('opt.log', job_text(0) + job_text(3, energy=-2.0))
+        gl = gaussian.GaussianLog(name)
+        self.assertEqual([len(job.energy_table) for job in gl.jobs], [0, 3])
+        self.assertTrue(np.allclose(gl.jobs[1].energy_table['SCF_energy'],
+                                    [-2.0, -2.001, -2.002]))
+        self.assertTrue(np.allclose(gl.frames[0, -1].read()[0],
+                                    [0.02, 0.0, 0.0]))
+
+    def test_follow_terminated(self):
+        """follow() returns at once if the job had already terminated"""
+        name = self.write('done.log', job_text(2))
+        gl = gaussian.GaussianLog(name, lazy=True)
+        begin = time.time()
+        gl.follow(interval=1, timeout=30)
+        self.assertLess(time.time() - begin, 1)
+        self.assertEqual(len(gl.energy_table), 2)
+
+    def test_migrated_bytelist(self):
+        """legacy .bytelist: only the keywords added since are indexed"""
+        name = self.write('legacy.log', job_text(3))
+        fresh = gaussian.GaussianLog(name, lazy=True)
+        bytelist = fresh._bytelist if fresh.bytedict else None
+        signature = (fresh.routesection_md5sum, fresh.zmat_md5sum,
+                     fresh._last_xyz_md5sum(fresh._byteindex),
+                     os.path.getsize(name))
+        os.remove(logindex.index_filename(name))
+        legacy = logindex.index_file(name, logindex.LEGACY_KEYWORDS)
+        with open(name + '.bytelist', 'wb') as f:
+            pickle.dump(legacy + [signature], f, protocol=2)
+
+        misses = gaussian.INDEX_CHECKS['miss']
+        gl = gaussian.GaussianLog(name, lazy=True)
+        self.assertEqual(gl._bytelist if gl.bytedict else None, bytelist)
+        self.assertEqual(gaussian.INDEX_CHECKS['miss'], misses)
+        self.assertFalse(os.path.exists(name + '.bytelist'))
+        self.assertTrue(os.path.exists(name + '.bytelist.bak'))
+        self.assertEqual(logindex.load_index(name)[1], gl.grep_keywords)
+
+    def test_index_checks(self):
+        """each INDEX_CHECKS path, and the stat one without log_size()"""
+        text = job_text(3)
+        name = self.write('opt.log', text)
+        bytedict = gaussian.GaussianLog(name).bytedict
+        log_size = logfile.log_size
+        sizes = []
+        def counted(filename):
+            sizes.append(filename)
+            return log_size(filename)
+        def check(expected):
+            logfile.log_size = counted
+            try:
+                gl = gaussian.GaussianLog(name, lazy=True)
+                self.assertEqual(gl.bytedict, bytedict)
+            finally:
+                logfile.log_size = log_size
+            self.assertEqual(gl._index_check, expected)
+        check('stat')
+        self.assertEqual(sizes, [])
+        stat = os.stat(name)
+        os.utime(name, (stat.st_atime, stat.st_mtime + 10)) # touched
+        check('fingerprint')
+        self.assertEqual(len(sizes), 1)
+        check('stat') # the new mtime was saved
+        self.write('opt.log', text.replace('PID=     12345', 'PID=     54321'))
+        check('deep')
+        self.write('opt.log', text.replace('hf/3-21g', 'hf/6-31g'))
+        check('miss')
+
+    def test_index_keywords(self):
+        """indexes made with keywords that are no longer used are redone"""
+        name = self.write('opt.log', job_text(3))
+        gl = gaussian.GaussianLog(name, lazy=True)
+        bytelist = gl._bytelist if gl.bytedict else None
+        (offsets, keywords, signature, _) = logindex.load_index(name)
+        logindex.save_index(name, bytelist + [(0, 'unused keyword')],
+                            keywords + ['unused keyword'], signature)
+        misses = gaussian.INDEX_CHECKS['miss']
+        gl = gaussian.GaussianLog(name, lazy=True)
+        self.assertEqual(gl._bytelist if gl.bytedict else None, bytelist)
+        self.assertEqual(gaussian.INDEX_CHECKS['miss'], misses + 1)
+        self.assertEqual(logindex.load_index(name)[1], gl.grep_keywords)
+
+    def test_compressed_index(self):
+        """a .log.gz with an up to date index opens without decompressing"""
+        text = job_text(3)
+        name = os.path.join(self.tmpdir, 'opt.log.gz')
+        with gzip.open(name, 'wt') as f:
+            f.write(text)
+        bytedict = gaussian.GaussianLog(name).bytedict
+        logfile._open_buffers.clear()
+        decompress = logfile.CompressedBuffer._decompress
+        calls = []
+        def counted(buf, max_length):
+            calls.append(max_length)
+            return decompress(buf, max_length)
+        logfile.CompressedBuffer._decompress = counted
+        try:
+            gl = gaussian.GaussianLog(name, lazy=True)
+            self.assertEqual(gl.bytedict, bytedict)
+            self.assertEqual(gl._index_check, 'stat')
+            self.assertEqual(gl.termination.status, 'Normal')
+            self.assertEqual(logfile.log_size(name), len(text))
+        finally:
+            logfile.CompressedBuffer._decompress = decompress
+            logfile._open_buffers.clear()
+        self.assertEqual(calls, [])
+
+    def test_eager_attributes(self):
+        """lazy=False reads what it always read, and nothing else"""
+        name = self.write('opt.log', job_text(3))
+        gl = gaussian.GaussianLog(name)
+        for attribute in gaussian.GaussianLog._LAZY_ATTRIBUTES:
+            if attribute not in ('header', 'energy_table'): # needed by those
+                self.assertEqual(attribute in gl.__dict__, attribute in
+                                 gaussian.GaussianLog._EAGER_ATTRIBUTES)
+
+    def test_lazy_equals_eager(self):
+        """lazy=True reads the same values as lazy=False"""
+        name = self.write('opt.log', job_text(0) + job_text(3, energy=-2.0))
+        eager = gaussian.GaussianLog(name)
+        lazy = gaussian.GaussianLog(name, lazy=True)
+        self.assertEqual(lazy.route_section, eager.route_section)
+        self.assertEqual(lazy.zmat_md5sum, eager.zmat_md5sum)
+        self.assertEqual(lazy.bytedict, eager.bytedict)
+        self.assertEqual(lazy.energies, eager.energies)
+        self.assertEqual(len(lazy.atoms_list), len(eager.atoms_list))
+        self.assertEqual(lazy.termination.status, eager.termination.status)
+        self.assertEqual(lazy.gaussian_version, eager.gaussian_version)
+        self.assertTrue(np.allclose(
+            [atom.GetVector().GetX() for atom in lazy.final_geometry],
+            [atom.GetVector().GetX() for atom in eager.final_geometry]))
+
+    def test_energy_table(self):
+        """one row per scan point and opt step, nan if there is no ONIOM"""
+        name = self.write('scan.log', job_text(3, oniom=True, scan_points=2))
+        table = gaussian.GaussianLog(name, lazy=True).energy_table
+        self.assertEqual(table.dtype, gaussian.ENERGY_TABLE_DTYPE)
+        self.assertEqual(table['scan'].tolist(), [0, 0, 0, 1, 1, 1])
+        self.assertEqual(table['opt'].tolist(), [0, 1, 2, 0, 1, 2])
+        scf = [-1.0, -1.001, -1.002, -1.1, -1.101, -1.102]
+        self.assertTrue(np.allclose(table['SCF_energy'], scf))
+        self.assertTrue(np.allclose(table['ONIOM_extrapol'],
+                                    np.array(scf) * 0.75))
+        self.assertTrue(np.allclose(table['ONIOM_model_high'],
+                                    np.array(scf) / 4))
+        self.assertTrue(np.allclose(table['ONIOM_lowlayer_low'],
+                                    np.array(scf) / 2))
+
+        name = self.write('opt.log', job_text(2))
+        gl = gaussian.GaussianLog(name, lazy=True)
+        self.assertTrue(np.isnan(gl.energy_table['ONIOM_extrapol']).all())
+        self.assertEqual(gl.energies['ONIOM_extrapol'], [[]])
+        self.assertTrue(np.allclose(gl.energies['SCF_energy'], [[-1.0, -1.001]]))
+
+    def test_frames(self):
+        """frames slices as the read_trajectory array does"""
+        name = self.write('scan.log', job_text(3, scan_points=2))
+        gl = gaussian.GaussianLog(name, lazy=True)
+        trajectory = gl.read_trajectory()
+        frames = gl.frames
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(frames.n_frames, 6)
+        self.assertEqual(frames.bytes_list(), [byte for opt in
+                         gl.bytedict['orientation:'] for byte in opt])
+        self.assertTrue(np.allclose(np.asarray(frames), trajectory))
+        self.assertTrue(np.allclose(frames[1, 2].read(), trajectory[1, 2]))
+        self.assertTrue(np.allclose(frames[:, -1].read(), trajectory[:, -1]))
+        self.assertTrue(np.allclose(frames[1].read(), trajectory[1]))
+        self.assertTrue(np.allclose(frames[1, :].read(), trajectory[1, :]))
+        self.assertTrue(np.allclose(frames[:, 1:].read(), trajectory[:, 1:]))
+        self.assertTrue(np.allclose(frames[1][::2].read(), trajectory[1][::2]))
+        self.assertEqual(len(frames[:, -1]), 2)
+        self.assertEqual(len(frames[0]), 3)
+        self.assertEqual(frames[:, 1:].n_frames, 4)
+        self.assertRaises(IndexError, frames[0, 0].__getitem__, 0)
+        self.assertRaises(TypeError, len, frames[0, 0])
+
+    def test_read_irc(self):
+        """reverse path, TS and forward path, in the order of the path"""
+        name = self.write('irc.log', irc_text())
+        gl = gaussian.GaussianLog(name, lazy=True)
+        (table, xyz) = gl.read_irc()
+        self.assertEqual(table['path'].tolist(), [2, 2, 0, 1, 1])
+        self.assertEqual(table['point'].tolist(), [2, 1, 0, 1, 2])
+        self.assertEqual((table['path'] == 0).sum(), 1)
+        self.assertTrue(np.allclose(table['coordinate'],
+                                    [-0.2, -0.1, 0.0, 0.1, 0.2]))
+        self.assertTrue(np.allclose(table['energy'], [
+            -1.0401, -1.0201, -1.0, -1.0101, -1.0201]))
+        self.assertEqual(table['opt'][2], -1)
+        self.assertEqual(xyz.shape, (5, 3, 3))
+        self.assertTrue(np.allclose(xyz[:, 1, 0] - 1.1,
+                                    [-0.199, -0.099, 0.0, 0.101, 0.201]))
+        (_, subset) = gl.read_irc(atom_nr=[2])
+        self.assertEqual(subset.shape, (5, 1, 3))
+        self.assertTrue(np.allclose(subset[:, 0], xyz[:, 2]))
+
+    def test_timings(self):
+        """links are summed per step, job times are read per job"""
+        name = self.write('opt.log', job_text(0, timings=True) +
+                          job_text(3, timings=True))
+        gl = gaussian.GaussianLog(name, lazy=True)
+        timings = gl.jobs[1].timings
+        self.assertEqual(timings['opt'].tolist(), [0, 1, 2])
+        self.assertTrue(np.allclose(timings['cpu'], [10.5, 11.0, 11.0]))
+        self.assertTrue(np.allclose(timings['elapsed'], [2.1, 2.5, 2.5]))
+        self.assertTrue(np.allclose(timings['wall'], [60.0, 60.0, 60.0]))
+        self.assertEqual(timings['scf_cycles'].tolist(), [10, 10, 10])
+        self.assertAlmostEqual(gl.jobs[1].steps_per_hour(), 60.0)
+        (cpu, elapsed) = gl.read_job_times()
+        self.assertTrue(np.allclose(cpu, [83.4, 83.4]))
+        self.assertTrue(np.allclose(elapsed, [12.0, 12.0]))
+        self.assertEqual([len(times) for times in
+                          gl.jobs[0].read_job_times()], [1, 1])
+
+        # cut off before the end of the second job
+        text = job_text(3, timings=True)
+        name = self.write('cut.log', text[:text.index(' Elapsed time')])
+        gl = gaussian.GaussianLog(name, lazy=True)
+        (cpu, elapsed) = gl.read_job_times()
+        self.assertTrue(np.allclose(cpu, [83.4]))
+        self.assertEqual(len(elapsed), 0)
+        self.assertTrue(np.allclose(gl.timings['cpu'], [10.5, 11.0, 11.0]))
+        self.assertIsNone(gl.termination.status)
+
+    def test_microiterations(self):
+        """blocks before the one kept as a step, and after the last step"""
+        def shifted(dx):
+            return orientation_text([(x + dx[i], y, z)
+                                     for (i, (x, y, z)) in enumerate(XYZ)])
+        text = job_text(2).split('                          Input')[0]
+        for step in range(2):
+            text += shifted([step + 0.1, 0, 0]) + shifted([step + 0.2, 0, 0])
+            text += orientation_text(XYZ).replace('  Input', 'Standard')
+            text += shifted([step, 0, 0])
+            text += ' SCF Done:  E(RHF) =  %17.12f     A.U. after   10 cycles\n' % -1.0
+            text += ' Step number %3d out of a maximum of  100\n' % (step + 1)
+            text += converged_text()
+        text += shifted([5.0, 5.0, 5.0]) + shifted([5.1, 5.5, 5.3])
+        text += ' Maximum number of microiterations cycles exceeded.\n'
+        name = self.write('micro.log', text)
+        gl = gaussian.GaussianLog(name, lazy=True)
+        self.assertEqual([len(step) for step in gl.micro_bytes], [2, 2, 2])
+        self.assertEqual(len(gl.frames[0]), 2)
+        xyz = gl.read_last_microiterations(3)
+        self.assertTrue(np.allclose(xyz[:, 0, 0], [1.2, 5.0, 5.1]))
+        (idx, displacements) = gl.rank_microiteration_displacements()
+        self.assertEqual(idx.tolist(), [2, 0])
+        self.assertTrue(np.allclose(displacements, [0.3, 0.1]))
+        (idx, _) = gl.rank_microiteration_displacements(
+            skip_hydrogens=False, xyz=xyz[1:])
+        self.assertEqual(idx.tolist(), [1, 2, 0])
+
+        gl = gaussian.GaussianLog(self.write('opt.log', job_text(2)), lazy=True)
+        self.assertEqual(gl.micro_bytes, [[], [], []])
+        self.assertEqual(len(gl.read_last_microiterations(2)), 0)
+        self.assertRaises(RuntimeError, gl.rank_microiteration_displacements)
+
+    def test_workers(self):
+        """logs are indexed in-process unless workers are asked for"""
+        min_size = logindex.PARALLEL_MIN_SIZE
+        pool = logindex.multiprocessing.Pool
+        logindex.PARALLEL_MIN_SIZE = 0
+        try:
+            serial = gaussian.GaussianLog(self.write('a.log', job_text(5)),
+                                          lazy=True)
+            parallel = gaussian.GaussianLog(self.write('b.log', job_text(5)),
+                                            lazy=True, workers=3)
+            self.assertEqual(parallel.bytedict, serial.bytedict)
+            self.assertEqual(len(parallel.bytedict['orientation:'][0]), 5)
+
+            def no_pool(*args):
+                raise AssertionError('Pool started')
+            logindex.multiprocessing.Pool = no_pool
+            gaussian.GaussianLog(self.write('c.log', job_text(5)),
+                                 lazy=True).bytedict
+        finally:
+            logindex.PARALLEL_MIN_SIZE = min_size
+            logindex.multiprocessing.Pool = pool
+
+    def test_charges(self):
+        """ESP fit tables titled 'ESP charges:' (g16) are counted once"""
+        def table(title, charges):
+            return title + '               1\n' + ''.join(
+                '%6d  %s%12.6f\n' % (i + 1, element, charge) for (i, (element,
+                charge)) in enumerate(zip(['C', 'H', 'O'], charges)))
+        fit = (' Charges from ESP fit, RMS=   0.00206 RRMS=   0.17284:\n'
+               ' Charge=   0.00000 Dipole=     0.1     0.2     0.3 Tot=     0.4\n')
+        blocks = (table(' Mulliken charges:\n', [-0.3, 0.1, 0.2]) +
+                  ' Sum of Mulliken charges =   0.00000\n' +
+                  table(fit, [-0.4, 0.2, 0.2]) +                   # g09
+                  table(' Mulliken charges:\n', [-0.5, 0.2, 0.3]) +
+                  table(fit + ' ESP charges:\n', [-0.6, 0.3, 0.3]))  # g16
+        text = job_text(2).replace(' Normal termination',
+                                   blocks + ' Normal termination')
+        gl = gaussian.GaussianLog(self.write('charges.log', text), lazy=True)
+        self.assertEqual([len(gl.charge_bytes[kind]) for kind in
+                          ('Mulliken', 'ESP', 'APT')], [2, 2, 0])
+        self.assertTrue(np.allclose(gl.read_charges('ESP'),
+                                    [[-0.4, 0.2, 0.2], [-0.6, 0.3, 0.3]]))
+        self.assertTrue(np.allclose(gl.read_charges('Mulliken', last=True),
+                                    [[-0.5, 0.2, 0.3]]))
+        self.assertEqual(gl.read_charges('APT').shape, (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+# python modules
+import io
+import unittest
+import numpy as np
+
+
+# qt modules
+from omg import atoms
+from omg import iolines
+
+ZMAT_LINES = [
+    ' C-CT--0.2(PDBName=CA,ResName=ALA,ResNum=12_A)  0  1.0 1.1 1.2 L\n',
+    ' H-HC  -1  2.0 2.1 2.2 L H-HC-0.1 1 0.709\n',
+    ' O-O--0.5(PDBName=O,ResName=ALA,ResNum=10012_B)  0  3.0 3.1 3.2 H\n',
+    ' N(PDBName=N,ResName=GLY,ResNum=13)  4.0 4.1 4.2\n']
+
+
+def old_atom2pdb(atom):
+    """iolines.atom2pdb before it used pdb_template"""
+    if not atom.resinfo:
+        return (
+        '{1.keyword:<6s}          {1.altloc:1s}'
+        '         {1.icode:1s}'
+        '   {2:8.3f}{3:8.3f}{4:8.3f}'
+        '{1.occupancy:6.2f}{1.bfact:6.2f}'
+        '          {5:>2s}{1.formalcharge:2s}\n'
+        .format(atom, atom.pdbinfo, atom.x(), atom.y(), atom.z(),
+                atom.GetType()))
+    return (
+        '{2.keyword:<6s}{2.serial:>5d} {1.name:4s}{2.altloc:1s}'
+        '{1.resname:3s} {1.chain:1s}{3:4d}{2.icode:1s}'
+        '   {4:8.3f}{5:8.3f}{6:8.3f}'
+        '{2.occupancy:6.2f}{2.bfact:6.2f}'
+        '          {7:>2s}{2.formalcharge:2s}\n'
+        .format(atom, atom.resinfo, atom.pdbinfo, atom.resinfo.resnum%10000,
+            atom.GetX(), atom.GetY(), atom.GetZ(), atom.GetType()))
+
+
+class test_iolines(unittest.TestCase):
+
+    def setUp(self):
+        self.atoms_list = [iolines.zmat2atom(line) for line in ZMAT_LINES]
+        rnd = np.random.RandomState(0)
+        self.frames = rnd.uniform(-1000, 1000, (3, len(ZMAT_LINES), 3))
+
+    def old_models(self, idx):
+        """MODEL blocks of gau_makepdb before TrajectoryWriter"""
+        text = ''
+        for (model, xyz) in enumerate(self.frames):
+            text += 'MODEL %d\n' % (model + 1)
+            for i in idx:
+                atom = self.atoms_list[i]
+                atom.SetVector(*xyz[i])
+                atom.set_pdbinfo(atoms.PDBinfo('ATOM', i + 1))
+                text += old_atom2pdb(atom)
+            text += 'ENDMDL\n'
+        return text
+
+    def written(self, **kwargs):
+        f = io.StringIO()
+        writer = iolines.TrajectoryWriter(f, self.atoms_list, **kwargs)
+        for xyz in self.frames:
+            writer.write(xyz)
+        self.assertEqual(writer.nframes, len(self.frames))
+        return f.getvalue()
+
+    def test_atom2pdb(self):
+        """lines are those of the old atom2pdb, with and without resinfo"""
+        for (i, atom) in enumerate(self.atoms_list):
+            atom.SetVector(-12.3456, 0.0004, 9999.9994)
+            atom.set_pdbinfo(atoms.PDBinfo('ATOM', i + 1))
+            self.assertEqual(iolines.atom2pdb(atom), old_atom2pdb(atom))
+            self.assertEqual(iolines.atom2pdb_template(atom, i + 1) %
+                (-12.3456, 0.0004, 9999.9994), old_atom2pdb(atom))
+
+    def test_pdb_template(self):
+        """'%' of the fields is not taken as a format"""
+        for atom in self.atoms_list[:2]:
+            atom.set_pdbinfo(atoms.PDBinfo('ATOM', 1, formalcharge='%d'))
+            self.assertEqual(iolines.atom2pdb(atom), old_atom2pdb(atom))
+
+    def test_pdb(self):
+        """frames are the MODEL blocks of the old gau_makepdb"""
+        self.assertEqual(self.written(), self.old_models(range(4)))
+        # i.e. high layer: serials are those of all atoms
+        self.assertEqual(self.written(idx=[2, 3]), self.old_models([2, 3]))
+
+    def test_xyz(self):
+        """xyz frames: number of atoms, title and element x y z"""
+        lines = self.written(fmt='xyz', idx=[0, 2], title='100% opt').split('\n')
+        self.assertEqual(len(lines), 3 * 4 + 1)
+        self.assertEqual(lines[:2], ['2', '100% opt'])
+        self.assertEqual(lines[3], 'O  %12.6f %12.6f %12.6f' %
+                         tuple(self.frames[0][2]))
+        self.assertEqual(lines[10], 'C  %12.6f %12.6f %12.6f' %
+                         tuple(self.frames[2][0]))
+        self.assertRaises(RuntimeError, iolines.TrajectoryWriter,
+                          io.StringIO(), self.atoms_list, fmt='mol2')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+# python modules
+import unittest
+import numpy as np
+
+
+# qt modules
+from omg.gaussian import logblocks
+
+SEP = b' ' + b'-' * 69 + b'\n'
+
+def orientation_text(xyz, title=b'Input orientation:'):
+    txt = b' ' * 26 + title + b' ' * 26 + b'\n' + SEP
+    txt += b' Center     Atomic      Atomic             Coordinates (Angstroms)\n'
+    txt += b' Number     Number       Type             X           Y           Z\n'
+    txt += SEP
+    for i, (x, y, z) in enumerate(xyz):
+        txt += b' %6d %10d %11d    %12.6f%12.6f%12.6f\n' % (i+1, 6, 0, x, y, z)
+    return txt + SEP
+
+def converged_text(rows):
+    txt = b'         Item               Value     Threshold  Converged?\n'
+    for (label, value, threshold) in rows:
+        txt += b' %-20s%13s%13.6f     YES\n' % (label, value, threshold)
+    return txt + b' Predicted change in Energy=-1.234567D-08\n'
+
+def forces_text(forces):
+    txt = b' ' + b'-' * 67 + b'\n'
+    txt += b' Center     Atomic                   Forces (Hartrees/Bohr)\n'
+    txt += b' Number     Number              X              Y              Z\n'
+    txt += b' ' + b'-' * 67 + b'\n'
+    for i, (x, y, z) in enumerate(forces):
+        txt += b' %6d %8d      %15.9f%15.9f%15.9f\n' % (i+1, 6, x, y, z)
+    return txt + b' ' + b'-' * 67 + b'\n'
+
+def freq_text(freqs, modes):
+    txt = b' Harmonic frequencies (cm**-1), IR intensities (KM/Mole), Raman scattering\n'
+    txt += b' and normal coordinates:\n'
+    for g in range(0, len(freqs), 3):
+        group = range(g, min(g + 3, len(freqs)))
+        txt += b''.join([b'%23d' % (i + 1) for i in group]) + b'\n'
+        txt += b''.join([b'%23s' % b'A' for i in group]) + b'\n'
+        txt += b' Frequencies --' + b''.join([b'%12.4f           ' % freqs[i]
+                                             for i in group]).rstrip() + b'\n'
+        txt += b'  Atom  AN' + b'      X      Y      Z  ' * len(group) + b'\n'
+        for a in range(len(modes[0])):
+            txt += b'%6d%4d' % (a + 1, 6) + b''.join(
+                [b'  %7.2f%7.2f%7.2f' % tuple(modes[i][a]) for i in group]) + b'\n'
+    return txt + b'\n - Thermochemistry -\n'
+
+class test_logblocks(unittest.TestCase):
+
+    xyz = [(1.0, -2.5, 3.25), (-10.123456, 0.0, 99.999999), (0.5, 0.5, -0.5)]
+
+    def test_read_orientation(self):
+        """Coordinates are decoded from the fixed width columns"""
+        buf = b' junk line\n' + orientation_text(self.xyz)
+        xyz = logblocks.read_orientation(buf, 11)
+        self.assertEqual(xyz.tolist(), [list(c) for c in self.xyz])
+
+    def test_read_orientation_subset(self):
+        """Only the requested atoms are decoded, in the requested order"""
+        buf = orientation_text(self.xyz)
+        xyz = logblocks.read_orientation(buf, 0, [2, 0])
+        self.assertEqual(xyz.tolist(), [list(self.xyz[2]), list(self.xyz[0])])
+
+    def test_byte_inside_title_line(self):
+        """Bytes pointing inside the title line find the same block"""
+        buf = b' junk line\n' + orientation_text(self.xyz)
+        self.assertEqual(logblocks.read_orientation(buf, 11).tolist(),
+                         logblocks.read_orientation(buf, 40).tolist())
+
+    def test_incomplete_block(self):
+        """A block still being written raises RuntimeError"""
+        buf = orientation_text(self.xyz)[:-150]
+        self.assertRaises(RuntimeError, logblocks.read_orientation, buf, 0)
+
+    def test_read_forces(self):
+        """Forces are decoded from the block of the 'Forces' line"""
+        forces = [(0.000123456, -0.012345678, 0.0), (-1.5, 0.25, 0.000000001)]
+        buf = forces_text(forces)
+        byte = buf.index(b'Forces (Hartrees/Bohr)')
+        self.assertEqual(logblocks.read_forces(buf, byte).tolist(),
+                         [list(f) for f in forces])
+        self.assertEqual(logblocks.read_forces(buf, byte, [1]).tolist(),
+                         [list(forces[1])])
+
+    def test_read_normal_modes(self):
+        """Groups of 3 modes are joined, lines not printed are nan"""
+        freqs = [-123.4567, 10.0, 20.5, 3000.125]
+        modes = [[(0.01 * i, -0.5, 0.0), (0.25, 0.0, -0.01 * i)]
+                 for i in range(4)]
+        buf = freq_text(freqs, modes)
+        normal_modes = logblocks.read_normal_modes(buf, 5)
+        self.assertEqual(normal_modes['frequencies'].tolist(), freqs)
+        self.assertEqual(normal_modes['modes'].tolist(),
+                         [[list(xyz) for xyz in mode] for mode in modes])
+        self.assertTrue(np.isnan(normal_modes['reduced_masses']).all())
+        first = logblocks.read_normal_modes(buf, 5, n_modes=1)
+        self.assertEqual(first['modes'].shape, (1, 2, 3))
+        self.assertEqual(first['frequencies'].tolist(), freqs)
+
+    def test_mode_fields(self):
+        """Mode fields are read as float() reads them, at the limits of F7.2"""
+        values = [-0.0, -10.5, 100.0, -99.99, 0.0, 0.01]
+        modes = [[values[0:3], values[3:6]], [values[3:6], values[0:3]]]
+        buf = freq_text([1.0, 2.0], modes)
+        self.assertIn(b'  -0.00 -10.50 100.00', buf)
+        decoded = logblocks.read_normal_modes(buf, 5)['modes']
+        self.assertEqual(decoded.tolist(), modes)
+        self.assertEqual(np.signbit(decoded).tolist(),
+                         np.signbit(modes).tolist())
+
+    def test_irregular_orientation(self):
+        """Rows of different lengths (>99999 atoms) are split into words"""
+        buf = orientation_text(self.xyz)
+        layout = logblocks.detect_orientation_layout(buf, 0)
+        wide = buf.replace(b'      2          6', b'     2          6')
+        self.assertEqual(logblocks.detect_orientation_layout(wide, 0), None)
+        for data in (buf, wide):
+            xyz = logblocks.read_orientation(data, 0, None, layout)
+            self.assertEqual(xyz.tolist(), [list(c) for c in self.xyz])
+
+    def test_read_converged_blocks(self):
+        """MM rows become extra columns, nan for steps without them"""
+        qm = [(b'Maximum Force', b'0.000281', 0.00045),
+              (b'RMS     Force', b'********', 0.0003)]
+        mm = [(b'Maximum MM Force', b'0.000010', 0.00045)]
+        buf = converged_text(qm + mm) + converged_text(qm)
+        second = buf.index(b' Item', 10)
+        labels, values, thresholds = logblocks.read_converged_blocks(
+            buf, [0, second])
+        self.assertEqual(labels, ['Max F', 'rms F', 'MaxMM'])
+        self.assertEqual(values[0].tolist(), [0.000281, float('inf'), 0.00001])
+        self.assertEqual(thresholds[1, :2].tolist(), [0.00045, 0.0003])
+        self.assertTrue(np.isnan(values[1, 2]))
+
+    def test_irregular_converged_block(self):
+        """Blocks with longer rows are split into words"""
+        qm = [(b'Maximum Force', b'0.000281', 0.00045),
+              (b'RMS     Force', b'0.000100', 0.0003)]
+        buf = converged_text(qm).replace(b'0.000281', b' 0.000281')
+        labels, values, thresholds = logblocks.read_converged_blocks(buf, [0])
+        self.assertEqual(labels, ['Max F', 'rms F'])
+        self.assertEqual(values[0].tolist(), [0.000281, 0.0001])
+
+    def test_read_charges(self):
+        """Mulliken and ESP fit tables, the latter with a Charge= line"""
+        rows = b'     1  C   -0.373212\n     2  H    0.124432\n'
+        mulliken = b' Mulliken charges:\n               1\n' + rows + \
+            b' Sum of Mulliken charges =  -0.24878\n'
+        esp = b' Charges from ESP fit, RMS=   0.00206 RRMS=   0.17284:\n' + \
+            b' Charge=   0.00000 Dipole=     0.1     0.2     0.3 Tot=     0.4\n' + \
+            b'               1\n' + rows
+        for buf in (mulliken, esp):
+            self.assertEqual(logblocks.read_charges(buf, 0).tolist(),
+                             [-0.373212, 0.124432])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+# python modules
+import gzip
+import lzma
+import os
+import random
+import tempfile
+import unittest
+
+
+# qt modules
+from omg.gaussian import logfile
+
+
+class test_logfile(unittest.TestCase):
+
+    def setUp(self):
+        self.window_size = logfile.WINDOW_SIZE
+        logfile.WINDOW_SIZE = 97 # many windows and borders
+        rnd = random.Random(1)
+        self.data = bytes(bytearray(rnd.choice(b'ab\n') for _ in range(5000)))
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        logfile.WINDOW_SIZE = self.window_size
+        logfile._open_buffers.clear()
+        for name in os.listdir(self.tmpdir):
+            os.remove(os.path.join(self.tmpdir, name))
+        os.rmdir(self.tmpdir)
+
+    def write(self, name, compress):
+        """two members/streams, as made by cat a.gz b.gz"""
+        name = os.path.join(self.tmpdir, name)
+        with open(name, 'wb') as f:
+            f.write(compress(self.data[:2000]) + compress(self.data[2000:]))
+        return name
+
+    def check_buffer(self, name, buf=None):
+        buf = buf or logfile.open_buffer(name)
+        data = self.data
+        self.assertEqual(len(buf), len(data))
+        rnd = random.Random(2)
+        for _ in range(500):
+            sub = bytes(bytearray(rnd.choice(b'ab\n') for _ in range(rnd.randint(1, 5))))
+            start = rnd.randint(0, 5100)
+            stop = rnd.choice([None, rnd.randint(0, 5100)])
+            self.assertEqual(buf.find(sub, start, stop), data.find(sub, start, stop))
+            self.assertEqual(buf.rfind(sub, start, stop), data.rfind(sub, start, stop))
+            self.assertEqual(buf[start:stop], data[start:stop])
+
+    def test_gzip(self):
+        """find, rfind and slices of a .gz match the uncompressed bytes"""
+        self.check_buffer(self.write('a.log.gz', gzip.compress))
+
+    def test_xz(self):
+        """find, rfind and slices of a .xz match the uncompressed bytes"""
+        self.check_buffer(self.write('a.log.xz', lzma.compress))
+
+    def test_open_log(self):
+        """text and end-relative reads, as GaussianLog does them"""
+        name = self.write('a.log.gz', gzip.compress)
+        with logfile.open_log(name, 'rb') as f:
+            f.seek(-800, 2)
+            self.assertEqual(f.read(), self.data[-800:])
+        with logfile.open_log(name) as f:
+            f.seek(1000)
+            self.assertEqual(f.readline(),
+                self.data[1000:self.data.index(b'\n', 1000) + 1].decode())
+
+    def test_open_first_window(self):
+        """opening a compressed log only decompresses its first window"""
+        buf = logfile.open_buffer(self.write('a.log.gz', gzip.compress))
+        self.assertEqual(list(buf.windows), [0])
+        self.assertIsNone(buf.size)
+        name = os.path.join(self.tmpdir, 'empty.log.gz')
+        with open(name, 'wb') as f:
+            f.write(gzip.compress(b''))
+        self.assertIsNone(logfile.open_buffer(name))
+
+    def stored_buffer(self, name):
+        """buffer opened with stored_info() of name, as a later run does"""
+        info = logfile.stored_info(name)
+        logfile._open_buffers.clear()
+        return logfile.CompressedBuffer(name, info)
+
+    def test_stored_info(self):
+        """size, line end and tail of stored_info() need no decompression"""
+        for (name, compress) in (('a.log.gz', gzip.compress),
+                                 ('a.log.xz', lzma.compress)):
+            name = self.write(name, compress)
+            info = logfile.stored_info(name)
+            self.assertEqual(info['size'], len(self.data))
+            self.assertEqual(info['line_end'], self.data.rfind(b'\n') + 1)
+            self.assertEqual([point[0] for point in info['seek']], [0, 2000])
+            buf = self.stored_buffer(name)
+            self.assertEqual(len(buf), len(self.data))
+            self.assertEqual(buf.rfind(b'\n'), self.data.rfind(b'\n'))
+            self.assertEqual(buf[-800:], self.data[-800:])
+            self.assertEqual(list(buf.windows), []) # all from the tail
+            self.check_buffer(name, self.stored_buffer(name))
+
+    def test_seek_points(self):
+        """reads of the second member start at it, not at the first"""
+        decompress = logfile.CompressedBuffer._decompress
+        decompressed = []
+        def counted(buf, max_length):
+            out = decompress(buf, max_length)
+            decompressed.append(len(out))
+            return out
+        for (name, compress) in (('a.log.gz', gzip.compress),
+                                 ('a.log.xz', lzma.compress)):
+            buf = self.stored_buffer(self.write(name, compress))
+            buf.tail, buf.tail_start = b'', buf.size
+            del decompressed[:]
+            logfile.CompressedBuffer._decompress = counted
+            try:
+                self.assertEqual(buf[3000:3100], self.data[3000:3100])
+            finally:
+                logfile.CompressedBuffer._decompress = decompress
+            self.assertLess(sum(decompressed), 2000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+# python modules
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+
+
+# qt modules
+from omg.gaussian import logindex
+
+KEYWORDS = ['orientation:', 'SCF Done:', 'Converged?', 'Step number', 'atrix:']
+
+
+def grep_b(data, keywords):
+    """(byte, key) of each line with a keyword, the first one of keywords"""
+    found = []
+    byte = 0
+    for line in data.split(b'\n'):
+        for key in keywords:
+            if key.encode() in line:
+                found.append((byte, key))
+                break
+        byte += len(line) + 1
+    return found
+
+
+def random_log(seed, newline=b'\n', n_lines=3000):
+    rnd = random.Random(seed)
+    words = [key.encode() for key in KEYWORDS] + [
+        b'1.234567', b'-0.000123', b'Center', b'Number', b'  ', b'Done',
+        b'orientation', b'Step']
+    lines = [b' '.join(rnd.choice(words) for _ in range(rnd.randint(0, 8)))
+             for _ in range(n_lines)]
+    return newline.join(lines) + newline
+
+
+class test_logindex(unittest.TestCase):
+
+    def setUp(self):
+        self.chunk_size = logindex.CHUNK_SIZE
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        logindex.CHUNK_SIZE = self.chunk_size
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data):
+        name = os.path.join(self.tmpdir, name)
+        with open(name, 'wb') as f:
+            f.write(data)
+        return name
+
+    def test_find_keywords(self):
+        """offsets are those of grep -b, across chunks and with CRLF"""
+        for chunk_size in (97, 1000, self.chunk_size):
+            logindex.CHUNK_SIZE = chunk_size
+            for newline in (b'\n', b'\r\n'):
+                data = random_log(1, newline)
+                self.assertEqual(logindex.find_keywords(data, KEYWORDS),
+                                 grep_b(data, KEYWORDS))
+
+    def test_keyword_at_chunk_border(self):
+        """a keyword split by the end of a chunk is found once"""
+        logindex.CHUNK_SIZE = 64
+        for shift in range(1, len('SCF Done:')):
+            data = b'x' * (63 - shift) + b'\n SCF Done: E=-1.0\nend\n'
+            self.assertEqual(logindex.find_keywords(data, KEYWORDS),
+                             [(64 - shift, 'SCF Done:')])
+
+    def test_index_round_trip(self):
+        """save_index and load_index give back the same index"""
+        data = random_log(2)
+        name = self.write('a.log', data)
+        bytelist = logindex.index_file(name, KEYWORDS)
+        signature = ('route', 'zmat', 'xyz', len(data), 1.0,
+                     logindex.fingerprint(name, len(data)))
+        layouts = {'Input orientation:': [321, 71, 3]}
+        logindex.save_index(name, bytelist, KEYWORDS, signature, layouts)
+        (offsets, keywords, loaded, loaded_layouts) = logindex.load_index(name)
+        self.assertEqual(keywords, KEYWORDS)
+        self.assertEqual(loaded, signature)
+        self.assertEqual(loaded_layouts, layouts)
+        self.assertEqual(logindex.offsets_to_bytelist(offsets, keywords),
+                         bytelist)
+
+    def test_fingerprint(self):
+        """fingerprints change with the head or tail of the indexed bytes"""
+        data = random_log(3, n_lines=20000)
+        name = self.write('a.log', data)
+        fingerprint = logindex.fingerprint(name, len(data))
+        self.write('a.log', data + b'more lines\n') # appended: not indexed
+        self.assertEqual(logindex.fingerprint(name, len(data)), fingerprint)
+        self.write('a.log', b'X' + data[1:])
+        self.assertNotEqual(logindex.fingerprint(name, len(data)), fingerprint)
+        self.write('a.log', data[:-2] + b'X\n')
+        self.assertNotEqual(logindex.fingerprint(name, len(data)), fingerprint)
+
+    def test_bad_index(self):
+        """files that are not indexes are not loaded"""
+        name = self.write('a.log', random_log(4))
+        self.write('a.log.index.npy', b'not an index')
+        self.assertIsNone(logindex.load_index(name))
+
+    def test_migrate_bytelist(self):
+        """legacy .bytelist pickles become .index.npy, classes are refused"""
+        data = random_log(5)
+        name = self.write('a.log', data)
+        bytelist = logindex.index_file(name, logindex.LEGACY_KEYWORDS)
+        signature = ('route', 'zmat', 'xyz', len(data))
+        with open(name + '.bytelist', 'wb') as f:
+            pickle.dump(bytelist + [signature], f, protocol=2)
+        (offsets, keywords, loaded, _) = logindex.load_index(name)
+        self.assertEqual(keywords, logindex.LEGACY_KEYWORDS)
+        self.assertEqual(loaded, signature)
+        self.assertEqual(logindex.offsets_to_bytelist(offsets, keywords),
+                         bytelist)
+        self.assertFalse(os.path.exists(name + '.bytelist'))
+        with open(name + '.bytelist.bak', 'rb') as f:
+            self.assertEqual(pickle.load(f), bytelist + [signature])
+
+        os.remove(logindex.index_filename(name))
+        with open(name + '.bytelist', 'wb') as f:
+            pickle.dump([(0, 'atrix:'), random.Random(1)], f, protocol=2)
+        self.assertIsNone(logindex.load_index(name))
+
+    def test_merge_bytelists(self):
+        """indexes of new keywords merge as if indexed together"""
+        data = random_log(6)
+        (old, new) = (KEYWORDS[:3], KEYWORDS[3:])
+        self.assertEqual(logindex.merge_bytelists(
+            logindex.find_keywords(data, old),
+            logindex.find_keywords(data, new), KEYWORDS),
+            logindex.find_keywords(data, KEYWORDS))
+
+    def test_index_file_parallel(self):
+        """ranges cut mid-line give the serial index"""
+        data = random_log(7)
+        name = self.write('a.log', data)
+        min_size = logindex.PARALLEL_MIN_SIZE
+        logindex.PARALLEL_MIN_SIZE = 0
+        try:
+            serial = logindex.index_file(name, KEYWORDS)
+            for workers in (2, 7, 64):
+                for (a, b) in logindex.split_lines(data, 0, len(data), workers):
+                    self.assertTrue(a == 0 or data[a - 1:a] == b'\n')
+                self.assertEqual(logindex.index_file_parallel(
+                    name, KEYWORDS, workers=workers), serial)
+            start = data.index(b'\n', 1000) + 1
+            self.assertEqual(logindex.index_file_parallel(
+                name, KEYWORDS, start, len(data) - 10, workers=3),
+                logindex.index_file(name, KEYWORDS, start, len(data) - 10))
+        finally:
+            logindex.PARALLEL_MIN_SIZE = min_size
+
+if __name__ == '__main__':
+    unittest.main()